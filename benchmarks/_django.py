@@ -0,0 +1,63 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Each script runs against a throwaway test database (created through Django's
+own test-db machinery) so it never touches db.sqlite3:
+
+    python -m benchmarks.bench_class_pagination
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness_studio.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@contextmanager
+def test_database(on_disk=False):
+    """
+    Create (and afterwards destroy) a test database. SQLite test databases
+    are in-memory by default; pass on_disk=True when several threads need
+    their own connections to the same data.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if on_disk and connection.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='studio-bench-')
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timed(fn, repeat=20):
+    """Run fn `repeat` times and return the median wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def report(title, rows, headers):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(f"\n{title}")
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,116 @@
+"""
+Occupancy per day over growing date ranges: aggregated from Booking joined
+to FitnessClass on every request, against summing OccupancyRollup rows as
+GET /api/analytics does. Also times a full rollup rebuild and the
+consistency check.
+
+    python -m benchmarks.bench_analytics --classes 20000 --bookings-per-class 10
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+from benchmarks._django import report, test_database, timed
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from studio.models import Booking, FitnessClass, OccupancyRollup, day_window
+
+FIRST_DAY = date(2030, 1, 1)
+
+
+def seed(classes, per_class, instructors, days):
+    rng = random.Random(7)
+    start = datetime.combine(FIRST_DAY, datetime.min.time(), tzinfo=timezone.utc)
+    FitnessClass.objects.bulk_create(
+        (
+            FitnessClass(
+                name=f'Class {i}', date_time=start + timedelta(days=rng.randrange(days), hours=rng.randrange(6, 21)),
+                instructor=f'Instructor {i % instructors}', total_slots=per_class * 2, available_slots=per_class * 2,
+            )
+            for i in range(classes)
+        ),
+        batch_size=1000,
+    )
+    class_ids = list(FitnessClass.objects.values_list('id', flat=True))
+    for first in range(0, len(class_ids), 1000):
+        Booking.objects.bulk_create(
+            Booking(fitness_class_id=class_id, client_name='Bench', client_email=f'c{n}@example.com')
+            for class_id in class_ids[first:first + 1000]
+            for n in range(rng.randint(0, per_class * 2))
+        )
+
+
+def joined(first, last):
+    """Per-day capacity and bookings straight from the base tables."""
+    start, end = day_window(first, last)
+    classes = FitnessClass.objects.filter(date_time__gte=start, date_time__lt=end)
+    capacity = dict(
+        classes.order_by().values(day=TruncDate('date_time')).annotate(n=Sum('total_slots')).values_list('day', 'n')
+    )
+    booked = dict(
+        Booking.objects.filter(fitness_class__in=classes).order_by()
+        .values(day=TruncDate('fitness_class__date_time')).annotate(n=Count('id')).values_list('day', 'n')
+    )
+    return {day: (capacity[day], booked.get(day, 0)) for day in capacity}
+
+
+def rolled_up(first, last):
+    rows = (
+        OccupancyRollup.objects.filter(day__gte=first, day__lte=last).values('day').order_by('day')
+        .annotate(capacity=Sum('capacity'), booked=Sum('booked'))
+    )
+    return {row['day']: (row['capacity'], row['booked']) for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=20000)
+    parser.add_argument('--bookings-per-class', type=int, default=10, help='average')
+    parser.add_argument('--instructors', type=int, default=30)
+    parser.add_argument('--days', type=int, default=730, help='history the classes are spread over')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.classes, args.bookings_per_class, args.instructors, args.days)
+        start = time.perf_counter()
+        call_command('rollup_occupancy', stdout=StringIO())
+        rebuild = time.perf_counter() - start
+        start = time.perf_counter()
+        call_command('rollup_occupancy', check=True, stdout=StringIO())
+        check = time.perf_counter() - start
+
+        manager = User.objects.create_user(username='boss@example.com', email='boss@example.com', is_staff=True)
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=manager).key}'}
+        client = Client()
+
+        rows = []
+        for span in (7, 90, 365):
+            last = FIRST_DAY + timedelta(days=span - 1)
+            assert joined(FIRST_DAY, last) == rolled_up(FIRST_DAY, last)
+            url = f'/api/analytics?date_from={FIRST_DAY}&date_to={last}'
+            rows.append((
+                f'{span} days',
+                f'{timed(lambda: joined(FIRST_DAY, last), args.repeat):.2f}',
+                f'{timed(lambda: rolled_up(FIRST_DAY, last), args.repeat):.2f}',
+                f'{timed(lambda: client.get(url, **auth), args.repeat):.2f}',
+            ))
+        bookings = Booking.objects.count()
+
+    report(
+        f'{args.classes:,} classes, {bookings:,} bookings: median ms per query',
+        rows, ('range', 'joined aggregate', 'rollups', 'GET /api/analytics'),
+    )
+    print(f'\nfull rebuild {rebuild:.2f}s, consistency check {check:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-user /api/bookings history latency as the bookings table grows.
+
+Grows the table in steps and, at each size, times one user's history
+fetched the old way (client_email, unindexed) and the new way (user FK via
+booking_user_recent_idx). Every user keeps ~20 bookings throughout.
+
+    python -m benchmarks.bench_booking_history --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+
+from benchmarks._django import report, test_database, timed
+
+from django.contrib.auth.models import User
+from django.utils.timezone import now
+
+from studio.models import Booking, FitnessClass
+from studio.serializers import booking_values
+
+BOOKINGS_PER_USER = 20
+
+
+def grow(target, classes, rng):
+    have = Booking.objects.count()
+    missing = target - have
+    users = User.objects.bulk_create(
+        User(username=f'u{have + i}@example.com', email=f'u{have + i}@example.com')
+        for i in range(0, missing, BOOKINGS_PER_USER)
+    )
+    # A user books a class at most once, so each picks distinct classes.
+    Booking.objects.bulk_create(
+        (
+            Booking(fitness_class=fitness_class, user=user, client_name='Bench', client_email=user.email)
+            for n, user in enumerate(users)
+            for fitness_class in rng.sample(classes, min(BOOKINGS_PER_USER, missing - n * BOOKINGS_PER_USER))
+        ),
+        batch_size=10_000,
+    )
+    return users[len(users) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with test_database():
+        classes = FitnessClass.objects.bulk_create(
+            FitnessClass(name=f'Class {i}', date_time=now(), instructor='Bench', total_slots=50, available_slots=50)
+            for i in range(500)
+        )
+        rows = []
+        for size in sorted(args.sizes):
+            user = grow(size, classes, rng)
+            by_email = timed(
+                lambda: list(booking_values(Booking.objects.filter(client_email=user.email))), args.repeat
+            )
+            by_user = timed(
+                lambda: list(booking_values(Booking.objects.filter(user=user))), args.repeat
+            )
+            rows.append((f'{size:,}', f'{by_email:.3f}', f'{by_user:.3f}'))
+
+        report('per-user history (median ms)', rows, ('bookings', 'client_email', 'user_fk'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Rows/sec for the /api/bookings list: the original per-row path (lazy FK
+access + all_timezones scan per row) against the joined `.values()` path.
+
+    python -m benchmarks.bench_booking_serialization --bookings 2000
+"""
+import argparse
+import time
+
+import pytz
+
+from benchmarks._django import report, test_database
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from studio.models import Booking, FitnessClass
+from studio.serializers import booking_values, serialize_booking_rows
+from studio.utils import resolve_timezone
+
+TZ_NAME = 'Asia/Kolkata'
+
+
+def legacy_rows(queryset):
+    # What BookingSerializer used to do for every row.
+    out = []
+    for obj in queryset:
+        if TZ_NAME in pytz.all_timezones:
+            tz = pytz.timezone(TZ_NAME)
+        else:
+            tz = pytz.UTC
+        out.append({
+            'id': obj.id,
+            'class_name': obj.fitness_class.name,
+            'date_time': obj.fitness_class.date_time.astimezone(tz).isoformat(),
+            'client_name': obj.client_name,
+            'client_email': obj.client_email,
+        })
+    return out
+
+
+def fast_rows(queryset):
+    return serialize_booking_rows(booking_values(queryset), resolve_timezone(TZ_NAME))
+
+
+def measure(fn, queryset):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        rows = fn(queryset)
+        elapsed = time.perf_counter() - start
+    return len(rows) / elapsed, len(ctx.captured_queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bookings', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database():
+        classes = FitnessClass.objects.bulk_create(
+            FitnessClass(name=f'Class {i}', date_time=now(), instructor='Bench', total_slots=10, available_slots=10)
+            for i in range(args.bookings)
+        )
+        Booking.objects.bulk_create(
+            Booking(fitness_class=c, client_name='Bench', client_email='bench@example.com') for c in classes
+        )
+        queryset = Booking.objects.filter(client_email='bench@example.com')
+
+        rows = []
+        for label, fn, qs in (
+            ('legacy (lazy FK)', legacy_rows, queryset),
+            ('fast (.values join)', fast_rows, queryset),
+        ):
+            rate, queries = measure(fn, qs)
+            rows.append((label, f'{rate:,.0f}', queries))
+        report(f'{args.bookings} bookings', rows, ('path', 'rows/sec', 'queries'))
+
+
+if __name__ == '__main__':
+    main()
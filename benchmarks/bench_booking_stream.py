@@ -0,0 +1,88 @@
+"""
+Peak memory of one /api/bookings request for a single account with a
+growing history, rendered in one piece versus ?stream=1 / ?stream=ndjson.
+
+Requests go through Django's test client in-process, so tracemalloc sees
+everything the worker allocates: the queryset, serialized rows and the
+response body. Flat stream peaks mean memory no longer tracks history size.
+
+    python -m benchmarks.bench_booking_stream --sizes 1000 10000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks._django import report, test_database
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+
+from studio.models import Booking, FitnessClass
+
+
+def fetch(client, url, auth):
+    """Peak MB, seconds, first-byte ms and body size for one request."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        response = client.get(url, **auth)
+        assert response.status_code == 200, response.status_code
+        if response.streaming:
+            size = first_byte = 0
+            for chunk in response.streaming_content:
+                first_byte = first_byte or time.perf_counter()
+                size += len(chunk)
+        else:
+            first_byte = time.perf_counter()
+            size = len(response.content)
+        elapsed = time.perf_counter() - start
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20, elapsed, (first_byte - start) * 1000, size
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    with test_database():
+        user = User.objects.create_user(username='corp@example.com', email='corp@example.com', first_name='Corp')
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        # One booking per class: an account cannot book the same class twice.
+        classes = FitnessClass.objects.bulk_create(
+            (
+                FitnessClass(name=f'Class {i}', date_time=now(), instructor='Bench', total_slots=50, available_slots=50)
+                for i in range(max(args.sizes))
+            ),
+            batch_size=10_000,
+        )
+        client = Client()
+        client.get('/api/bookings', **auth)  # warm the token cache and imports
+
+        rows = []
+        for size in sorted(args.sizes):
+            have = Booking.objects.count()
+            Booking.objects.bulk_create(
+                (
+                    Booking(fitness_class=fitness_class, user=user, client_name='Corp', client_email=user.email)
+                    for fitness_class in classes[have:size]
+                ),
+                batch_size=10_000,
+            )
+            for mode, query in (('list', ''), ('stream=1', '?stream=1'), ('stream=ndjson', '?stream=ndjson')):
+                peak, seconds, first_byte, body = fetch(client, f'/api/bookings{query}', auth)
+                rows.append((
+                    f'{size:,}', mode, f'{peak:.1f}', f'{seconds:.2f}', f'{first_byte:.0f}', f'{body / 2 ** 20:.1f}',
+                ))
+
+        report(
+            'GET /api/bookings for one account (tracemalloc on)', rows,
+            ('bookings', 'mode', 'peak_mb', 'seconds', 'first_byte_ms', 'body_mb'),
+        )
+
+
+if __name__ == '__main__':
+    main()
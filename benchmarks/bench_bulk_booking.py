@@ -0,0 +1,66 @@
+"""
+Booking a weekly plan: N single POST /api/book calls against one
+POST /api/book/bulk, both through the full URL/middleware/token-auth stack.
+
+    python -m benchmarks.bench_bulk_booking --classes 20 --rounds 50
+"""
+import argparse
+import time
+
+from benchmarks._django import report, test_database
+
+from django.contrib.auth.models import User
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from studio.models import FitnessClass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    with test_database():
+        # A user books a class once, so every plan comes from a new account.
+        tokens = iter([
+            Token.objects.create(user=User.objects.create_user(f'plan{i}@example.com', f'plan{i}@example.com', first_name='Plan')).key
+            for i in range(args.rounds * 2)
+        ])
+        client = APIClient()
+        ids = [
+            c.id for c in FitnessClass.objects.bulk_create(
+                FitnessClass(name=f'Class {i}', date_time=now(), instructor='Bench',
+                             total_slots=10 ** 6, available_slots=10 ** 6)
+                for i in range(args.classes)
+            )
+        ]
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            client.credentials(HTTP_AUTHORIZATION=f'Token {next(tokens)}')
+            for class_id in ids:
+                assert client.post('/api/book', {'class_id': class_id, 'client_name': 'Plan'}, format='json').status_code == 201
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            client.credentials(HTTP_AUTHORIZATION=f'Token {next(tokens)}')
+            assert client.post('/api/book/bulk', {'class_ids': ids, 'client_name': 'Plan'}, format='json').status_code == 201
+        bulk = time.perf_counter() - start
+
+        total = args.rounds * args.classes
+        report(
+            f'{args.rounds} weekly plans of {args.classes} classes',
+            [
+                ('single', f'{total / single:,.0f}', f'{single / args.rounds * 1000:.1f}'),
+                ('bulk', f'{total / bulk:,.0f}', f'{bulk / args.rounds * 1000:.1f}'),
+            ],
+            ('mode', 'bookings/sec', 'ms per plan'),
+        )
+
+
+if __name__ == '__main__':
+    main()
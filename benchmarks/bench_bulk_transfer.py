@@ -0,0 +1,83 @@
+"""
+Time and peak Python memory of the streaming import_classes / export_bookings
+commands at growing sizes, next to `dumpdata` for the same bookings. Flat
+peaks across sizes mean memory does not grow with the file.
+
+    python -m benchmarks.bench_bulk_transfer --sizes 10000 100000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from benchmarks._django import report, test_database
+
+from django.core.management import call_command
+
+from studio.models import Booking, FitnessClass
+from studio.transfer import render_rows
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+        return time.perf_counter() - start, tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def write_classes(path, count):
+    start = datetime(2030, 1, 1, 6, tzinfo=timezone.utc)
+    rows = (
+        (f'Class {i}', start + timedelta(minutes=30 * i), f'Instructor {i % 50}', 20)
+        for i in range(count)
+    )
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        out.writelines(render_rows('csv', ('name', 'date_time', 'instructor', 'total_slots'), rows))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='studio-transfer-')
+    rows = []
+    try:
+        with test_database(on_disk=True):
+            for size in args.sizes:
+                source = os.path.join(tmp, f'classes-{size}.csv')
+                write_classes(source, size)
+                seconds, peak = measure(lambda: call_command('import_classes', source, stdout=StringIO()))
+                rows.append(('import_classes', f'{size:,}', f'{seconds:.2f}', f'{peak:.1f}'))
+
+                class_ids = list(FitnessClass.objects.values_list('id', flat=True))
+                Booking.objects.bulk_create(
+                    (Booking(fitness_class_id=class_id, client_name='Load', client_email=f'c{i}@example.com')
+                     for i, class_id in enumerate(class_ids)),
+                    batch_size=2000,
+                )
+                target = os.path.join(tmp, f'bookings-{size}.csv')
+                seconds, peak = measure(lambda: call_command('export_bookings', output=target, stderr=StringIO()))
+                rows.append(('export_bookings', f'{size:,}', f'{seconds:.2f}', f'{peak:.1f}'))
+
+                target = os.path.join(tmp, f'bookings-{size}.json')
+                seconds, peak = measure(lambda: call_command('dumpdata', 'studio.booking', output=target))
+                rows.append(('dumpdata studio.booking', f'{size:,}', f'{seconds:.2f}', f'{peak:.1f}'))
+
+                Booking.objects.all().delete()
+                FitnessClass.objects.all().delete()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report('Bulk transfer (on-disk SQLite, tracemalloc on)', rows, ('command', 'rows', 'seconds', 'peak_mb'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Page cost of GET /api/classes at increasing scroll depth.
+
+Seeds N upcoming classes, then times the keyset page query at several depths
+next to the equivalent LIMIT/OFFSET query. Keyset cost should stay flat.
+
+    python -m benchmarks.bench_class_pagination --classes 100000
+"""
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks._django import report, test_database, timed
+
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory
+
+from studio.models import FitnessClass
+from studio.pagination import ScheduleCursorPagination
+
+INSTRUCTORS = [f"Instructor {i}" for i in range(50)]
+
+
+def seed(count):
+    rng = random.Random(42)
+    start = now() + timedelta(hours=1)
+    FitnessClass.objects.bulk_create(
+        (
+            FitnessClass(
+                name=f"Class {i}",
+                date_time=start + timedelta(minutes=rng.randrange(0, 60 * 24 * 365)),
+                instructor=rng.choice(INSTRUCTORS),
+                total_slots=20,
+                available_slots=rng.randrange(0, 21),
+            )
+            for i in range(count)
+        ),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    with test_database():
+        seed(args.classes)
+        fields = ('id', 'name', 'date_time', 'instructor', 'total_slots', 'available_slots')
+        upcoming = FitnessClass.objects.filter(date_time__gte=now()).values(*fields)
+        ordered = list(upcoming.order_by('date_time', 'id').values_list('date_time', 'id'))
+
+        rows = []
+        for depth in (0, 1_000, 10_000, args.classes // 2, args.classes - args.page_size - 1):
+            depth = max(0, min(depth, len(ordered) - 1))
+            pager = ScheduleCursorPagination()
+            query = f'/api/classes?page_size={args.page_size}'
+            if depth:
+                query += f'&cursor={pager.encode_cursor(*ordered[depth - 1])}'
+            request = factory.get(query)
+            request.query_params = request.GET
+
+            # Same cutoff ClassListView applies: the later of now and the cursor.
+            cutoff = ordered[depth - 1][0] if depth else now()
+            base = FitnessClass.objects.filter(date_time__gte=cutoff).values(*fields)
+            keyset_ms = timed(lambda: pager.paginate_queryset(base, request))
+            offset_ms = timed(lambda: list(upcoming.order_by('date_time', 'id')[depth:depth + args.page_size]))
+            rows.append((depth, f'{keyset_ms:.2f}', f'{offset_ms:.2f}'))
+
+        report(
+            f'{args.classes} classes, page_size={args.page_size} (median ms per page)',
+            rows,
+            ('depth', 'keyset', 'offset'),
+        )
+
+
+if __name__ == '__main__':
+    main()
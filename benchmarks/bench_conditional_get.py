@@ -0,0 +1,80 @@
+"""
+Polling cost of /api/classes and /api/bookings: a full download against a
+conditional GET that comes back 304, and a ?since= delta after one booking.
+
+    python -m benchmarks.bench_conditional_get --classes 5000 --bookings 500
+"""
+import argparse
+import random
+
+from benchmarks._django import report, test_database, timed
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from benchmarks.bench_class_pagination import seed
+from studio.models import Booking, FitnessClass
+from studio.views import ClassListView, UserBookingsView
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=5000)
+    parser.add_argument('--bookings', type=int, default=500)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    views = {'classes': ClassListView.as_view(), 'bookings': UserBookingsView.as_view()}
+
+    # Measure the database and serialization work, not the schedule cache.
+    with test_database(), override_settings(STUDIO_SCHEDULE_CACHE={'ENABLED': False}):
+        seed(args.classes)
+        user = User.objects.create_user('bench@example.com', 'bench@example.com', 'x', first_name='Bench')
+        class_ids = list(FitnessClass.objects.values_list('id', flat=True))
+        rng = random.Random(5)
+        Booking.objects.bulk_create(
+            Booking(fitness_class_id=class_id, user=user, client_name='Bench', client_email=user.email)
+            for class_id in rng.sample(class_ids, args.bookings)
+        )
+        params = {
+            'classes': {'email': user.email, 'page_size': args.page_size},
+            'bookings': {},
+        }
+
+        def get(name, extra=None, **headers):
+            request = factory.get(f'/api/{name}', {**params[name], **(extra or {})}, **headers)
+            force_authenticate(request, user=user)
+            response = views[name](request)
+            response.render()
+            return response
+
+        rows = []
+        for name in ('classes', 'bookings'):
+            first = get(name)
+            etag = first['ETag']
+            modes = [('full', {}, {}), ('304', {}, {'HTTP_IF_NONE_MATCH': etag})]
+            if name == 'classes':
+                modes.append(('since (1 change)', {'since': first['X-Schedule-Version']}, {}))
+            for mode, extra, headers in modes:
+                if mode.startswith('since'):
+                    FitnessClass.objects.reserve(class_ids[0])
+                with CaptureQueriesContext(connection) as ctx:
+                    response = get(name, extra, **headers)
+                queries = len(ctx.captured_queries)
+                ms = timed(lambda: get(name, extra, **headers), repeat=args.repeat)
+                rows.append((f'/api/{name}', mode, response.status_code, len(response.content), queries, f'{ms:.3f}'))
+
+        report(
+            f'{args.classes} classes (page_size={args.page_size}), {args.bookings} bookings for the user',
+            rows,
+            ('endpoint', 'mode', 'status', 'bytes', 'queries', 'median_ms'),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Cost of validating a schedule import for instructor and room clashes.
+
+Builds a clash-free schedule of --sizes classes (40 instructors, 15 rooms,
+two classes every half hour) and checks it with:
+
+  pairwise         every pair of classes compared, O(n^2)
+  sweep            studio.scheduling.find_clashes, in memory, O(n log n)
+  conflicts()      FitnessClass.objects.conflicts against an equally large
+                   schedule already in the database, ending where the
+                   import starts (the import_classes path)
+
+    python -m benchmarks.bench_conflicts --sizes 1000 5000 10000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._django import report, test_database
+
+from studio.models import FitnessClass
+from studio.scheduling import class_end, find_clashes, resources
+
+INSTRUCTORS = 40
+ROOMS = 15
+
+
+def schedule(count, start):
+    # Two 25-minute classes start every half hour, on different instructors
+    # and rooms, so the schedule is clash-free and every check does full work.
+    return [
+        FitnessClass(
+            name=f'Class {i}', date_time=start + timedelta(minutes=30 * (i // 2)), duration=25,
+            instructor=f'Instructor {i % INSTRUCTORS}', room=f'Room {i % ROOMS}',
+            total_slots=20, available_slots=20,
+        )
+        for i in range(count)
+    ]
+
+
+def pairwise(classes):
+    found = 0
+    for i, first in enumerate(classes):
+        first_end, first_resources = class_end(first), set(resources(first))
+        for second in classes[i + 1:]:
+            if (
+                second.date_time < first_end and first.date_time < class_end(second)
+                and first_resources.intersection(resources(second))
+            ):
+                found += 1
+    return found
+
+
+def seconds(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000])
+    parser.add_argument('--pairwise-limit', type=int, default=10000, help='skip the O(n^2) check above this size')
+    args = parser.parse_args()
+
+    rows = []
+    with test_database():
+        for size in args.sizes:
+            FitnessClass.objects.all().delete()
+            origin = datetime(2030, 1, 1, 6, tzinfo=timezone.utc)
+            FitnessClass.objects.bulk_create(schedule(size, origin), batch_size=1000)
+            incoming = schedule(size, origin + timedelta(minutes=30 * size))
+
+            sweep, clashes = seconds(lambda batch: list(find_clashes(batch)), incoming)
+            assert not clashes
+            checked, clashes = seconds(FitnessClass.objects.conflicts, incoming)
+            assert not clashes
+            naive = f'{seconds(pairwise, incoming)[0]:.3f}' if size <= args.pairwise_limit else 'skipped'
+            rows.append((f'{size:,}', naive, f'{sweep:.3f}', f'{checked:.3f}'))
+
+    report('seconds to check an import of n classes', rows, ('n', 'pairwise', 'sweep', 'conflicts()'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+POST /api/login throughput at different PBKDF2 costs, plus the query count
+of the old lookup-then-authenticate() path against the single-lookup path.
+
+    python -m benchmarks.bench_login --iterations 1000000 260000 100000
+"""
+import argparse
+import time
+
+from benchmarks._django import report, test_database
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+PASSWORD = 'bench-password'
+
+
+def legacy_login(email):
+    user = User.objects.get(email=email)
+    user = authenticate(username=user.username, password=PASSWORD)
+    Token.objects.get_or_create(user=user)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, nargs='+', default=[1_000_000, 260_000, 100_000])
+    parser.add_argument('--logins', type=int, default=10)
+    args = parser.parse_args()
+
+    client = APIClient()
+    payload = {'email': 'login@example.com', 'password': PASSWORD}
+    with test_database():
+        rows = []
+        for iterations in args.iterations:
+            with override_settings(STUDIO_PASSWORD_ITERATIONS=iterations):
+                User.objects.filter(email=payload['email']).delete()
+                client.post('/api/signup', dict(payload, name='Login'), format='json')
+
+                # Read the counts right away: each request resets the query log.
+                with CaptureQueriesContext(connection) as ctx:
+                    legacy_login(payload['email'])
+                legacy_queries = len(ctx.captured_queries)
+                with CaptureQueriesContext(connection) as ctx:
+                    assert client.post('/api/login', payload, format='json').status_code == 200
+                fast_queries = len(ctx.captured_queries)
+
+                start = time.perf_counter()
+                for _ in range(args.logins):
+                    client.post('/api/login', payload, format='json')
+                rate = args.logins / (time.perf_counter() - start)
+                rows.append((f'{iterations:,}', f'{rate:,.1f}', legacy_queries, fast_queries))
+
+        report('login throughput (single thread)', rows, ('iterations', 'logins/sec', 'old_queries', 'new_queries'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Materializing recurring class series: one save() per occurrence (what the
+admin did) against ClassSeries.materialize's chunked bulk_create, plus the
+cost of re-running over a horizon that already exists.
+
+    python -m benchmarks.bench_materialize --series 100 --days 1000 --naive-series 5
+"""
+import argparse
+import time as clock
+from datetime import time, timedelta
+
+from benchmarks._django import report, test_database
+
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from studio.models import ClassSeries, FitnessClass
+
+
+def make_series(count, start):
+    return ClassSeries.objects.bulk_create(
+        ClassSeries(
+            name=f'Series {i}', instructor=f'Instructor {i % 20}', total_slots=20,
+            weekdays='mon,tue,wed,thu,fri,sat,sun', start_time=time(6 + i % 14, 0),
+            timezone='Europe/London', start_date=start,
+        )
+        for i in range(count)
+    )
+
+
+def materialize_all(series, until, chunk_size, today, resume=True):
+    start = clock.perf_counter()
+    created = 0
+    for item in series:
+        with transaction.atomic():
+            created += item.materialize(until, chunk_size=chunk_size, today=today, resume=resume)
+    return created, clock.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--series', type=int, default=100)
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--naive-series', type=int, default=5, help='series to time with one save() each')
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    today = localdate()
+    until = today + timedelta(days=args.days - 1)
+    rows = []
+
+    with test_database(on_disk=True):
+        # Baseline: one INSERT (and its save signals) per occurrence.
+        series = make_series(args.naive_series, today)
+        start = clock.perf_counter()
+        created = 0
+        for item in series:
+            with transaction.atomic():
+                for starts in item.occurrences(today, until):
+                    FitnessClass.objects.create(
+                        series=item, name=item.name, instructor=item.instructor, date_time=starts,
+                        total_slots=item.total_slots, available_slots=item.total_slots,
+                    )
+                    created += 1
+        elapsed = clock.perf_counter() - start
+        rows.append(('save() per occurrence', '-', created, f'{elapsed:.2f}', f'{created / elapsed:,.0f}'))
+        FitnessClass.objects.all().delete()
+        ClassSeries.objects.all().delete()
+
+        for chunk_size in args.chunk_sizes:
+            series = make_series(args.series, today)
+            created, elapsed = materialize_all(series, until, chunk_size, today)
+            rows.append(('bulk_create', chunk_size, created, f'{elapsed:.2f}', f'{created / elapsed:,.0f}'))
+
+            if chunk_size == args.chunk_sizes[-1]:
+                created, elapsed = materialize_all(series, until, chunk_size, today)
+                rows.append(('re-run, resume', chunk_size, created, f'{elapsed:.2f}', '-'))
+                created, elapsed = materialize_all(series, until, chunk_size, today, resume=False)
+                rows.append(('re-run, --rebuild (index skips all)', chunk_size, created, f'{elapsed:.2f}', '-'))
+            else:
+                FitnessClass.objects.all().delete()
+                ClassSeries.objects.all().delete()
+
+        report(
+            f'{args.series} daily series x {args.days} days = {args.series * args.days:,} occurrences (on-disk SQLite)',
+            rows,
+            ('mode', 'chunk', 'created', 'seconds', 'rows/s'),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Per-request cost of RequestMetricsMiddleware and the query timer.
+
+Serves a warm /api/classes page (token and schedule caches hit, one
+version query) and a /api/bookings history in-process, with the
+instrumentation removed and installed, and reports the median latency of
+each. The warm page is about the cheapest request the API serves, so it
+shows the overhead at its largest relative size.
+
+    python -m benchmarks.bench_metrics --requests 1000 --rounds 5
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks._django import report, test_database
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+
+from studio.metrics import query_timer, request_metrics
+from studio.models import Booking, FitnessClass
+
+MIDDLEWARE = 'studio.metrics.RequestMetricsMiddleware'
+
+
+def median_us(client, url, auth, count):
+    client.get(url, **auth)
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get(url, **auth)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=1000, help='per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        user = User.objects.create_user(username='m@example.com', email='m@example.com', first_name='M')
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        classes = FitnessClass.objects.bulk_create(
+            FitnessClass(name=f'Class {i}', date_time=now(), instructor='Bench', total_slots=50, available_slots=50)
+            for i in range(50)
+        )
+        Booking.objects.bulk_create(
+            Booking(fitness_class=fitness_class, user=user, client_name='M', client_email=user.email)
+            for fitness_class in classes
+        )
+        urls = {'warm /api/classes': '/api/classes?email=m@example.com', '/api/bookings (50)': '/api/bookings'}
+
+        without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        results = {}
+        # Alternate modes and keep each one's best round, to keep machine
+        # noise out of a difference of a few percent.
+        for _ in range(args.rounds):
+            for mode in ('off', 'on'):
+                if mode == 'off':
+                    connection.execute_wrappers.remove(query_timer)
+                    overrides = override_settings(MIDDLEWARE=without)
+                else:
+                    connection.execute_wrappers.append(query_timer)
+                    overrides = override_settings()
+                with overrides:
+                    client = Client()
+                    for name, url in urls.items():
+                        sample = median_us(client, url, auth, args.requests)
+                        results[name, mode] = min(results.get((name, mode), sample), sample)
+
+        rows = []
+        for name in urls:
+            off, on = results[name, 'off'], results[name, 'on']
+            rows.append((name, f'{off:.0f}', f'{on:.0f}', f'{on - off:+.0f}', f'{(on - off) / off:+.1%}'))
+        report(
+            f'best median of {args.rounds} x {args.requests} in-process requests (us)', rows,
+            ('request', 'off', 'on', 'delta', 'relative'),
+        )
+        print(f"\n{len(request_metrics.render().splitlines())} lines of /metrics output")
+
+
+if __name__ == '__main__':
+    main()
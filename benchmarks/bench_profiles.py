@@ -0,0 +1,119 @@
+"""
+What each settings profile costs before it serves anything.
+
+For the full (`fitness_studio.settings`), `api` and `test` profiles, in fresh
+interpreters:
+
+- import: modules imported and their total self time under `-X importtime`
+  while loading the WSGI application and its URLconf;
+- cold start: wall time from launching a worker interpreter to its first
+  response (an unauthenticated GET /api/classes, so no database is needed);
+- tests: wall time of `manage.py test` on the profile, and on the test
+  profile with `--parallel` as well.
+
+    python -m benchmarks.bench_profiles --repeat 5 --parallel 4
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROFILES = {
+    'full': 'fitness_studio.settings',
+    'api': 'fitness_studio.settings.api',
+    'test': 'fitness_studio.settings.test',
+}
+
+# What a gunicorn worker does on boot, plus its first request, called as
+# plain WSGI: django.test would import the ASGI stack into every profile.
+WORKER = """
+from io import BytesIO
+from fitness_studio.wsgi import application
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/classes', 'QUERY_STRING': '', 'SERVER_NAME': 'testserver',
+    'SERVER_PORT': '80', 'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+}
+status = []
+b''.join(application(environ, lambda line, headers: status.append(line)))
+assert status[0].startswith('401'), status
+"""
+
+
+def profile_env(settings, tmp):
+    return dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings,
+        DJANGO_SQLITE_PATH=os.path.join(tmp, 'profile.sqlite3'),
+        DJANGO_DEBUG='0',
+        DJANGO_ALLOWED_HOSTS='testserver',
+        PYTHONPATH=str(ROOT),
+    )
+
+
+def import_cost(env):
+    """(modules imported, milliseconds of import self time) for one worker boot."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER], cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    self_us = [
+        int(line.split('|')[0].split(':')[1])
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and not line.startswith('import time: self')
+    ]
+    return len(self_us), sum(self_us) / 1000
+
+
+def cold_start(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', WORKER], cwd=ROOT, env=env, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def test_run(settings, *extra):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, 'manage.py', 'test', f'--settings={settings}', '--verbosity=0', *extra],
+        cwd=ROOT, env={**os.environ, 'PYTHONPATH': str(ROOT)}, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise SystemExit(f'manage.py test failed on {settings}:\n{result.stderr[-2000:]}')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5, help='runs per import and cold-start median')
+    parser.add_argument('--parallel', default='auto', help='processes for the parallel test run')
+    parser.add_argument('--skip-tests', action='store_true', help='only measure imports and cold start')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='studio-profiles-') as tmp:
+        for name, settings in PROFILES.items():
+            env = profile_env(settings, tmp)
+            runs = [import_cost(env) for _ in range(args.repeat)]
+            starts = [cold_start(env) for _ in range(args.repeat)]
+            tests = '-' if args.skip_tests else f'{test_run(settings):.1f}'
+            rows.append((
+                name, runs[0][0], f'{statistics.median(ms for _, ms in runs):.0f}',
+                f'{statistics.median(starts):.0f}', tests,
+            ))
+        if not args.skip_tests:
+            seconds = test_run(PROFILES['test'], f'--parallel={args.parallel}')
+            rows.append((f'test --parallel={args.parallel}', '-', '-', '-', f'{seconds:.1f}'))
+
+    headers = ('profile', 'modules', 'import_ms', 'cold_start_ms', 'tests_s')
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(f'\nmedians of {args.repeat} fresh interpreters, {os.cpu_count()} CPUs')
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+GET /api/classes latency with and without the schedule cache.
+
+    python -m benchmarks.bench_schedule_cache --classes 5000 --timezones 5
+"""
+import argparse
+
+from benchmarks._django import report, test_database, timed
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from benchmarks.bench_class_pagination import seed
+from studio.cache import schedule_cache
+from studio.views import ClassListView
+
+TIMEZONES = ['UTC', 'Asia/Kolkata', 'Europe/London', 'America/New_York', 'Australia/Sydney']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--timezones', type=int, default=len(TIMEZONES))
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    view = ClassListView.as_view()
+    with test_database():
+        seed(args.classes)
+        user = User.objects.create_user('bench@example.com', 'bench@example.com', 'x', first_name='Bench')
+        zones = TIMEZONES[:args.timezones]
+        state = {'i': 0}
+
+        def call():
+            tz = zones[state['i'] % len(zones)]
+            state['i'] += 1
+            request = factory.get(
+                '/api/classes', {'email': user.email, 'timezone': tz, 'page_size': args.page_size}
+            )
+            force_authenticate(request, user=user)
+            assert view(request).status_code == 200
+
+        rows = []
+        for enabled in (False, True):
+            with override_settings(STUDIO_SCHEDULE_CACHE={'ENABLED': enabled}):
+                schedule_cache.clear()
+                schedule_cache.entries.reset_stats()
+                ms = timed(call, repeat=args.repeat)
+                stats = schedule_cache.stats()
+                rows.append(('cached' if enabled else 'uncached', f'{ms:.3f}', stats['hits'], stats['misses']))
+
+        report(
+            f'{args.classes} classes, page_size={args.page_size}, {len(zones)} timezones (median ms per request)',
+            rows,
+            ('mode', 'median_ms', 'hits', 'misses'),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+How many /api/classes/stream subscribers one ASGI worker keeps up with.
+
+Starts a single uvicorn worker on a fresh SQLite database, opens
+--subscribers server-sent-event connections, then books one class
+--bookings times at --rate per second through POST /api/book. For each
+subscriber count it reports how many slot updates arrived, how many
+subscribers had to be reset, delivery latency from the booking request to
+the update reaching a subscriber, and the worker's resident memory.
+
+    python -m benchmarks.bench_slot_stream --subscribers 100 1000 5000 --bookings 100 --rate 20
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.loadtest_servers import ROOT, PORT, seed, wait_for_port
+
+
+def rss_mb(pid):
+    for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def subscribe(email, token, sent_at, stats, ready):
+    reader, writer = await asyncio.open_connection('127.0.0.1', PORT, limit=1 << 20)
+    # HTTP/1.0 so the stream arrives unchunked and can be read line by line.
+    writer.write(
+        f'GET /api/classes/stream?email={email} HTTP/1.0\r\n'
+        f'Host: 127.0.0.1\r\nAuthorization: Token {token}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    status = await reader.readline()
+    await reader.readuntil(b'\r\n\r\n')
+    if b' 200 ' not in status:
+        stats['failed'] += 1
+        writer.close()
+        return
+    ready.append(1)
+    seen = set()
+    try:
+        while line := await reader.readline():
+            if line.startswith(b'data: ['):
+                now = time.perf_counter()
+                for item in json.loads(line[6:]):
+                    sent = sent_at.get(item['available_slots'])
+                    if sent is not None and item['available_slots'] not in seen:
+                        seen.add(item['available_slots'])
+                        stats['latencies'].append(now - sent)
+                        stats['delivered'] += 1
+            elif line.startswith(b'event: reset'):
+                stats['resets'] += 1
+    finally:
+        writer.close()
+
+
+def book(tokens, class_id, rate, start_slots, sent_at):
+    # One booker per seat: a user may hold only one booking for the class.
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+    body = json.dumps({'class_id': class_id, 'client_name': 'Load'})
+    for i, token in enumerate(tokens):
+        sent_at[start_slots - i - 1] = time.perf_counter()
+        conn.request('POST', '/api/book', body, {'Authorization': f'Token {token}', 'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 201, response.status
+        time.sleep(1 / rate)
+    conn.close()
+
+
+async def run(n, args, email, token, bookers, class_id, start_slots, pid):
+    sent_at = {}
+    stats = {'latencies': [], 'delivered': 0, 'resets': 0, 'failed': 0}
+    ready = []
+    tasks = []
+    for offset in range(0, n, 500):  # stay inside the listen backlog
+        batch = [
+            asyncio.create_task(subscribe(email, token, sent_at, stats, ready))
+            for _ in range(min(500, n - offset))
+        ]
+        tasks += batch
+        while len(ready) + stats['failed'] < len(tasks):
+            await asyncio.sleep(0.05)
+    idle_rss = rss_mb(pid)
+
+    await asyncio.to_thread(book, bookers, class_id, args.rate, start_slots, sent_at)
+    await asyncio.sleep(2)
+    busy_rss = rss_mb(pid)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = sorted(stats['latencies'])
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0  # noqa: E731
+    expected = len(ready) * args.bookings
+    return (
+        n, len(ready),
+        f"{stats['delivered'] / expected:.1%}" if expected else '-',
+        stats['resets'],
+        f'{statistics.median(latencies) * 1000:.1f}' if latencies else '-',
+        f'{pct(0.99):.1f}',
+        f'{idle_rss:.0f}', f'{busy_rss:.0f}',
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--bookings', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=20, help='bookings per second')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='studio-stream-')
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='fitness_studio.settings',
+        DJANGO_SQLITE_PATH=os.path.join(tmp, 'stream.sqlite3'),
+        DJANGO_DEBUG='0',
+        DJANGO_ALLOWED_HOSTS='127.0.0.1,localhost',
+        PYTHONPATH=str(ROOT),
+    )
+    os.environ.update(env)
+    sys.path.insert(0, str(ROOT))
+    email, token = seed(classes=10, bookings=0)
+
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from studio.models import FitnessClass
+
+    bookers = [
+        Token.objects.create(user=User.objects.create_user(f'booker{i}@example.com', f'booker{i}@example.com', first_name='Load')).key
+        for i in range(args.bookings * len(args.subscribers))
+    ]
+    slots = 10 ** 6
+    fitness_class = FitnessClass.objects.order_by('id').first()
+    FitnessClass.objects.filter(id=fitness_class.id).update(available_slots=slots, total_slots=slots)
+
+    server = subprocess.Popen(
+        ['uvicorn', 'fitness_studio.asgi:application', '--port', str(PORT), '--workers', '1',
+         '--no-access-log', '--log-level', 'warning', '--backlog', '4096'],
+        cwd=ROOT, env=env,
+    )
+    rows = []
+    try:
+        wait_for_port(PORT)
+        for run_no, n in enumerate(args.subscribers):
+            tokens = bookers[run_no * args.bookings:(run_no + 1) * args.bookings]
+            rows.append(asyncio.run(run(n, args, email, token, tokens, fitness_class.id, slots, server.pid)))
+            slots -= args.bookings
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    headers = ('subscribers', 'connected', 'delivered', 'resets', 'p50_ms', 'p99_ms', 'rss_idle_mb', 'rss_busy_mb')
+    print(f'\n1 uvicorn worker, {args.bookings} bookings at {args.rate:g}/s')
+    print('  '.join(f'{h:>11}' for h in headers))
+    for row in rows:
+        print('  '.join(f'{str(c):>11}' for c in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Mixed /api/classes reads and /api/book writes from many threads against an
+on-disk SQLite database, with the default connection settings and with the
+tuned profile from studio/sqlite.py (WAL, busy timeout, BEGIN IMMEDIATE,
+in-process write queue).
+
+    python -m benchmarks.bench_sqlite_profile --requests 4000 --workers 32 --write-ratio 0.3
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._django import report, test_database
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from benchmarks.bench_class_pagination import seed
+from studio.models import Booking, FitnessClass
+from studio.sqlite import tuned_options
+from studio.views import BookClassView, ClassListView
+
+
+def use_options(options):
+    connections.close_all()
+    settings.DATABASES['default']['OPTIONS'] = options
+    connection.settings_dict['OPTIONS'] = options
+
+
+def run(args, users, class_ids):
+    factory = APIRequestFactory()
+    read_view, write_view = ClassListView.as_view(), BookClassView.as_view()
+    rng = random.Random(3)
+    # Repeat (user, class) pairs answer 409; start both profiles from the
+    # same empty table so they see the same mix of inserts and conflicts.
+    Booking.objects.all().delete()
+    plan = [(rng.random() < args.write_ratio, users[i % len(users)], rng.choice(class_ids)) for i in range(args.requests)]
+    latencies = {True: [], False: []}
+
+    def call(item):
+        is_write, user, class_id = item
+        if is_write:
+            request = factory.post('/api/book', {'class_id': class_id, 'client_name': 'Mix'}, format='json')
+            view = write_view
+        else:
+            request = factory.get('/api/classes', {'email': user.email, 'page_size': 50})
+            view = read_view
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        try:
+            outcome = view(request).status_code
+        except Exception as exc:  # "database is locked"
+            outcome = type(exc).__name__
+        finally:
+            latencies[is_write].append(time.perf_counter() - start)
+            connections.close_all()
+        return ('write' if is_write else 'read', outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = Counter(pool.map(call, plan))
+    elapsed = time.perf_counter() - start
+
+    def p99(values):
+        values = sorted(values)
+        return values[int(len(values) * 0.99)] * 1000 if values else 0
+
+    errors = sum(n for (kind, outcome), n in outcomes.items() if not isinstance(outcome, int))
+    return (
+        f'{args.requests / elapsed:,.0f}',
+        f'{p99(latencies[False]):.1f}',
+        f'{p99(latencies[True]):.1f}',
+        errors,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--classes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database(on_disk=True), override_settings(STUDIO_SCHEDULE_CACHE={'ENABLED': False}):
+        seed(args.classes)
+        FitnessClass.objects.update(available_slots=10 ** 6, total_slots=10 ** 6)
+        users = User.objects.bulk_create(
+            User(username=f'm{i}@example.com', email=f'm{i}@example.com', first_name='Mix') for i in range(200)
+        )
+        class_ids = list(FitnessClass.objects.values_list('id', flat=True)[:50])
+
+        rows = []
+        original = dict(connection.settings_dict.get('OPTIONS', {}))
+        try:
+            use_options({})
+            with override_settings(STUDIO_SERIALIZE_WRITES=False):
+                rows.append(('default', *run(args, users, class_ids)))
+            use_options(tuned_options())
+            with override_settings(STUDIO_SERIALIZE_WRITES=True):
+                rows.append(('tuned', *run(args, users, class_ids)))
+        finally:
+            use_options(original)
+
+        report(
+            f'{args.requests} requests, {args.workers} threads, {args.write_ratio:.0%} writes',
+            rows,
+            ('profile', 'req/s', 'read_p99_ms', 'write_p99_ms', 'errors'),
+        )
+
+
+if __name__ == '__main__':
+    main()
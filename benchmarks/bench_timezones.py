@@ -0,0 +1,93 @@
+"""
+Class-row serialization rows/sec across many ?timezone= values.
+
+Serializes the same schedule for --zones different timezones, the way a
+worker serving international users does, with:
+
+  per-row lookup       the original serializer: all_timezones scan,
+                       pytz.timezone() and astimezone() on every row
+  per-request zone     zone resolved once, astimezone() per row (before
+                       the timezone service)
+  service, cold        studio.timezones (cached zoneinfo zones) with an
+                       empty local-time cache
+  service, warm        the same pass again, now answered from the cache
+
+    python -m benchmarks.bench_timezones --classes 2000 --zones 50
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+import pytz
+
+from benchmarks._django import report, test_database
+
+from django.utils.timezone import now
+
+from studio.models import FitnessClass
+from studio.serializers import class_values, serialize_class_rows
+from studio.timezones import get_timezone, local_iso
+
+
+def per_row_lookup(rows, name):
+    out = []
+    for row in rows:
+        tz = pytz.timezone(name) if name in pytz.all_timezones else pytz.UTC
+        out.append({**row, 'date_time': row['date_time'].astimezone(tz).isoformat()})
+    return out
+
+
+def per_request_zone(rows, name):
+    tz = pytz.timezone(name) if name in pytz.all_timezones_set else pytz.UTC
+    return [{**row, 'date_time': row['date_time'].astimezone(tz).isoformat()} for row in rows]
+
+
+def service(rows, name):
+    return serialize_class_rows(rows, get_timezone(name))
+
+
+def rate(fn, rows, zones):
+    start = time.perf_counter()
+    for name in zones:
+        fn(rows, name)
+    return len(rows) * len(zones) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=2000)
+    parser.add_argument('--zones', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    zones = rng.sample(sorted(pytz.common_timezones), args.zones)
+    with test_database():
+        start = now()
+        FitnessClass.objects.bulk_create(
+            FitnessClass(
+                name=f'Class {i}', date_time=start + timedelta(minutes=30 * rng.randrange(6000)),
+                instructor='Bench', total_slots=20, available_slots=20,
+            )
+            for i in range(args.classes)
+        )
+        rows = list(class_values(FitnessClass.objects.all()))
+
+    local_iso.cache_clear()
+    results = [
+        ('per-row lookup', rate(per_row_lookup, rows, zones)),
+        ('per-request zone', rate(per_request_zone, rows, zones)),
+        ('service, cold', rate(service, rows, zones)),
+        ('service, warm', rate(service, rows, zones)),
+    ]
+    info = local_iso.cache_info()
+    report(
+        f'{args.classes} classes x {args.zones} timezones',
+        [(label, f'{value:,.0f}') for label, value in results],
+        ('mode', 'rows/s'),
+    )
+    print(f'\nlocal-time cache: {info.currsize:,} of {info.maxsize:,} entries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+DB queries and latency per authenticated request with DRF's
+TokenAuthentication versus CachedTokenAuthentication (cold and warm).
+
+GET /api/classes is used with the schedule cache warm, so whatever queries
+remain are the authentication ones.
+
+    python -m benchmarks.bench_token_auth
+"""
+import argparse
+
+from benchmarks._django import report, test_database, timed
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from studio.authentication import CachedTokenAuthentication, token_cache
+from studio.models import FitnessClass
+from studio.views import ClassListView
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    with test_database():
+        user = User.objects.create_user('auth@example.com', 'auth@example.com', 'x', first_name='Auth')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        FitnessClass.objects.create(name='Yoga', date_time=now(), instructor='A', total_slots=5, available_slots=5)
+        url = f'/api/classes?email={user.email}'
+
+        def call():
+            assert client.get(url).status_code == 200
+
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                call()
+            return len(ctx.captured_queries)
+
+        rows = []
+        original = ClassListView.authentication_classes
+        try:
+            ClassListView.authentication_classes = [TokenAuthentication]
+            call()
+            rows.append(('TokenAuthentication', queries(), f'{timed(call, args.repeat):.3f}'))
+
+            ClassListView.authentication_classes = [CachedTokenAuthentication]
+            token_cache.clear()
+            rows.append(('cached, cold', queries(), '-'))
+            rows.append(('cached, warm', queries(), f'{timed(call, args.repeat):.3f}'))
+        finally:
+            ClassListView.authentication_classes = original
+
+        report('GET /api/classes per request', rows, ('auth', 'queries', 'median_ms'))
+
+
+if __name__ == '__main__':
+    main()
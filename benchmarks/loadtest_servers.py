@@ -0,0 +1,170 @@
+"""
+Load test of the read endpoints under the production servers: sync views
+behind gunicorn (WSGI) against async views behind uvicorn (ASGI).
+
+Builds a fresh SQLite database in a temp dir, seeds it deterministically,
+then for each mode starts the server, hammers /api/classes and
+/api/bookings from --concurrency keep-alive clients and reports req/s and
+latency percentiles. Needs `gunicorn` and `uvicorn` on PATH.
+
+    python -m benchmarks.loadtest_servers --requests 5000 --concurrency 32
+"""
+import argparse
+import http.client
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PORT = 8765
+
+
+def seed(classes, bookings):
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+    from django.contrib.auth.models import User
+    from django.utils.timezone import now
+    from rest_framework.authtoken.models import Token
+    from studio.models import Booking, FitnessClass
+
+    rng = random.Random(1)
+    user = User.objects.create_user('load@example.com', 'load@example.com', 'x', first_name='Load')
+    rows = FitnessClass.objects.bulk_create(
+        FitnessClass(
+            name=f'Class {i}', date_time=now() + timedelta(minutes=rng.randrange(60, 60 * 24 * 90)),
+            instructor=f'Instructor {i % 20}', total_slots=20, available_slots=rng.randrange(0, 21),
+        )
+        for i in range(classes)
+    )
+    Booking.objects.bulk_create(
+        Booking(fitness_class=fitness_class, user=user, client_name='Load', client_email=user.email)
+        for fitness_class in rng.sample(rows, bookings)
+    )
+    return user.email, Token.objects.create(user=user).key
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f'server did not start on :{port}')
+
+
+def drive(paths, token, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+    errors = []
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+        mine = []
+        headers = {'Authorization': f'Token {token}'}
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            conn.request('GET', paths[i % len(paths)], headers=headers)
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            if response.status != 200:
+                errors.append(response.status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000  # noqa: E731
+    return {
+        'req/s': f'{len(latencies) / elapsed:,.0f}',
+        'p50_ms': f'{statistics.median(latencies) * 1000:.1f}',
+        'p99_ms': f'{pct(0.99):.1f}',
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--classes', type=int, default=2000)
+    parser.add_argument('--bookings', type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='studio-load-')
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='fitness_studio.settings',
+        DJANGO_SQLITE_PATH=os.path.join(tmp, 'load.sqlite3'),
+        DJANGO_DEBUG='0',
+        DJANGO_ALLOWED_HOSTS='127.0.0.1,localhost',
+        PYTHONPATH=str(ROOT),
+    )
+    os.environ.update(env)
+    sys.path.insert(0, str(ROOT))
+    email, token = seed(args.classes, args.bookings)
+
+    # Persistent connections only under gunicorn, whose threads are reused.
+    # Under uvicorn each request's sync ORM work may run on a fresh thread,
+    # so kept connections would pile up instead of being reused.
+    conn_max_age = {'wsgi (gunicorn, sync views)': '60', 'asgi (uvicorn, async views)': '0'}
+    modes = {
+        'wsgi (gunicorn, sync views)': [
+            'gunicorn', 'fitness_studio.wsgi:application', '-b', f'127.0.0.1:{PORT}',
+            '-w', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning',
+        ],
+        'asgi (uvicorn, async views)': [
+            'uvicorn', 'fitness_studio.asgi:application', '--port', str(PORT),
+            '--workers', str(args.workers), '--no-access-log', '--log-level', 'warning',
+        ],
+    }
+    paths = [f'/api/classes?email={email}&page_size=100', '/api/bookings']
+
+    print(f'\n{args.requests} requests, concurrency {args.concurrency}, {args.workers} workers')
+    print(f"{'mode':30} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'errors':>7}")
+    try:
+        for label, command in modes.items():
+            server = subprocess.Popen(command, cwd=ROOT, env={**env, 'DJANGO_CONN_MAX_AGE': conn_max_age[label]})
+            try:
+                wait_for_port(PORT)
+                drive(paths, token, min(500, args.requests), args.concurrency)  # warm-up
+                result = drive(paths, token, args.requests, args.concurrency)
+                print(f"{label:30} {result['req/s']:>8} {result['p50_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7}")
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Concurrent booking stress test for POST /api/book.
+
+Fires --requests bookings from --workers threads at a single class with
+--slots seats and checks the invariants afterwards: exactly min(slots,
+requests) bookings, available_slots never negative and consistent with the
+booking count. Runs against whatever database settings point at (SQLite or
+PostgreSQL), using a throwaway test database.
+
+    python -m benchmarks.stress_booking --requests 5000 --workers 32 --slots 1000
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._django import test_database
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from studio.models import Booking, FitnessClass
+from studio.views import BookClassView
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--slots', type=int, default=1000)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    view = BookClassView.as_view()
+
+    with test_database(on_disk=True):
+        fitness_class = FitnessClass.objects.create(
+            name='Stress', date_time=now(), instructor='Bench',
+            total_slots=args.slots, available_slots=args.slots,
+        )
+        users = User.objects.bulk_create(
+            User(username=f's{i}@example.com', email=f's{i}@example.com', first_name='Stress')
+            for i in range(args.requests)
+        )
+
+        def book(user):
+            request = factory.post(
+                '/api/book', {'class_id': fitness_class.id, 'client_name': 'Stress'}, format='json'
+            )
+            force_authenticate(request, user=user)
+            try:
+                return view(request).status_code
+            except Exception as exc:  # e.g. "database is locked" on SQLite
+                return type(exc).__name__
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            outcomes = Counter(pool.map(book, users))
+        elapsed = time.perf_counter() - start
+
+        fitness_class.refresh_from_db()
+        booked = Booking.objects.filter(fitness_class=fitness_class).count()
+
+        print(f'\n{args.requests} requests, {args.workers} workers, {args.slots} slots in {elapsed:.2f}s')
+        print(f'outcomes:        {dict(outcomes)}')
+        print(f'bookings:        {booked}')
+        print(f'available_slots: {fitness_class.available_slots}')
+        print(f'booking req/s:   {args.requests / elapsed:,.0f}')
+        print(f'successful/s:    {outcomes[201] / elapsed:,.0f}')
+
+        assert fitness_class.available_slots >= 0, 'negative slots'
+        assert booked == outcomes[201], 'bookings do not match 201 responses'
+        assert booked + fitness_class.available_slots == args.slots, 'overbooked or lost a slot'
+        print('invariants:      OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Retry storm against POST /api/book with Idempotency-Key.
+
+--users clients each send the same booking --retries times at once from
+--workers threads, all copies carrying one key, then retry it again once
+the first copy has committed. Checks the invariants afterwards: exactly
+one booking per user, one seat taken per user, every copy answered with
+the first response; and compares the latency of the requests that booked
+with the replays.
+
+    python -m benchmarks.stress_idempotency --users 200 --retries 10 --workers 32
+"""
+import argparse
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._django import test_database
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from studio.models import Booking, FitnessClass, IdempotencyKey
+from studio.views import BookClassView
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--retries', type=int, default=10, help='copies of each request')
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    view = BookClassView.as_view()
+
+    with test_database(on_disk=True):
+        fitness_class = FitnessClass.objects.create(
+            name='Stress', date_time=now(), instructor='Bench',
+            total_slots=args.users, available_slots=args.users,
+        )
+        users = User.objects.bulk_create(
+            User(username=f'r{i}@example.com', email=f'r{i}@example.com', first_name='Retry')
+            for i in range(args.users)
+        )
+        keys = {user.pk: str(uuid.uuid4()) for user in users}
+
+        def book(user):
+            request = factory.post(
+                '/api/book', {'class_id': fitness_class.id, 'client_name': 'Retry'}, format='json',
+                HTTP_IDEMPOTENCY_KEY=keys[user.pk],
+            )
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            try:
+                response = view(request)
+                replayed = response.get('Idempotent-Replayed') == 'true'
+                return response.status_code, replayed, time.perf_counter() - start
+            except Exception as exc:  # e.g. "database is locked" on SQLite
+                return type(exc).__name__, False, time.perf_counter() - start
+            finally:
+                connections.close_all()
+
+        storm = [user for user in users for _ in range(args.retries)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(book, storm))
+            results += pool.map(book, users)  # late retries, after every first copy committed
+        elapsed = time.perf_counter() - start
+
+        fitness_class.refresh_from_db()
+        booked = Booking.objects.filter(fitness_class=fitness_class).count()
+        outcomes = Counter((status, replayed) for status, replayed, _ in results)
+        first = [seconds for status, replayed, seconds in results if status == 201 and not replayed]
+        replays = [seconds for status, replayed, seconds in results if replayed]
+
+        print(f'\n{len(results)} requests from {args.users} users, {args.workers} workers in {elapsed:.2f}s')
+        print(f'outcomes:        {dict(outcomes)}')
+        print(f'bookings:        {booked}')
+        print(f'stored keys:     {IdempotencyKey.objects.count()}')
+        print(f'available_slots: {fitness_class.available_slots}')
+        if first and replays:
+            print(f'median ms:       booked {statistics.median(first) * 1000:.2f}, '
+                  f'replayed {statistics.median(replays) * 1000:.2f}')
+
+        assert booked == args.users, 'a user has more or less than one booking'
+        assert fitness_class.available_slots == 0, 'a retry took another seat'
+        assert outcomes[(201, False)] == args.users, 'a retry ran the booking again'
+        assert outcomes[(201, True)] == len(results) - args.users, 'a retry was not replayed'
+        print('invariants:      OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Concurrent waitlist stress test for POST /api/waitlist and
+POST /api/bookings/<id>/cancel.
+
+Starts from a full class with --slots seats and fires --joins waitlist
+joins at it from --workers threads: half on their own, the other half
+interleaved with --cancels cancellations by seat holders. Afterwards checks that no seat was lost or handed out
+twice: bookings + available_slots == slots, every cancellation either
+promoted a waiting client or freed a slot, and slots are only free when
+nobody is waiting.
+
+    python -m benchmarks.stress_waitlist --joins 5000 --cancels 2000 --workers 32 --slots 2000
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._django import test_database
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from studio.models import Booking, FitnessClass, Waitlist
+from studio.views import CancelBookingView, JoinWaitlistView
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--joins', type=int, default=5000)
+    parser.add_argument('--cancels', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--slots', type=int, default=2000)
+    args = parser.parse_args()
+    assert args.cancels <= args.slots, '--cancels cannot exceed --slots'
+
+    factory = APIRequestFactory()
+    join_view, cancel_view = JoinWaitlistView.as_view(), CancelBookingView.as_view()
+
+    with test_database(on_disk=True):
+        fitness_class = FitnessClass.objects.create(
+            name='Stress', date_time=now(), instructor='Bench',
+            total_slots=args.slots, available_slots=0,
+        )
+        users = User.objects.bulk_create(
+            User(username=f'w{i}@example.com', email=f'w{i}@example.com', first_name='Stress')
+            for i in range(args.slots + args.joins)
+        )
+        holders, waiters = users[:args.slots], users[args.slots:]
+        bookings = Booking.objects.bulk_create(
+            Booking(fitness_class=fitness_class, user=user, client_name='Stress', client_email=user.email)
+            for user in holders
+        )
+
+        # Phase one is a pure join storm; in phase two the rest of the joins
+        # race the cancellations.
+        half = len(waiters) // 2
+        storm = [('join', user, None) for user in waiters[:half]]
+        mixed = [('join', user, None) for user in waiters[half:]]
+        mixed += [('cancel', booking.user, booking.id) for booking in bookings[:args.cancels]]
+        random.Random(7).shuffle(mixed)
+
+        def call(item):
+            kind, user, booking_id = item
+            if kind == 'join':
+                request = factory.post(
+                    '/api/waitlist', {'class_id': fitness_class.id, 'client_name': 'Stress'}, format='json'
+                )
+                view, kwargs = join_view, {}
+            else:
+                request = factory.post(f'/api/bookings/{booking_id}/cancel')
+                view, kwargs = cancel_view, {'booking_id': booking_id}
+            force_authenticate(request, user=user)
+            try:
+                return kind, view(request, **kwargs).status_code
+            except Exception as exc:  # e.g. "database is locked" on SQLite
+                return kind, type(exc).__name__
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        outcomes = Counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for phase in (storm, mixed):
+                outcomes.update(pool.map(call, phase))
+        elapsed = time.perf_counter() - start
+
+        fitness_class.refresh_from_db()
+        booked = Booking.objects.filter(fitness_class=fitness_class).count()
+        waiting = Waitlist.objects.filter(fitness_class=fitness_class).count()
+        joined, cancelled = outcomes[('join', 201)], outcomes[('cancel', 200)]
+        promoted = joined - waiting
+
+        print(f'\n{args.joins} joins + {args.cancels} cancels, {args.workers} workers, '
+              f'{args.slots} slots in {elapsed:.2f}s')
+        print(f'outcomes:        {dict(outcomes)}')
+        print(f'bookings:        {booked}')
+        print(f'promoted:        {promoted}')
+        print(f'still waiting:   {waiting}')
+        print(f'available_slots: {fitness_class.available_slots}')
+        print(f'requests/s:      {(args.joins + args.cancels) / elapsed:,.0f}')
+
+        assert booked + fitness_class.available_slots == args.slots, 'lost or duplicated a seat'
+        assert promoted + fitness_class.available_slots == cancelled, 'a freed seat went missing'
+        assert fitness_class.available_slots == 0 or waiting == 0, 'free seats while clients wait'
+        positions = list(Waitlist.objects.values_list('position', flat=True))
+        assert len(positions) == len(set(positions)), 'duplicate waitlist positions'
+        print('invariants:      OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+Regression suite for the HTTP endpoints: /api/classes, /api/bookings,
+/api/book, /api/signup and /api/login.
+
+Seeds a fresh SQLite database with a deterministic generator (--seed),
+starts the app under gunicorn on a local port, and runs each scenario from
+--concurrency keep-alive clients. Every scenario reports throughput,
+p50/p95/p99 latency and database queries per request. Query counts come
+from the server's own /metrics histograms, so run it with one worker
+(the default) for exact counts.
+
+Results are compared against benchmarks/baselines.json. Any scenario that
+is slower (p95) or lower in throughput by more than --tolerance, makes more
+queries per request, or returns unexpected statuses is a regression, and
+the run exits with status 1.
+
+    python -m benchmarks.suite                       # compare against the baselines
+    python -m benchmarks.suite --only classes book   # a subset
+    python -m benchmarks.suite --update-baseline     # record this machine's numbers
+
+Timings only mean something against baselines recorded on the same kind of
+machine; the baseline file records where it was made.
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from benchmarks.loadtest_servers import PORT, ROOT, wait_for_port
+
+BASELINES = ROOT / 'benchmarks' / 'baselines.json'
+PASSWORD = 'bench-password'
+
+
+def seed(users, classes, bookings, rng):
+    """Users with tokens, upcoming classes and booking histories. Returns the users."""
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.utils.timezone import now
+    from rest_framework.authtoken.models import Token
+    from studio.models import Booking, FitnessClass, ListVersion, bookings_version_key
+
+    # One hash for everyone: seeding stays fast, logins still verify it.
+    password = make_password(PASSWORD)
+    people = User.objects.bulk_create(
+        User(username=f'user{i}@example.com', email=f'user{i}@example.com', first_name=f'User{i}', password=password)
+        for i in range(users)
+    )
+    tokens = Token.objects.bulk_create(Token(user=user, key=Token.generate_key()) for user in people)
+    start = now()
+    rows = FitnessClass.objects.bulk_create(
+        FitnessClass(
+            name=f'Class {i}', date_time=start + timedelta(minutes=rng.randrange(60, 60 * 24 * 90)),
+            instructor=f'Instructor {i % 20}', total_slots=1000, available_slots=1000,
+        )
+        for i in range(classes)
+    )
+    # History goes into the first half of the classes; the book scenario
+    # books the second half, so it never meets a (user, class) pair taken.
+    booked = rows[:classes // 2]
+    Booking.objects.bulk_create(
+        (
+            Booking(fitness_class=booked[pair // users], user=people[pair % users],
+                    client_name=people[pair % users].first_name, client_email=people[pair % users].email)
+            for pair in rng.sample(range(users * len(booked)), bookings)
+        ),
+        batch_size=5000,
+    )
+    # bulk_create skips the signals that keep the occupancy rollups current.
+    # Build them up front, so that every booking moves an existing row instead
+    # of some lazily recomputing theirs, depending on where the UTC day falls.
+    call_command('rollup_occupancy', stdout=io.StringIO())
+    # Likewise the per-user /api/bookings versions: without them each user's
+    # first booking inserts one, and the query count depends on the request mix.
+    ListVersion.objects.bulk_create(ListVersion(key=bookings_version_key(user.pk), value=1) for user in people)
+    return [
+        {'email': user.email, 'name': user.first_name, 'token': token.key}
+        for user, token in zip(people, tokens)
+    ], [row.id for row in rows]
+
+
+# ------------------ Scenarios ------------------
+#
+# Each builds the full, deterministic list of requests up front:
+# (method, path, JSON body or None, token or None, accepted statuses).
+
+def classes_requests(count, users, class_ids, rng):
+    for _ in range(count):
+        user = rng.choice(users)
+        path = f"/api/classes?email={user['email']}&page_size=50"
+        if rng.random() < 0.3:
+            path += f'&instructor=Instructor%20{rng.randrange(20)}'
+        yield 'GET', path, None, user['token'], {200}
+
+
+def bookings_requests(count, users, class_ids, rng):
+    for _ in range(count):
+        yield 'GET', '/api/bookings', None, rng.choice(users)['token'], {200}
+
+
+def book_requests(count, users, class_ids, rng):
+    # Distinct (user, class) pairs among classes seed() left unbooked, so
+    # every booking is a fresh one.
+    open_ids = class_ids[len(class_ids) // 2:]
+    for pair in rng.sample(range(len(users) * len(open_ids)), count):
+        user, class_id = users[pair % len(users)], open_ids[pair // len(users)]
+        yield 'POST', '/api/book', {'class_id': class_id, 'client_name': user['name']}, user['token'], {201}
+
+
+def signup_requests(count, users, class_ids, rng):
+    run = rng.randrange(10 ** 6)
+    for i in range(count):
+        body = {'name': f'New{i}', 'email': f'new{run}-{i}@example.com', 'password': PASSWORD}
+        yield 'POST', '/api/signup', body, None, {200}
+
+
+def login_requests(count, users, class_ids, rng):
+    for _ in range(count):
+        yield 'POST', '/api/login', {'email': rng.choice(users)['email'], 'password': PASSWORD}, None, {200}
+
+
+SCENARIOS = {
+    'classes': ('/api/classes', 'GET', classes_requests),
+    'bookings': ('/api/bookings', 'GET', bookings_requests),
+    'book': ('/api/book', 'POST', book_requests),
+    'signup': ('/api/signup', 'POST', signup_requests),
+    'login': ('/api/login', 'POST', login_requests),
+}
+
+
+# ------------------ Driving ------------------
+
+def run_requests(requests, concurrency):
+    """Send `requests` from `concurrency` keep-alive clients; latencies in seconds and bad statuses."""
+    lock = threading.Lock()
+    pending = iter(requests)
+    latencies, unexpected = [], []
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=60)
+        mine, bad = [], []
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            method, path, body, token, accepted = item
+            headers = {'Content-Type': 'application/json'}
+            if token:
+                headers['Authorization'] = f'Token {token}'
+            start = time.perf_counter()
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            if response.status not in accepted:
+                bad.append(response.status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            unexpected.extend(bad)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, unexpected, time.perf_counter() - start
+
+
+def query_totals(route, method):
+    """(queries, requests) so far for one route, from the server's /metrics."""
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+    conn.request('GET', '/metrics')
+    text = conn.getresponse().read().decode()
+    conn.close()
+    labels = re.escape(f'{{route="{route.lstrip("/")}",method="{method}"}}')
+    found = {}
+    for part in ('sum', 'count'):
+        match = re.search(rf'^studio_request_db_queries_{part}{labels} (\S+)$', text, re.M)
+        found[part] = float(match.group(1)) if match else 0.0
+    return found['sum'], found['count']
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_scenario(name, args, users, class_ids):
+    route, method, build = SCENARIOS[name]
+    rng = random.Random(f'{args.seed}-{name}')
+    # Built in one go so warmup and measured requests never repeat a booking.
+    requests = list(build(args.warmup + args.requests, users, class_ids, rng))
+    warmup, measured = requests[:args.warmup], requests[args.warmup:]
+    run_requests(warmup, args.concurrency)
+
+    queries_before, count_before = query_totals(route, method)
+    latencies, unexpected, elapsed = run_requests(measured, args.concurrency)
+    queries_after, count_after = query_totals(route, method)
+
+    latencies.sort()
+    handled = count_after - count_before
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': round((queries_after - queries_before) / handled, 2) if handled else None,
+        'errors': len(unexpected),
+    }
+
+
+# ------------------ Baselines ------------------
+
+def regressions(name, result, baseline, tolerance):
+    found = []
+    if result['errors']:
+        found.append(f'{name}: {result["errors"]} unexpected responses')
+    if not baseline:
+        return found
+    if result['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+        found.append(f'{name}: p95 {result["p95_ms"]}ms vs baseline {baseline["p95_ms"]}ms')
+    if result['rps'] < baseline['rps'] * (1 - tolerance):
+        found.append(f'{name}: {result["rps"]} req/s vs baseline {baseline["rps"]}')
+    if result['queries'] is not None and baseline.get('queries') is not None:
+        # Query counts are deterministic; allow only rounding.
+        if result['queries'] > baseline['queries'] + 0.05:
+            found.append(f'{name}: {result["queries"]} queries/request vs baseline {baseline["queries"]}')
+    return found
+
+
+def machine():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', nargs='+', choices=SCENARIOS, help='Run just these scenarios.')
+    parser.add_argument('--requests', type=int, default=2000, help='Measured requests per scenario.')
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers (1 keeps query counts exact)')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--classes', type=int, default=2000)
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--password-iterations', type=int, default=10000,
+        help='STUDIO_PASSWORD_ITERATIONS for the run; the production cost would make login/signup all hashing.',
+    )
+    parser.add_argument('--sqlite-tuning', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95/throughput drift (0.25 = 25%%).')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baselines.')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='studio-suite-')
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='fitness_studio.settings',
+        DJANGO_SQLITE_PATH=os.path.join(tmp, 'suite.sqlite3'),
+        DJANGO_DEBUG='0',
+        DJANGO_ALLOWED_HOSTS='127.0.0.1,localhost',
+        DJANGO_CONN_MAX_AGE='60',
+        STUDIO_PASSWORD_ITERATIONS=str(args.password_iterations),
+        STUDIO_SQLITE_TUNING='1' if args.sqlite_tuning else '0',
+        PYTHONPATH=str(ROOT),
+    )
+    os.environ.update(env)
+    sys.path.insert(0, str(ROOT))
+
+    stored = json.loads(BASELINES.read_text()) if BASELINES.exists() else {'scenarios': {}}
+    names = args.only or list(SCENARIOS)
+    results = {}
+    try:
+        users, class_ids = seed(args.users, args.classes, args.bookings, random.Random(args.seed))
+        server = subprocess.Popen(
+            ['gunicorn', 'fitness_studio.wsgi:application', '-b', f'127.0.0.1:{PORT}',
+             '-w', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning'],
+            cwd=ROOT, env=env,
+        )
+        try:
+            wait_for_port(PORT)
+            for name in names:
+                results[name] = run_scenario(name, args, users, class_ids)
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f'\n{args.requests} requests per scenario, concurrency {args.concurrency}, '
+          f'{args.workers} worker(s) x {args.threads} threads')
+    print(f"{'scenario':10} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'queries':>8} {'errors':>7}   baseline p95/req/s")
+    found = []
+    for name, result in results.items():
+        baseline = stored['scenarios'].get(name)
+        was = f"{baseline['p95_ms']}ms / {baseline['rps']}" if baseline else '-'
+        print(f"{name:10} {result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+              f"{str(result['queries']):>8} {result['errors']:>7}   {was}")
+        found += regressions(name, result, baseline, args.tolerance)
+
+    if args.update_baseline:
+        stored['meta'] = {**machine(), 'requests': args.requests, 'concurrency': args.concurrency,
+                          'workers': args.workers, 'threads': args.threads}
+        stored['scenarios'].update({name: {k: v for k, v in result.items() if k != 'errors'}
+                                    for name, result in results.items()})
+        BASELINES.write_text(json.dumps(stored, indent=2, sort_keys=True) + '\n')
+        print(f'\nBaselines written to {BASELINES.relative_to(ROOT)}.')
+        return
+
+    if stored.get('meta') and stored['meta'].get('cpus') != os.cpu_count():
+        print(f"\nNote: baselines were recorded on {stored['meta']['cpus']} CPU(s), this machine has {os.cpu_count()}.")
+    if found:
+        print('\nRegressions:')
+        for line in found:
+            print(f'  {line}')
+        sys.exit(1)
+    print('\nNo regressions.')
+
+
+if __name__ == '__main__':
+    main()
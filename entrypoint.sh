@@ -2,5 +2,7 @@
 
 echo "Running migrations..."
 python manage.py migrate
+# A no-op unless DJANGO_CACHE_TABLE selects the database cache.
+python manage.py createcachetable
 
 exec "$@"
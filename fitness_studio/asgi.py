@@ -12,6 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness_studio.settings')
+# Under ASGI the read endpoints run as native async views.
+os.environ.setdefault('STUDIO_ASYNC_VIEWS', '1')
 
 
 application = get_asgi_application()
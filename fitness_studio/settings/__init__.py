@@ -0,0 +1,9 @@
+# fitness_studio/settings/__init__.py
+"""
+Settings profiles. `fitness_studio.settings` is the full profile in base.py;
+pick another with DJANGO_SETTINGS_MODULE:
+
+    fitness_studio.settings.api    API workers: no admin, sessions or templates
+    fitness_studio.settings.test   the test suite (manage.py test uses it)
+"""
+from .base import *  # noqa: F401,F403
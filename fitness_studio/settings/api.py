@@ -0,0 +1,38 @@
+"""
+Lean profile for API workers:
+
+    DJANGO_SETTINGS_MODULE=fitness_studio.settings.api uvicorn fitness_studio.asgi:application
+
+Every endpoint is token-authenticated JSON, so the admin, sessions,
+messages, static files, CSRF and templates are left out together with the
+middleware and imports they bring. /admin and the browsable API are not
+served; use a process on the full profile for those.
+"""
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+browser_apps = {
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+}
+browser_middleware = {
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in browser_apps]
+
+# Tokens are checked by DRF in the view, so request.user needs no middleware.
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in browser_middleware]
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['studio.metrics.TimedJSONRenderer'],
+}
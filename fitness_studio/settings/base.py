@@ -0,0 +1,291 @@
+"""
+Django settings for booking_api project: the full profile, with the admin
+and browsable API, used by runserver and `fitness_studio.settings`.
+fitness_studio/settings/api.py and test.py trim it for API workers and the
+test suite.
+
+Generated by 'django-admin startproject' using Django 5.2.3.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-r)9@!p^i&4#r%%2(c9oghtx-y*(415czy522quv@u4v)_6=@-)'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+APPEND_SLASH = False
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'studio',
+]
+
+MIDDLEWARE = [
+    # Outermost, so latency covers every other middleware.
+    'studio.metrics.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'studio.routers.ReplicaPinningMiddleware',
+]
+
+ROOT_URLCONF =  'fitness_studio.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'studio/templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'fitness_studio.wsgi.application'
+
+ASGI_APPLICATION = 'fitness_studio.asgi.application'
+
+# Serve the read endpoints (/api/classes, /api/bookings) from async views
+# built on the async ORM. fitness_studio/asgi.py turns this on.
+STUDIO_ASYNC_VIEWS = os.environ.get('STUDIO_ASYNC_VIEWS', '0') == '1'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DJANGO_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        # Keep connections open between requests (0 closes them after each
+        # request, which is what runserver has always done).
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Read replicas: DJANGO_REPLICA_SQLITE_PATHS is a comma-separated list of
+# database files kept in sync with the primary. List reads of studio models go
+# to a replica; writes, auth and anything a user reads within
+# STUDIO_REPLICA_PIN_SECONDS of their own write stay on `default`.
+STUDIO_READ_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get('DJANGO_REPLICA_SQLITE_PATHS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': path}
+    STUDIO_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['studio.routers.PrimaryReplicaRouter']
+
+STUDIO_REPLICA_PIN_SECONDS = 5
+
+# The replica pins above live in the default cache, which every worker must
+# share: with per-process LocMemCache a read that lands on another worker is
+# not pinned. DJANGO_CACHE_TABLE keeps the cache in that table on the primary
+# (entrypoint.sh creates it); `manage.py check` fails when replicas are
+# configured without a shared cache.
+if os.environ.get('DJANGO_CACHE_TABLE'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ['DJANGO_CACHE_TABLE'],
+        }
+    }
+
+# Opt-in SQLite performance profile: WAL, synchronous=NORMAL, busy timeout,
+# mmap and a larger page cache on every connection, BEGIN IMMEDIATE for
+# writes, and in-process queuing of write transactions (studio/sqlite.py).
+STUDIO_SQLITE_TUNING = os.environ.get('STUDIO_SQLITE_TUNING', '0') == '1'
+STUDIO_SERIALIZE_WRITES = STUDIO_SQLITE_TUNING
+
+if STUDIO_SQLITE_TUNING:
+    from studio.sqlite import tuned_options
+
+    DATABASES['default']['OPTIONS'] = tuned_options()
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+# Password hashing
+# The PBKDF2 work factor can be tuned per environment. Stored hashes made with
+# a different cost are upgraded transparently on the next successful login.
+
+STUDIO_PASSWORD_ITERATIONS = int(os.environ.get('STUDIO_PASSWORD_ITERATIONS', 1_000_000))
+
+PASSWORD_HASHERS = [
+    'studio.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        # Swap back to 'rest_framework.authentication.TokenAuthentication'
+        # to authenticate every request against the database.
+        'studio.authentication.CachedTokenAuthentication',
+    ],
+    # JSONRenderer that reports its render time to /metrics.
+    'DEFAULT_RENDERER_CLASSES': [
+        'studio.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Process-local token -> user cache used by CachedTokenAuthentication.
+STUDIO_TOKEN_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 300,
+}
+
+# Process-local cache of serialized /api/classes pages. Entries live for one
+# time bucket; bookings patch slot counts in place.
+STUDIO_SCHEDULE_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 512,
+    'TTL': 30,
+    'BUCKET_SECONDS': 30,
+}
+
+# Memoized local-time renderings of class start times (studio/timezones.py),
+# about 180 bytes each: enough for 2,500 classes in 50 timezones.
+STUDIO_LOCAL_TIME_CACHE_SIZE = 131072
+
+# How far ahead `manage.py materialize_classes` expands recurring series.
+STUDIO_SERIES_HORIZON_DAYS = 90
+
+# /api/classes/stream (ASGI only). BUFFER is how many changed classes a slow
+# subscriber may lag behind before it is told to reload; POLL_SECONDS is how
+# often each worker looks for bookings made by other workers (0 = never).
+STUDIO_SLOT_STREAM = {
+    'BUFFER': 256,
+    'KEEPALIVE_SECONDS': 15,
+    'POLL_SECONDS': 1.0,
+}
+
+# Per-route latency, query and serialization histograms at /metrics.
+# A request carrying `X-Profile: <PROFILE_KEY>` is answered with its
+# cProfile summary; with no key set, only DEBUG servers accept X-Profile.
+STUDIO_METRICS = {
+    'ENABLED': True,
+    'PROFILE_KEY': os.environ.get('STUDIO_PROFILE_KEY', ''),
+    'PROFILE_LINES': 40,
+}
+
+# How long POST /api/book remembers a response under its Idempotency-Key
+# (studio/idempotency.py). A retry after this runs as a new request.
+STUDIO_IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,
+}
+
+# Logging
+# Request handlers only enqueue records; a background thread writes them as
+# JSON lines to a size-rotated file. High-volume read events are sampled.
+
+STUDIO_LOG_FILE = BASE_DIR / 'booking_activity.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'studio.logs.SamplingFilter',
+            'rates': {
+                'classes.listed': 0.1,
+                'bookings.listed': 0.1,
+            },
+        },
+    },
+    'handlers': {
+        'activity': {
+            'class': 'studio.logs.AsyncRotatingFileHandler',
+            'filename': STUDIO_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'queue_size': 10000,
+            'filters': ['sampling'],
+        },
+    },
+    'loggers': {
+        'studio': {
+            'handlers': ['activity'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,37 @@
+"""
+Profile for the test suite, which `manage.py test` picks unless
+DJANGO_SETTINGS_MODULE says otherwise. It is the api profile plus:
+
+- a fast password hasher, so create_user() in setUp costs microseconds
+  rather than a million PBKDF2 rounds (AuthEndpointsTestCase opts back into
+  the real one);
+- an in-memory SQLite database with no replicas or tuning from the
+  environment, which each `--parallel` worker clones for itself;
+- the activity log discarded instead of written to booking_activity.log,
+  which parallel workers would otherwise share and rotate under each other.
+"""
+from .api import *  # noqa: F401,F403
+from .api import LOGGING
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+AUTH_PASSWORD_VALIDATORS = []
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+STUDIO_READ_REPLICAS = []
+
+STUDIO_SQLITE_TUNING = False
+STUDIO_SERIALIZE_WRITES = False
+
+# Records still pass through the `studio` logger at INFO, so every log_event
+# call runs; studio.tests covers the file handler with its own temp files.
+LOGGING = {
+    **LOGGING,
+    'handlers': {'activity': {'class': 'logging.NullHandler'}},
+}
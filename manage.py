@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness_studio.settings')
+    # The suite runs on the lean test profile (fitness_studio/settings/test.py).
+    profile = 'fitness_studio.settings.test' if sys.argv[1:2] == ['test'] else 'fitness_studio.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', profile)
 
     try:
         from django.core.management import execute_from_command_line
@@ -1,5 +1,34 @@
-from django.contrib import admin
-from .models import FitnessClass, Booking  
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from .cache import schedule_cache
+from .models import ClassSeries, FitnessClass, Booking, Waitlist
 
 admin.site.register(FitnessClass)
 admin.site.register(Booking)
+admin.site.register(Waitlist)
+
+
+@admin.register(ClassSeries)
+class ClassSeriesAdmin(admin.ModelAdmin):
+    list_display = ('name', 'instructor', 'weekdays', 'start_time', 'timezone', 'start_date', 'end_date', 'materialized_until')
+    actions = ['materialize']
+
+    @admin.action(description='Create classes for the scheduling horizon')
+    def materialize(self, request, queryset):
+        until = localdate() + timedelta(days=settings.STUDIO_SERIES_HORIZON_DAYS)
+        created = 0
+        for series in queryset:
+            try:
+                with transaction.atomic():
+                    created += series.materialize(until)
+            except ValidationError as exc:
+                self.message_user(request, exc.messages[0], level=messages.ERROR)
+        if created:
+            schedule_cache.clear()
+        self.message_user(request, f'Created {created} classes up to {until}.')
@@ -2,3 +2,6 @@ from django.apps import AppConfig
 class StudioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'studio'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,240 @@
+# studio/async_views.py
+"""
+Async versions of the read endpoints, used when the app is served over ASGI
+(see STUDIO_ASYNC_VIEWS). They return the same JSON as ClassListView and
+UserBookingsView but fetch rows with the async ORM, so a worker is not tied
+up while the database answers.
+"""
+import json
+import logging
+from functools import partial
+
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+
+from .authentication import aauthenticate_token
+from .cache import schedule_cache
+from .events import RESET, slot_events, stream_options
+from .logs import log_event
+from .models import CATALOG, SCHEDULE, Booking, ListVersion, bookings_version_key
+from .pagination import ScheduleCursorPagination
+from .serializers import (
+    STREAM_CONTENT_TYPES,
+    astream_rows,
+    booking_values,
+    class_values,
+    serialize_booking_rows,
+    serialize_class_rows,
+)
+from .utils import (
+    etag_matches,
+    list_etag,
+    parse_class_filters,
+    parse_since,
+    parse_stream,
+    resolve_timezone,
+    token_email_match,
+)
+from .views import MAX_DELTA_ROWS, STREAM_BATCH_ROWS, upcoming_classes
+
+logger = logging.getLogger(__name__)
+
+
+class _ApiRequest:
+    """The slice of a DRF Request that utils and the paginator rely on."""
+
+    def __init__(self, request, user):
+        self._request = request
+        self.user = user
+        self.query_params = request.GET
+        self.data = {}
+
+    def build_absolute_uri(self, location=None):
+        return self._request.build_absolute_uri(location)
+
+
+def _unauthorized(message):
+    response = JsonResponse({'detail': message}, status=401)
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def _as_json(response):
+    return JsonResponse(response.data, status=response.status_code, safe=False)
+
+
+def _not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+@require_GET
+async def class_list(request):
+    user, error = await aauthenticate_token(request)
+    if user is None:
+        return _unauthorized(error)
+    api_request = _ApiRequest(request, user)
+
+    valid, error_response = token_email_match(api_request)
+    if not valid:
+        log_event(logger, logging.WARNING, 'classes.blocked', user=user.email)
+        return _as_json(error_response)
+
+    filters, error_response = parse_class_filters(request.GET)
+    if error_response:
+        return _as_json(error_response)
+    since, error_response = parse_since(request.GET)
+    if error_response:
+        return _as_json(error_response)
+
+    cache_key = None
+    if since is None and schedule_cache.enabled:
+        cache_key = schedule_cache.key_for(request.GET)
+        cached = schedule_cache.get(cache_key)
+        if cached is not None:
+            results, next_cursor, tag = cached
+            etag = list_etag((*tag, schedule_cache.bucket()), request.GET)
+            if etag_matches(request, etag):
+                return _not_modified(etag)
+            log_event(logger, logging.INFO, 'classes.listed', user=user.email, count=len(results), cached=True)
+            link = ScheduleCursorPagination().link_for(api_request, next_cursor)
+            response = JsonResponse({'next': link, 'results': results})
+            response['ETag'] = etag
+            response['X-Schedule-Version'] = tag[0]
+            return response
+
+    version, = await ListVersion.objects.acurrent(SCHEDULE)
+    etag = list_etag((version, schedule_cache.bucket()), request.GET)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    if since is not None:
+        response = await _class_changes(api_request, filters, since, version)
+    else:
+        response = await _class_page(request, api_request, filters, version, cache_key)
+    if response.status_code == 200:
+        response['ETag'] = etag
+        response['X-Schedule-Version'] = version
+    return response
+
+
+async def _class_changes(api_request, filters, since, version):
+    filters = {name: value for name, value in filters.items() if name != 'available_slots__gt'}
+    queryset = class_values(upcoming_classes(filters).filter(version__gt=since).order_by('version'))
+    rows = [row async for row in queryset[:MAX_DELTA_ROWS + 1]]
+    if len(rows) > MAX_DELTA_ROWS:
+        return JsonResponse({'error': 'Too many changes; reload the full list.'}, status=410)
+    tz = resolve_timezone(api_request.query_params.get('timezone'))
+    log_event(logger, logging.INFO, 'classes.changes', user=api_request.user.email, since=since, count=len(rows))
+    return JsonResponse({'version': version, 'results': serialize_class_rows(rows, tz)})
+
+
+async def _class_page(request, api_request, filters, version, cache_key=None):
+    user = api_request.user
+    paginator = ScheduleCursorPagination()
+    try:
+        cursor = paginator.decode_cursor(api_request)
+    except NotFound as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    page_queryset = paginator.get_page_queryset(class_values(upcoming_classes(filters, cursor)), api_request)
+    page = paginator.paginate_rows([row async for row in page_queryset])
+    results = serialize_class_rows(page, resolve_timezone(request.GET.get('timezone')))
+
+    if cache_key is not None:
+        schedule_cache.set(
+            cache_key,
+            results,
+            starts=[row['date_time'].timestamp() for row in page],
+            next_cursor=paginator.get_next_cursor(),
+            version=version,
+        )
+    log_event(logger, logging.INFO, 'classes.listed', user=user.email, count=len(page), cached=False)
+    return JsonResponse({'next': paginator.get_next_link(), 'results': results})
+
+
+@require_GET
+async def user_bookings(request):
+    user, error = await aauthenticate_token(request)
+    if user is None:
+        return _unauthorized(error)
+
+    if 'email' in request.GET:
+        log_event(logger, logging.WARNING, 'bookings.blocked', reason='email_param', user=user.email)
+        return JsonResponse({"error": "Passing 'email' in query params is not allowed."}, status=403)
+
+    versions = await ListVersion.objects.acurrent(bookings_version_key(user.pk), CATALOG)
+    etag = list_etag((user.pk, *versions), request.GET)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    stream, error_response = parse_stream(request.GET)
+    if error_response:
+        return _as_json(error_response)
+
+    tz = resolve_timezone(request.GET.get('timezone'))
+    queryset = booking_values(Booking.objects.filter(user_id=user.pk))
+    if stream:
+        log_event(logger, logging.INFO, 'bookings.listed', user=user.email, stream=stream)
+        # Bind the database while the request is still pinned; the rows are
+        # only read as the body is sent.
+        response = StreamingHttpResponse(
+            astream_rows(
+                queryset.using(queryset.db).aiterator(chunk_size=STREAM_BATCH_ROWS),
+                partial(serialize_booking_rows, tz=tz), stream, STREAM_BATCH_ROWS,
+            ),
+            content_type=STREAM_CONTENT_TYPES[stream],
+        )
+        response['ETag'] = etag
+        return response
+
+    rows = serialize_booking_rows([row async for row in queryset], tz)
+    log_event(logger, logging.INFO, 'bookings.listed', user=user.email, count=len(rows))
+    response = JsonResponse(rows, safe=False)
+    response['ETag'] = etag
+    return response
+
+
+@require_GET
+async def class_stream(request):
+    """
+    Server-sent events with live slot counts, replacing tight polling of
+    /api/classes. Events:
+
+        event: slots   data: [{"class_id": 1, "available_slots": 3}, ...]
+        event: reset   data: {}    (fell behind; reload /api/classes)
+
+    plus a comment line every KEEPALIVE_SECONDS so proxies keep the
+    connection open.
+    """
+    user, error = await aauthenticate_token(request)
+    if user is None:
+        return _unauthorized(error)
+    valid, error_response = token_email_match(_ApiRequest(request, user))
+    if not valid:
+        log_event(logger, logging.WARNING, 'classes.blocked', user=user.email)
+        return _as_json(error_response)
+
+    log_event(logger, logging.INFO, 'slot_stream.opened', user=user.email)
+    response = StreamingHttpResponse(_slot_events(stream_options()['KEEPALIVE_SECONDS']), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _slot_events(keepalive):
+    subscription = slot_events.subscribe()
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            batch = await subscription.get(timeout=keepalive)
+            if batch is None:
+                yield ': keepalive\n\n'
+            elif batch is RESET:
+                yield 'event: reset\ndata: {}\n\n'
+            else:
+                data = json.dumps([{'class_id': class_id, 'available_slots': slots} for class_id, slots in batch])
+                yield f'event: slots\ndata: {data}\n\n'
+    finally:
+        slot_events.unsubscribe(subscription)
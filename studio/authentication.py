@@ -0,0 +1,98 @@
+# studio/authentication.py
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .cache import TTLCache
+
+# What the API needs to know about the caller, captured once per token.
+CachedUser = namedtuple('CachedUser', 'pk username email first_name is_staff email_key name_key')
+
+
+def _build_token_cache():
+    options = getattr(settings, 'STUDIO_TOKEN_CACHE', {})
+    return TTLCache(maxsize=options.get('MAX_ENTRIES', 10000), ttl=options.get('TTL', 300))
+
+
+token_cache = _build_token_cache()
+
+
+def _record_for(user):
+    return CachedUser(
+        pk=user.pk,
+        username=user.username,
+        email=user.email,
+        first_name=user.first_name,
+        is_staff=user.is_staff,
+        email_key=user.email.strip().lower(),
+        name_key=user.first_name.strip().lower(),
+    )
+
+
+def _user_from_record(record):
+    user = User(
+        pk=record.pk,
+        username=record.username,
+        email=record.email,
+        first_name=record.first_name,
+        is_staff=record.is_staff,
+        is_active=True,
+    )
+    user._state.adding = False
+    user.email_key, user.name_key = record.email_key, record.name_key
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers token -> user in a process-local LRU.
+
+    A warm request does no queries: the user is rebuilt from the cached
+    record as an unsaved-looking User with its primary key set, which is
+    all the views need for filtering and foreign keys. Entries are dropped
+    when the token is deleted or the user is saved/deleted (see signals);
+    other workers catch up within the TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        record = token_cache.get(key)
+        if record is None:
+            user, token = super().authenticate_credentials(key)
+            record = _record_for(user)
+            token_cache.set(key, record)
+            user.email_key, user.name_key = record.email_key, record.name_key
+            return user, token
+        return _user_from_record(record), Token(key=key, user_id=record.pk)
+
+
+async def aauthenticate_token(request):
+    """
+    Async counterpart of CachedTokenAuthentication for plain Django async
+    views. Returns `(user, None)` or `(None, error_message)`.
+    """
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return None, 'Authentication credentials were not provided.'
+    if len(auth) != 2:
+        return None, 'Invalid token header.'
+
+    key = auth[1]
+    record = token_cache.get(key)
+    if record is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None, 'Invalid token.'
+        if not token.user.is_active:
+            return None, 'User inactive or deleted.'
+        record = _record_for(token.user)
+        token_cache.set(key, record)
+    return _user_from_record(record), None
+
+
+def forget_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        token_cache.delete(key)
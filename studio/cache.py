@@ -0,0 +1,200 @@
+# studio/cache.py
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU with a per-entry time-to-live.
+
+    Process-local on purpose: it sits in front of hot read paths where a
+    network hop to a shared cache would cost more than the query it saves.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires, value = item
+            if expires <= self.clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """Like get(), but leaves LRU order and hit/miss counters alone."""
+        with self._lock:
+            item = self._data.get(key)
+        if item is None or item[0] <= self.clock():
+            return None
+        return item[1]
+
+    def set(self, key, value, ttl=None):
+        expires = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ScheduleCache:
+    """
+    Serialized /api/classes pages keyed by (time bucket, timezone, query).
+
+    Only the rows and the next-page cursor are stored; links are rebuilt per
+    request so one caller's ?email= never leaks into another's response.
+
+    Each entry keeps the start timestamps of its rows so that, within a
+    bucket, classes that have already started are trimmed on read rather
+    than served. Bookings patch `available_slots` in place through
+    `patch_slots` (and cancellations through `reopen`); anything else that
+    edits classes calls `clear`.
+
+    Entries also carry the schedule version they were built at and a count
+    of the patches applied since, which is all a warm hit needs for its
+    ETag. Like the rows, that tag only follows this process's bookings.
+    """
+
+    def __init__(self, maxsize=512, ttl=30, bucket_seconds=30):
+        self.bucket_seconds = bucket_seconds
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._bucket = None
+        self._by_class = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'STUDIO_SCHEDULE_CACHE', {})
+        return cls(
+            maxsize=options.get('MAX_ENTRIES', 512),
+            ttl=options.get('TTL', 30),
+            bucket_seconds=options.get('BUCKET_SECONDS', 30),
+        )
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'STUDIO_SCHEDULE_CACHE', {}).get('ENABLED', True)
+
+    def bucket(self, at=None):
+        return int((time.time() if at is None else at) // self.bucket_seconds)
+
+    def make_key(self, tz_name, query, at=None):
+        return (self.bucket(at), tz_name or 'UTC', query)
+
+    def key_for(self, params):
+        """Cache key for a /api/classes query string."""
+        # The email param only gates access; it does not change the rows.
+        query = '&'.join(
+            f"{name}={value}"
+            for name, value in sorted(params.items())
+            if name not in ('email', 'timezone')
+        )
+        return self.make_key(params.get('timezone'), query)
+
+    def get(self, key, at=None):
+        """
+        Return `(results, next_cursor, tag)` for a cached page, or None. The
+        tag is `(version,)`, or `(version, patches)` once bookings have
+        patched the page.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        starts, results, next_cursor, version, patches = entry
+        cut = bisect_left(starts, time.time() if at is None else at)
+        tag = (version, patches) if patches else (version,)
+        return (results[cut:] if cut else results), next_cursor, tag
+
+    def set(self, key, results, starts, next_cursor=None, version=0):
+        self.entries.set(key, [list(starts), results, next_cursor, version, 0])
+        with self._lock:
+            if key[0] != self._bucket:
+                # Keys from earlier buckets are never looked up again.
+                self._bucket = key[0]
+                self._by_class.clear()
+            for row in results:
+                self._by_class.setdefault(row['id'], set()).add(key)
+
+    def patch_slots(self, class_id, available_slots):
+        """
+        Apply a new slot count to every cached page holding `class_id`.
+        Pages filtered on has_slots drop out once the class is full.
+        """
+        with self._lock:
+            keys = self._by_class.pop(class_id, set())
+        for key in keys:
+            entry = self.entries.peek(key)
+            if entry is None:
+                continue
+            if available_slots <= 0 and 'has_slots=' in key[2]:
+                self.entries.delete(key)
+                continue
+            for row in entry[1]:
+                if row['id'] == class_id:
+                    row['available_slots'] = available_slots
+            with self._lock:
+                entry[4] += 1
+                self._by_class.setdefault(class_id, set()).add(key)
+
+    def reopen(self, class_id, available_slots):
+        """
+        A full class got a seat back: patch the pages that list it and drop
+        every has_slots page, since those were built without it.
+        """
+        self.patch_slots(class_id, available_slots)
+        for key in self.entries.keys():
+            if 'has_slots=' in key[2]:
+                self.entries.delete(key)
+
+    def clear(self):
+        self.entries.clear()
+        with self._lock:
+            self._by_class.clear()
+
+    def stats(self):
+        return self.entries.stats()
+
+
+schedule_cache = ScheduleCache.from_settings()
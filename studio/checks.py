@@ -0,0 +1,24 @@
+# studio/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Caches that live in one process (or nowhere), so other workers cannot see a pin.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register('caches')
+def check_replica_pin_cache(app_configs, **kwargs):
+    if not getattr(settings, 'STUDIO_READ_REPLICAS', []):
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        'Read replicas are configured but the default cache is process-local, so a '
+        'user who just wrote is not pinned to the primary on the other workers.',
+        hint='Set DJANGO_CACHE_TABLE (or CACHES) to a cache every worker shares.',
+        id='studio.E001',
+    )]
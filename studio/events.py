@@ -0,0 +1,174 @@
+# studio/events.py
+"""
+In-process fan-out of live slot counts for the /api/classes/stream SSE
+endpoint.
+
+Booking paths call `slot_events.publish(class_id, available_slots)` after
+commit, from any thread. Each subscriber owns a bounded buffer that keeps
+only the latest count per class, so a burst of bookings on one class costs
+one entry. A subscriber that falls further behind than its buffer is not
+waited for: its buffer is dropped and it gets a single `reset`, telling the
+client to reload the list. Publishers never block on slow readers.
+
+Changes made by other worker processes are picked up by one poller per
+event loop that follows FitnessClass.version (see STUDIO_SLOT_STREAM).
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .logs import log_event
+
+logger = logging.getLogger(__name__)
+
+RESET = object()
+
+
+def stream_options():
+    return {
+        'BUFFER': 256,
+        'KEEPALIVE_SECONDS': 15,
+        'POLL_SECONDS': 1.0,
+        **getattr(settings, 'STUDIO_SLOT_STREAM', {}),
+    }
+
+
+class Subscription:
+    """One client's view of the stream. Only touched on its event loop."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.resets = 0
+        self._pending = OrderedDict()
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, class_id, available_slots):
+        if not self._overflowed:
+            self._pending[class_id] = available_slots
+            self._pending.move_to_end(class_id)
+            if len(self._pending) > self.maxsize:
+                self.reset()
+                return
+        self._ready.set()
+
+    def reset(self):
+        """Drop whatever is buffered; the client must reload the list."""
+        self._pending.clear()
+        if not self._overflowed:
+            self._overflowed = True
+            self.resets += 1
+        self._ready.set()
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next batch: a list of (class_id, available_slots),
+        RESET after an overflow, or None if `timeout` passed first.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return RESET
+        batch, self._pending = list(self._pending.items()), OrderedDict()
+        return batch
+
+
+class SlotBroker:
+    def __init__(self):
+        self._loops = {}      # event loop -> set of subscriptions on it
+        self._pollers = {}    # event loop -> poller task
+        self._published = {}  # class id -> count published since the last poll
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize=None, poll_seconds=None):
+        """Register a subscription on the running loop. Call from async code."""
+        options = stream_options()
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(maxsize or options['BUFFER'])
+        with self._lock:
+            self._loops.setdefault(loop, set()).add(subscription)
+            poll_seconds = options['POLL_SECONDS'] if poll_seconds is None else poll_seconds
+            if poll_seconds and loop not in self._pollers:
+                self._pollers[loop] = loop.create_task(self._poll(loop, poll_seconds))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            subscriptions = self._loops.get(loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._loops[loop]
+
+    def publish(self, class_id, available_slots):
+        """Thread-safe; schedules one delivery per event loop with subscribers."""
+        with self._lock:
+            loops = list(self._loops)
+            if self._pollers:
+                self._published[class_id] = available_slots
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, [(class_id, available_slots)])
+            except RuntimeError:  # loop already closed
+                with self._lock:
+                    self._loops.pop(loop, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._loops.values())
+
+    def _subscriptions(self, loop):
+        with self._lock:
+            return list(self._loops.get(loop, ()))
+
+    def _deliver(self, loop, changes):
+        for subscription in self._subscriptions(loop):
+            for class_id, available_slots in changes:
+                subscription.offer(class_id, available_slots)
+
+    async def _poll(self, loop, interval):
+        from .models import SCHEDULE, FitnessClass, ListVersion
+
+        limit = stream_options()['BUFFER']
+        try:
+            seen, = await ListVersion.objects.acurrent(SCHEDULE)
+            while True:
+                await asyncio.sleep(interval)
+                with self._lock:
+                    if loop not in self._loops:
+                        return
+                try:
+                    rows = FitnessClass.objects.filter(version__gt=seen).order_by('version')
+                    changes = []
+                    async for class_id, available_slots, version in rows.values_list(
+                        'id', 'available_slots', 'version'
+                    )[:limit + 1]:
+                        changes.append((class_id, available_slots))
+                        seen = version
+                    # Skip what this process already published itself.
+                    with self._lock:
+                        published, self._published = self._published, {}
+                    changes = [change for change in changes if published.get(change[0]) != change[1]]
+                    if len(changes) > limit:
+                        # More than a buffer's worth (an import, say): resync everyone.
+                        seen, = await ListVersion.objects.acurrent(SCHEDULE)
+                        for subscription in self._subscriptions(loop):
+                            subscription.reset()
+                    elif changes:
+                        self._deliver(loop, changes)
+                except Exception as exc:
+                    log_event(logger, logging.WARNING, 'slot_stream.poll_failed', error=repr(exc))
+        finally:
+            with self._lock:
+                self._pollers.pop(loop, None)
+
+
+slot_events = SlotBroker()
@@ -0,0 +1,18 @@
+# studio/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from
+    settings.STUDIO_PASSWORD_ITERATIONS.
+
+    It keeps Django's 'pbkdf2_sha256' algorithm name, so existing hashes
+    verify unchanged. When the configured cost differs from a stored hash,
+    check_password() re-hashes it on the user's next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'STUDIO_PASSWORD_ITERATIONS', PBKDF2PasswordHasher.iterations)
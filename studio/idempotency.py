@@ -0,0 +1,102 @@
+# studio/idempotency.py
+"""
+Idempotency-Key support for POST endpoints a client may retry.
+
+A request sent with `Idempotency-Key: <any string up to 255 characters>`
+runs once. Its response is stored in IdempotencyKey in the same transaction
+as the work it did, and every retry with the same key gets that response
+back with `Idempotent-Replayed: true`. A retry costs one indexed lookup and
+never reaches the view. Keys are scoped to the user and live for
+STUDIO_IDEMPOTENCY['TTL'] seconds; expired records are deleted as new ones
+are stored.
+
+Reusing a key for a different request body is refused with 422. When two
+copies of a request race, the one that commits second rolls back and
+replays the first one's response.
+"""
+import hashlib
+import json
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .logs import log_event
+from .models import IdempotencyKey
+from .sqlite import serialized_write
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+def idempotency_options():
+    return {
+        'TTL': 24 * 60 * 60,
+        **getattr(settings, 'STUDIO_IDEMPOTENCY', {}),
+    }
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.blake2b(f'{request.path}\n{body}'.encode(), digest_size=16).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key was already used for a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(record.body, status=record.status_code, headers={REPLAY_HEADER: 'true'})
+
+
+def idempotent(handler):
+    """
+    Make a DRF `post` handler replayable through the Idempotency-Key header.
+    Requests without the header run as before. Apply it outside
+    serialized_write and transaction.atomic: replays must not wait for the
+    write lock, and the handler's own transaction then nests in the one
+    that stores the response.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response(
+                {'error': 'Idempotency-Key must be 1 to 255 characters.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ttl = idempotency_options()['TTL']
+        fingerprint = request_fingerprint(request)
+        # Always the primary: a replica may not have the first attempt yet.
+        records = IdempotencyKey.objects.using(router.db_for_write(IdempotencyKey))
+        mine = records.filter(user=request.user, key=key)
+        record = mine.live(ttl).first()
+        if record is not None:
+            log_event(logger, logging.INFO, 'idempotency.replayed', user=request.user.email, path=request.path)
+            return _replay(record, fingerprint)
+
+        try:
+            with serialized_write(using=records.db), transaction.atomic(using=records.db):
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code < 500:
+                    records.purge(ttl)
+                    records.create(
+                        user=request.user, key=key, fingerprint=fingerprint,
+                        status_code=response.status_code, body=response.data,
+                    )
+        except IntegrityError:
+            # A copy of this request committed first; everything above rolled back.
+            record = mine.first()
+            if record is None:
+                raise
+            log_event(logger, logging.INFO, 'idempotency.replayed', user=request.user.email, path=request.path, raced=True)
+            return _replay(record, fingerprint)
+        return response
+    return wrapper
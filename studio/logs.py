@@ -0,0 +1,104 @@
+# studio/logs.py
+"""
+Non-blocking structured logging for the request path.
+
+Request handlers only build a LogRecord and drop it on a bounded queue;
+a background QueueListener thread formats it as one JSON line and writes it
+to a size-rotated file. Wired up through LOGGING in settings.py.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+def log_event(logger, level, event, **fields):
+    """
+    Emit a structured event, e.g.
+    `log_event(logger, logging.INFO, 'booking.created', class_id=3)`.
+    Fields should be small scalars; never pass whole request/response bodies.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'event': event, 'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None) or record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-volume events: `rates` maps an event name
+    to the probability of keeping it. Warnings and above always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class AsyncRotatingFileHandler(QueueHandler):
+    """
+    QueueHandler that owns its listener thread and a RotatingFileHandler.
+
+    The queue is bounded; when the writer falls behind, records are dropped
+    (and counted in `dropped`) rather than stalling the request.
+    """
+
+    def __init__(self, filename, maxBytes=10 * 1024 * 1024, backupCount=5, queue_size=10000, encoding='utf-8'):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+        target = RotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        """
+        Like QueueHandler.prepare, which folds the traceback into the
+        message and drops exc_info, but keep the traceback as exc_text so
+        JsonFormatter can write it to its own field.
+        """
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = JsonFormatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+        super().close()
@@ -0,0 +1,57 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from studio.models import Booking
+from studio.transfer import FORMATS, guess_format, render_rows
+
+FIELDS = ('id', 'class_id', 'class_name', 'date_time', 'client_name', 'client_email', 'booked_at')
+
+
+class Command(BaseCommand):
+    help = (
+        'Write bookings as CSV or JSONL, streaming rows from the database in '
+        'chunks so memory stays flat however many bookings there are.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write (default: stdout).')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the output extension, else csv.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip.')
+        parser.add_argument('--class-id', type=int, nargs='+', help='Only bookings for these classes.')
+        parser.add_argument('--email', help='Only bookings made with this client email.')
+        parser.add_argument('--since', type=parse_date, help='Only bookings made on or after this date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.order_by('id')
+        if options['class_id']:
+            bookings = bookings.filter(fitness_class_id__in=options['class_id'])
+        if options['email']:
+            bookings = bookings.filter(client_email__iexact=options['email'])
+        if options['since']:
+            bookings = bookings.filter(booked_at__date__gte=options['since'])
+        rows = bookings.values_list(
+            'id', 'fitness_class_id', 'fitness_class__name', 'fitness_class__date_time',
+            'client_name', 'client_email', 'booked_at',
+        ).iterator(chunk_size=options['chunk_size'])
+
+        path = options['output']
+        fmt = options['format'] or guess_format(path)
+        start = time.perf_counter()
+        lines = 0
+        out = open(path, 'w', newline='', encoding='utf-8') if path else None
+        try:
+            write = out.write if out else partial(self.stdout.write, ending='')
+            for line in render_rows(fmt, FIELDS, rows):
+                write(line)
+                lines += 1
+        finally:
+            if out:
+                out.close()
+
+        count = lines - 1 if fmt == 'csv' else lines
+        elapsed = time.perf_counter() - start
+        # stderr, so that stdout carries nothing but the export.
+        self.stderr.write(f'Exported {count} bookings in {elapsed:.2f}s.', style_func=self.style.SUCCESS)
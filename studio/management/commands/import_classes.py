@@ -0,0 +1,137 @@
+import sys
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, reset_queries, transaction
+
+from studio.models import CATALOG, MAX_CLASS_MINUTES, FitnessClass, ListVersion, OccupancyRollup, rollup_key
+from studio.transfer import FORMATS, RowError, datetime_field, guess_format, int_field, read_rows, text_field
+
+UPDATE_FIELDS = ['name', 'date_time', 'duration', 'instructor', 'room', 'total_slots', 'available_slots']
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update fitness classes from a CSV or JSONL file with columns '
+        'name, date_time, instructor, total_slots and optionally id, duration '
+        '(minutes), room and available_slots. Rows with an existing id update '
+        'that class. A class that would double-book its instructor or room '
+        'stops the import. The file is streamed and written in batches, one '
+        'transaction per batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin.')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction.')
+        parser.add_argument('--timezone', default='UTC', help='Zone for date_time values without an offset.')
+
+    def handle(self, *args, **options):
+        try:
+            tz = ZoneInfo(options['timezone'])
+        except (ValueError, ZoneInfoNotFoundError):
+            raise CommandError(f"Unknown timezone {options['timezone']!r}.")
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        created = updated = 0
+        start = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            for batch in self.batches(read_rows(stream, fmt), tz, options['batch_size']):
+                new, changed = self.write(batch)
+                created += new
+                updated += changed
+                # With DEBUG on, Django keeps the SQL of every statement.
+                reset_queries()
+        except (RowError, IntegrityError) as exc:
+            raise CommandError(
+                f'{path}: {exc}. {created + updated} rows before this batch were already imported.'
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created + updated} classes ({created} created, {updated} updated) in {elapsed:.2f}s.'
+        ))
+
+    def batches(self, rows, tz, size):
+        batch = []
+        for line_no, row in rows:
+            try:
+                batch.append((line_no, *self.parse(row, tz)))
+            except ValueError as exc:
+                raise RowError(line_no, exc) from None
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def parse(row, tz):
+        fields = {
+            'name': text_field(row, 'name'),
+            'date_time': datetime_field(row, 'date_time', tz),
+            'instructor': text_field(row, 'instructor'),
+            'total_slots': int_field(row, 'total_slots'),
+        }
+        duration = int_field(row, 'duration', required=False)
+        if duration is not None:
+            if not 1 <= duration <= MAX_CLASS_MINUTES:
+                raise ValueError(f'duration must be between 1 and {MAX_CLASS_MINUTES} minutes')
+            fields['duration'] = duration
+        if row.get('room') not in (None, ''):
+            fields['room'] = text_field(row, 'room')
+        available = int_field(row, 'available_slots', required=False)
+        if available is not None:
+            if available > fields['total_slots']:
+                raise ValueError('available_slots is greater than total_slots')
+            fields['available_slots'] = available
+        return int_field(row, 'id', required=False), fields
+
+    @staticmethod
+    def write(batch):
+        """Insert or update one batch; returns (created, updated)."""
+        with transaction.atomic():
+            ids = [pk for _, pk, _ in batch if pk is not None]
+            # select_for_update keeps the lookup on the primary.
+            existing = FitnessClass.objects.select_for_update().in_bulk(ids) if ids else {}
+            new, changed, lines, touched = [], [], {}, set()
+            for line_no, pk, fields in batch:
+                current = existing.get(pk)
+                if current is None:
+                    fields.setdefault('available_slots', fields['total_slots'])
+                    new.append(FitnessClass(id=pk, **fields))
+                    lines[id(new[-1])] = line_no
+                    continue
+                # The rollup the class leaves, if the row moves it.
+                touched.add(rollup_key(current.date_time, current.instructor))
+                if 'available_slots' not in fields:
+                    # Keep the seats already booked when capacity changes.
+                    booked = current.total_slots - current.available_slots
+                    fields['available_slots'] = max(fields['total_slots'] - booked, 0)
+                for name, value in fields.items():
+                    setattr(current, name, value)
+                changed.append(current)
+                lines[id(current)] = line_no
+
+            # Earlier batches are committed, so they are checked as existing classes.
+            clashes = FitnessClass.objects.conflicts(new + changed)
+            if clashes:
+                clash = clashes[0]
+                raise RowError(max(lines.get(id(clash.first), 0), lines.get(id(clash.second), 0)), clash)
+
+            FitnessClass.objects.bulk_create(new)
+            FitnessClass.objects.bulk_update(changed, UPDATE_FIELDS)
+            # Bulk writes skip save signals: stamp for ?since= and the stream,
+            # and refresh the occupancy rollups the batch touched.
+            FitnessClass.objects.stamp([item.pk for item in new] + [item.pk for item in changed])
+            touched.update(rollup_key(item.date_time, item.instructor) for item in new + changed)
+            OccupancyRollup.objects.refresh(touched)
+            if changed:
+                ListVersion.objects.bump(CATALOG)
+        return len(new), len(changed)
@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import localdate
+
+from studio.models import ClassSeries
+
+
+class Command(BaseCommand):
+    help = (
+        'Expand recurring class series into FitnessClass rows up to a rolling '
+        'horizon. Run it daily (cron) to keep the schedule topped up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.STUDIO_SERIES_HORIZON_DAYS,
+            help='Materialize this many days ahead (default: STUDIO_SERIES_HORIZON_DAYS).',
+        )
+        parser.add_argument('--series', type=int, nargs='+', help='Only these series ids.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk INSERT.')
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Ignore materialized_until and re-expand the whole horizon; existing classes are skipped.',
+        )
+
+    def handle(self, *args, **options):
+        today = localdate()
+        until = today + timedelta(days=options['days'])
+        series = ClassSeries.objects.filter(Q(end_date__isnull=True) | Q(end_date__gte=today)).order_by('id')
+        if options['series']:
+            series = series.filter(id__in=options['series'])
+
+        total = 0
+        start = time.perf_counter()
+        for item in series:
+            # A series that clashes with the schedule is skipped, not half-made.
+            try:
+                with transaction.atomic():
+                    created = item.materialize(
+                        until, chunk_size=options['chunk_size'], today=today, resume=not options['rebuild']
+                    )
+            except ValidationError as exc:
+                self.stderr.write(exc.messages[0])
+                continue
+            total += created
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{item}: {created} classes')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} classes up to {until} in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.utils.dateparse import parse_date
+
+from studio.models import FitnessClass, OccupancyRollup, day_window
+
+# Differences listed by --check before it summarises the rest.
+SHOW_DIFFERENCES = 20
+
+
+def day_arg(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the occupancy rollups behind /api/analytics from the classes '
+        'and bookings, and rewrite the rows that differ. Bookings and class edits '
+        'keep the rollups current on their own; run this as a periodic catch-up '
+        'for changes made around them, or with --check to only report differences.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Compare only; exit with an error if any row differs.')
+        parser.add_argument('--since', type=day_arg, help='First day (YYYY-MM-DD) to cover. Default: all history.')
+        parser.add_argument('--until', type=day_arg, help='Last day (YYYY-MM-DD) to cover. Default: all history.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        db = router.db_for_write(OccupancyRollup)
+        classes = FitnessClass.objects.using(db).all()
+        rollups = OccupancyRollup.objects.using(db).all()
+        if options['since']:
+            classes = classes.filter(date_time__gte=day_window(options['since'], options['since'])[0])
+            rollups = rollups.filter(day__gte=options['since'])
+        if options['until']:
+            classes = classes.filter(date_time__lt=day_window(options['until'], options['until'])[1])
+            rollups = rollups.filter(day__lte=options['until'])
+
+        with transaction.atomic(using=db):
+            expected = OccupancyRollup.objects.computed(classes)
+            stored = {
+                (row.day, row.instructor): (row.classes, row.capacity, row.booked)
+                for row in rollups.only('day', 'instructor', 'classes', 'capacity', 'booked')
+            }
+            differing = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+            if options['check']:
+                self.report(differing, expected, stored)
+            else:
+                OccupancyRollup.objects.using(db).store({key: expected.get(key) for key in differing})
+        elapsed = time.perf_counter() - start
+
+        if options['check']:
+            if differing:
+                raise CommandError(f'{len(differing)} of {len(expected)} rollup rows differ from a full recompute.')
+            message = f'Rollups match a full recompute ({len(expected)} rows)'
+        else:
+            message = f'Rewrote {len(differing)} of {len(expected)} rollup rows'
+        self.stdout.write(self.style.SUCCESS(f'{message} in {elapsed:.2f}s.'))
+
+    def report(self, differing, expected, stored):
+        for day, instructor in differing[:SHOW_DIFFERENCES]:
+            self.stderr.write(
+                f'{day} {instructor!r}: stored (classes, capacity, booked) = {stored.get((day, instructor))}, '
+                f'recomputed = {expected.get((day, instructor))}'
+            )
+        if len(differing) > SHOW_DIFFERENCES:
+            self.stderr.write(f'... and {len(differing) - SHOW_DIFFERENCES} more.')
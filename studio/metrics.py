@@ -0,0 +1,253 @@
+# studio/metrics.py
+"""
+Per-route request metrics, exposed in the Prometheus text format at
+/metrics.
+
+RequestMetricsMiddleware times each request and, through a contextvar,
+collects what happened inside it: database queries (counted by an execute
+wrapper installed on every connection, see signals.py) and time spent
+serializing list rows and rendering DRF responses. Everything is kept in
+fixed-bucket histograms per (route, method), so the cost per request is a
+few additions under a lock and memory does not grow with traffic.
+
+Numbers are per process; with several workers, scrape each one or
+aggregate in Prometheus.
+
+Sending `X-Profile: <STUDIO_METRICS['PROFILE_KEY']>` (any value when DEBUG
+is on) runs that one request under cProfile and replies with the profile
+summary instead of the response body.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+_current = ContextVar('studio_request_stats', default=None)
+
+
+def metrics_options():
+    return {
+        'ENABLED': True,
+        'PROFILE_KEY': '',
+        'PROFILE_LINES': 40,
+        **getattr(settings, 'STUDIO_METRICS', {}),
+    }
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+def query_timer(execute, sql, params, many, context):
+    """Execute wrapper: adds each query's count and time to the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def timed_serialization(fn):
+    """Count the time spent in `fn` as serialization for the current request."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stats.serialize_seconds += time.perf_counter() - start
+    return wrapper
+
+
+class TimedJSONRenderer(JSONRenderer):
+    render = timed_serialization(JSONRenderer.render)
+
+
+# ------------------ Histograms ------------------
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.bounds, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+HISTOGRAMS = (
+    # name, bucket bounds, help, RequestStats field (None: request latency)
+    ('studio_request_duration_seconds', LATENCY_BUCKETS, 'Request latency.', None),
+    ('studio_request_db_queries', QUERY_BUCKETS, 'Database queries per request.', 'queries'),
+    ('studio_request_db_seconds', LATENCY_BUCKETS, 'Time in database queries per request.', 'db_seconds'),
+    ('studio_request_serialize_seconds', LATENCY_BUCKETS, 'Time serializing and rendering per request.', 'serialize_seconds'),
+)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._statuses = {}
+
+    def observe(self, route, method, status, seconds, stats):
+        method = method if method in METHODS else 'OTHER'
+        with self._lock:
+            histograms = self._routes.get((route, method))
+            if histograms is None:
+                histograms = self._routes[(route, method)] = [Histogram(bounds) for _, bounds, _, _ in HISTOGRAMS]
+            for histogram, (_, _, _, field) in zip(histograms, HISTOGRAMS):
+                histogram.observe(seconds if field is None else getattr(stats, field))
+            key = (route, method, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def render(self):
+        with self._lock:
+            routes = {key: [(list(h.counts), h.sum) for h in value] for key, value in self._routes.items()}
+            statuses = dict(self._statuses)
+
+        lines = [
+            '# HELP studio_requests_total Requests by route, method and status.',
+            '# TYPE studio_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(statuses.items()):
+            lines.append(f'studio_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+        for index, (name, bounds, help_text, _) in enumerate(HISTOGRAMS):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (route, method), snapshots in sorted(routes.items()):
+                histogram = Histogram(bounds)
+                histogram.counts, histogram.sum = snapshots[index]
+                lines.extend(histogram.lines(name, f'route="{route}",method="{method}"'))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._statuses.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def metrics_view(request):
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ------------------ Middleware ------------------
+
+def _route(request):
+    # The URL pattern, not the path, so ids do not explode the label set.
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+def _profile_requested(request, options):
+    header = request.META.get('HTTP_X_PROFILE')
+    if not header:
+        return False
+    if options['PROFILE_KEY']:
+        return hmac.compare_digest(header.encode(), options['PROFILE_KEY'].encode())
+    return settings.DEBUG
+
+
+def _profile_response(profiler, response, seconds, lines):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(lines)
+    summary = HttpResponse(out.getvalue(), content_type='text/plain; charset=utf-8')
+    summary['X-Profile-Status'] = str(response.status_code)
+    summary['X-Profile-Seconds'] = f'{seconds:.6f}'
+    return summary
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        options = metrics_options()
+        if not options['ENABLED']:
+            return self.get_response(request)
+        profiler = cProfile.Profile() if _profile_requested(request, options) else None
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            if profiler:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+        finally:
+            seconds = time.perf_counter() - start
+            _current.reset(token)
+        request_metrics.observe(_route(request), request.method, response.status_code, seconds, stats)
+        return _profile_response(profiler, response, seconds, options['PROFILE_LINES']) if profiler else response
+
+    async def __acall__(self, request):
+        options = metrics_options()
+        if not options['ENABLED']:
+            return await self.get_response(request)
+        # cProfile follows this thread only: on ASGI the summary covers the
+        # event loop (and anything else it runs meanwhile), not ORM threads.
+        profiler = cProfile.Profile() if _profile_requested(request, options) else None
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            if profiler:
+                profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+        finally:
+            seconds = time.perf_counter() - start
+            _current.reset(token)
+        request_metrics.observe(_route(request), request.method, response.status_code, seconds, stats)
+        return _profile_response(profiler, response, seconds, options['PROFILE_LINES']) if profiler else response
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0002_alter_booking_options_alter_fitnessclass_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fitnessclass',
+            index=models.Index(fields=['date_time', 'id'], name='class_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessclass',
+            index=models.Index(fields=['instructor', 'date_time', 'id'], name='class_instructor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessclass',
+            index=models.Index(condition=models.Q(('available_slots__gt', 0)), fields=['date_time', 'id'], name='class_open_slots_idx'),
+        ),
+    ]
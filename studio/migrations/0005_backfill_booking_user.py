@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import migrations, transaction
+
+BATCH_SIZE = 5000
+
+
+def backfill_booking_user(apps, schema_editor):
+    """
+    Link existing bookings to the user whose email they were made with.
+
+    Walks the table in primary-key order, one short transaction per batch,
+    so large tables are never locked for the whole backfill.
+    """
+    Booking = apps.get_model('studio', 'Booking')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    db = schema_editor.connection.alias
+
+    last_pk = 0
+    while True:
+        batch = list(
+            Booking.objects.using(db)
+            .filter(pk__gt=last_pk, user__isnull=True)
+            .order_by('pk')
+            .only('pk', 'client_email')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        emails = {booking.client_email for booking in batch}
+        user_ids = dict(User.objects.using(db).filter(email__in=emails).values_list('email', 'pk'))
+        matched = []
+        for booking in batch:
+            user_id = user_ids.get(booking.client_email)
+            if user_id is not None:
+                booking.user_id = user_id
+                matched.append(booking)
+
+        with transaction.atomic(using=db):
+            Booking.objects.using(db).bulk_update(matched, ['user'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('studio', '0004_booking_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_booking_user, migrations.RunPython.noop),
+    ]
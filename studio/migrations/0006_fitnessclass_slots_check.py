@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0005_backfill_booking_user'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='fitnessclass',
+            constraint=models.CheckConstraint(condition=models.Q(('available_slots__gte', 0)), name='class_available_slots_non_negative'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index auth_user.email for the login lookup, and make non-blank emails
+    unique so signup can rely on the database instead of a pre-check.
+    Blank emails (e.g. from createsuperuser) stay allowed.
+    """
+
+    dependencies = [
+        ('studio', '0006_fitnessclass_slots_check'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS studio_auth_user_email_idx ON auth_user (email)',
+            'DROP INDEX IF EXISTS studio_auth_user_email_idx',
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX IF NOT EXISTS studio_auth_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            'DROP INDEX IF EXISTS studio_auth_user_email_uniq',
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0007_auth_user_email_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fitnessclass',
+            name='waitlist_tail',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Waitlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('client_name', models.CharField(max_length=100)),
+                ('client_email', models.EmailField(max_length=254)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('fitness_class', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='studio.fitnessclass')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['fitness_class', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('fitness_class', 'position'), name='waitlist_class_position_uniq'), models.UniqueConstraint(fields=('user', 'fitness_class'), name='waitlist_class_user_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListVersion',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fitnessclass',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessclass',
+            index=models.Index(fields=['version'], name='class_version_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:58
+
+import django.core.validators
+import django.db.models.deletion
+import studio.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0009_list_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('instructor', models.CharField(max_length=100)),
+                ('total_slots', models.PositiveIntegerField()),
+                ('weekdays', models.CharField(help_text='e.g. "mon,wed,fri"', max_length=27, validators=[studio.models.validate_weekdays])),
+                ('start_time', models.TimeField(help_text='Wall-clock time in the series timezone')),
+                ('timezone', models.CharField(default='UTC', max_length=64, validators=[studio.models.validate_timezone])),
+                ('interval_weeks', models.PositiveSmallIntegerField(default=1, help_text='1 = every week', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(52)])),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('materialized_until', models.DateField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'class series',
+            },
+        ),
+        migrations.AddField(
+            model_name='fitnessclass',
+            name='series',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='classes', to='studio.classseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='fitnessclass',
+            constraint=models.UniqueConstraint(condition=models.Q(('series__isnull', False)), fields=('series', 'date_time'), name='class_series_occurrence_uniq'),
+        ),
+    ]
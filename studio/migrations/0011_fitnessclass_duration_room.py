@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:37
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0010_class_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fitnessclass',
+            name='duration',
+            field=models.PositiveSmallIntegerField(default=60, help_text='Minutes', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1440)]),
+        ),
+        migrations.AddField(
+            model_name='fitnessclass',
+            name='room',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessclass',
+            index=models.Index(fields=['room', 'date_time'], name='class_room_idx'),
+        ),
+    ]
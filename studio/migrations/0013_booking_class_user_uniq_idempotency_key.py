@@ -0,0 +1,76 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+from django.db.models.functions import Least
+
+
+def remove_duplicate_bookings(apps, schema_editor):
+    """
+    Keep the first booking of each (class, user) pair and hand the seats the
+    retried duplicates took back to the class, so the unique constraint can
+    be added.
+    """
+    Booking = apps.get_model('studio', 'Booking')
+    FitnessClass = apps.get_model('studio', 'FitnessClass')
+    db = schema_editor.connection.alias
+
+    duplicated = (
+        Booking.objects.using(db).filter(user__isnull=False).order_by()
+        .values('fitness_class_id', 'user_id').annotate(first=Min('id'), count=Count('id')).filter(count__gt=1)
+    )
+    for group in duplicated:
+        extra, _ = Booking.objects.using(db).filter(
+            fitness_class_id=group['fitness_class_id'], user_id=group['user_id'],
+        ).exclude(id=group['first']).delete()
+        FitnessClass.objects.using(db).filter(id=group['fitness_class_id']).update(
+            available_slots=Least(F('available_slots') + extra, F('total_slots'))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0012_occupancy_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('body', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(remove_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('fitness_class', 'user'), name='booking_class_user_uniq'),
+        ),
+        # The unique index leads with fitness_class, so the FK index can go.
+        migrations.AlterField(
+            model_name='booking',
+            name='fitness_class',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='studio.fitnessclass'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='idempotencykey',
+            index=models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='idempotency_user_key_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0013_booking_class_user_uniq_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fitnessclass',
+            name='waitlist_tail',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0014_fitnessclass_waitlist_tail_not_editable'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fitnessclass',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,17 +1,629 @@
-from django.db import models
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate, localtime, make_aware, now
+
+from .scheduling import class_end, find_clashes
+from .timezones import is_timezone
+
+# ListVersion keys. SCHEDULE moves on every change to any class, CATALOG only
+# on edits that can change what a booking shows (name, time, deletion).
+SCHEDULE = 'schedule'
+CATALOG = 'catalog'
+
+
+# Longest class allowed. Conflict checks rely on it to bound their range
+# scans: a class overlapping [start, end) must start after start - this.
+MAX_CLASS_MINUTES = 24 * 60
+
+
+def bookings_version_key(user_id):
+    return f'bookings:{user_id}'
+
+
+class ListVersionQuerySet(models.QuerySet):
+    def bump(self, key):
+        """Advance a counter, creating it on first use."""
+        if self.filter(key=key).update(value=models.F('value') + 1):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(key=key, value=1)
+        except IntegrityError:
+            self.filter(key=key).update(value=models.F('value') + 1)
+
+    def current(self, *keys):
+        """Map each key to its counter value (0 when never bumped), in one query."""
+        found = dict(self.filter(key__in=keys).values_list('key', 'value'))
+        return [found.get(key, 0) for key in keys]
+
+    async def acurrent(self, *keys):
+        found = {key: value async for key, value in self.filter(key__in=keys).values_list('key', 'value')}
+        return [found.get(key, 0) for key in keys]
+
+
+class ListVersion(models.Model):
+    """
+    Monotonic counters behind the list ETags. Incrementing with an UPDATE
+    locks the row until commit, so versions become visible in order.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    objects = ListVersionQuerySet.as_manager()
+
+
+class StudioQuerySet(models.QuerySet):
+    @property
+    def write_db(self):
+        # `self.db` routes to a read replica until the queryset is written to.
+        return self._db or router.db_for_write(self.model)
+
+
+class FitnessClassQuerySet(StudioQuerySet):
+    def stamp(self, class_ids=None):
+        """
+        Bump the schedule version and stamp it on `class_ids` (or on every
+        class in this queryset), so that ?since= deltas pick them up. Call
+        it after the change itself.
+        """
+        versions = ListVersion.objects.using(self.write_db)
+        versions.bump(SCHEDULE)
+        current = versions.filter(key=SCHEDULE).values('value')
+        classes = self if class_ids is None else self.filter(pk__in=list(class_ids))
+        classes.update(version=models.Subquery(current))
+
+    def stamp_on_commit(self, class_ids):
+        """
+        `stamp` the classes once the current transaction commits, in a short
+        transaction of its own. The booking paths use this so that the single
+        SCHEDULE row is locked for two statements rather than for the whole
+        booking, which would serialize every booking on PostgreSQL.
+        """
+        using, class_ids = self.write_db, list(class_ids)
+
+        def stamp():
+            with transaction.atomic(using=using):
+                self.model.objects.using(using).stamp(class_ids)
+        transaction.on_commit(stamp, using=using)
+
+    def reserve(self, class_id, seats=1):
+        """
+        Take `seats` slots from a class in one conditional UPDATE.
+
+        Returns True when the class had room. The row lock is held only for
+        the statement itself and the `available_slots >= seats` guard makes
+        overbooking impossible without select_for_update, which SQLite
+        ignores anyway.
+        """
+        updated = self.filter(pk=class_id, available_slots__gte=seats).update(
+            available_slots=models.F('available_slots') - seats
+        )
+        if updated:
+            self.stamp_on_commit([class_id])
+        return updated == 1
+
+    def reserve_many(self, seats_by_class):
+        """
+        Take seats from several classes at once; `seats_by_class` maps a
+        class id to the number of seats wanted. Returns the ids that got
+        their seats.
+
+        When every class has room this is one UPDATE with a CASE per class.
+        If any class is short (or missing) that statement is rolled back to
+        a savepoint and the classes are reserved one by one instead, so the
+        caller still learns exactly which ones succeeded.
+        """
+        if not seats_by_class:
+            return set()
+        wanted = models.Case(
+            *(models.When(pk=pk, then=models.Value(seats)) for pk, seats in seats_by_class.items()),
+            output_field=models.PositiveIntegerField(),
+        )
+        try:
+            with transaction.atomic(using=self.write_db):
+                updated = self.filter(pk__in=list(seats_by_class), available_slots__gte=wanted).update(
+                    available_slots=models.F('available_slots') - wanted
+                )
+                if updated != len(seats_by_class):
+                    raise _PartialReservation
+        except _PartialReservation:
+            return {pk for pk, seats in seats_by_class.items() if self.reserve(pk, seats)}
+        self.stamp_on_commit(seats_by_class)
+        return set(seats_by_class)
+
+    def release(self, class_id, seats=1):
+        """Give `seats` slots back to a class, never past total_slots."""
+        updated = self.filter(
+            pk=class_id, available_slots__lte=models.F('total_slots') - seats
+        ).update(available_slots=models.F('available_slots') + seats)
+        if updated:
+            self.stamp_on_commit([class_id])
+        return updated == 1
+
+    def next_waitlist_position(self, class_id):
+        """
+        Hand out the next waitlist position for a full class, or None when
+        the class does not exist or still has open slots.
+
+        The counter is bumped with an UPDATE before it is read, so the row
+        (or, on SQLite, the database) is write-locked and concurrent joins
+        can never be given the same position.
+        """
+        updated = self.filter(pk=class_id, available_slots=0).update(
+            waitlist_tail=models.F('waitlist_tail') + 1
+        )
+        if not updated:
+            return None
+        return self.filter(pk=class_id).values_list('waitlist_tail', flat=True).get()
+
+    def conflicts(self, classes):
+        """
+        The clashes (see studio.scheduling) that `classes`, new or edited
+        instances, have with each other or with the classes already
+        scheduled. Clashes between two existing classes are left out.
+
+        Existing classes are read from the primary with a range scan of
+        class_instructor_idx and one of class_room_idx, over the window from
+        MAX_CLASS_MINUTES before the first start to the last end, then swept
+        together with `classes` in memory.
+        """
+        classes = list(classes)
+        if not classes:
+            return []
+        window = self.using(self.write_db).filter(
+            date_time__gt=min(item.date_time for item in classes) - timedelta(minutes=MAX_CLASS_MINUTES),
+            date_time__lt=max(class_end(item) for item in classes),
+        ).exclude(pk__in=[item.pk for item in classes if item.pk is not None])
+        existing = {item.pk: item for item in window.filter(instructor__in={item.instructor for item in classes})}
+        rooms = {item.room for item in classes if item.room}
+        if rooms:
+            existing.update((item.pk, item) for item in window.filter(room__in=rooms))
+        checked = {id(item) for item in classes}
+        return [
+            clash for clash in find_clashes([*classes, *existing.values()])
+            if id(clash.first) in checked or id(clash.second) in checked
+        ]
+
+
+class _PartialReservation(Exception):
+    pass
+
+
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def validate_weekdays(value):
+    days = [day.strip().lower() for day in value.split(',') if day.strip()]
+    if not days or any(day not in WEEKDAYS for day in days):
+        raise ValidationError('Use comma-separated weekdays, e.g. "mon,wed,fri".')
+
+
+def validate_timezone(value):
+    if not is_timezone(value):
+        raise ValidationError(f'Unknown timezone: {value}')
+
+
+class ClassSeries(models.Model):
+    """
+    A weekly recurring class. `materialize_classes` expands it into
+    FitnessClass rows over a rolling horizon; materialized_until records
+    how far it has got, so each run only inserts the new days.
+    """
+    name = models.CharField(max_length=100)
+    instructor = models.CharField(max_length=100)
+    total_slots = models.PositiveIntegerField()
+    weekdays = models.CharField(max_length=27, validators=[validate_weekdays], help_text='e.g. "mon,wed,fri"')
+    start_time = models.TimeField(help_text='Wall-clock time in the series timezone')
+    timezone = models.CharField(max_length=64, default='UTC', validators=[validate_timezone])
+    interval_weeks = models.PositiveSmallIntegerField(
+        default=1, validators=[MinValueValidator(1), MaxValueValidator(52)], help_text='1 = every week'
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name_plural = 'class series'
+
+    def __str__(self):
+        return f'{self.name} ({self.weekdays} {self.start_time:%H:%M} {self.timezone})'
+
+    def occurrences(self, first, last):
+        """Aware start datetimes of the occurrences on days first..last."""
+        first = max(first, self.start_date)
+        if self.end_date:
+            last = min(last, self.end_date)
+        # zoneinfo rather than pytz.localize: same DST handling, a fraction
+        # of the cost per occurrence.
+        tz = ZoneInfo(self.timezone)
+        days = {WEEKDAYS.index(day.strip().lower()) for day in self.weekdays.split(',') if day.strip()}
+        week_zero = self.start_date - timedelta(days=self.start_date.weekday())
+        day = first
+        while day <= last:
+            if day.weekday() in days and ((day - week_zero).days // 7) % self.interval_weeks == 0:
+                yield datetime.combine(day, self.start_time, tzinfo=tz)
+            day += timedelta(days=1)
+
+    def materialize(self, until, chunk_size=1000, today=None, resume=True):
+        """
+        Create the FitnessClass rows from today up to and including `until`,
+        starting after materialized_until unless `resume` is off. Rows are
+        inserted with bulk_create in chunks. Occurrences that already exist
+        are found with one range scan of the (series, date_time) unique index
+        and never built; ignore_conflicts covers a concurrent run inserting
+        the same rows. Returns the number created.
+
+        Each chunk is checked for instructor clashes with the schedule (and
+        the chunks before it) the way import_classes checks its batches. The
+        first clash raises ValidationError and nothing from this run is kept.
+        """
+        first = max(self.start_date, today or localdate())
+        if resume and self.materialized_until and self.materialized_until >= first:
+            first = self.materialized_until + timedelta(days=1)
+        if first > until:
+            return 0
+
+        tz = ZoneInfo(self.timezone)
+        # Counted and compared on the primary, like conflicts(): outside a
+        # pinned request a replica may not have the rows inserted below.
+        series_classes = FitnessClass.objects.db_manager(router.db_for_write(FitnessClass)).filter(series=self)
+        before = series_classes.count()
+        existing = set(series_classes.filter(
+            date_time__gte=datetime.combine(first, time.min, tzinfo=tz),
+            date_time__lte=datetime.combine(until, time.max, tzinfo=tz),
+        ).values_list('date_time', flat=True))
+
+        def insert(chunk):
+            clashes = FitnessClass.objects.conflicts(chunk)
+            if clashes:
+                raise ValidationError(f'{self}: {clashes[0]}')
+            FitnessClass.objects.bulk_create(chunk, ignore_conflicts=True)
+
+        with transaction.atomic(using=series_classes.write_db):
+            chunk, days = [], set()
+            for starts in self.occurrences(first, until):
+                if starts in existing:
+                    continue
+                days.add(localtime(starts).date())
+                chunk.append(FitnessClass(
+                    series=self, name=self.name, instructor=self.instructor, date_time=starts,
+                    total_slots=self.total_slots, available_slots=self.total_slots,
+                ))
+                if len(chunk) >= chunk_size:
+                    insert(chunk)
+                    chunk = []
+            if chunk:
+                insert(chunk)
+            created = series_classes.count() - before
+
+            if created:
+                # bulk_create skips save signals: stamp for ?since= and the stream.
+                series_classes.filter(version=0).stamp()
+                OccupancyRollup.objects.refresh({(day, self.instructor) for day in days})
+            ClassSeries.objects.filter(pk=self.pk).update(materialized_until=until)
+        self.materialized_until = until
+        return created
+
 
 class FitnessClass(models.Model):
     name = models.CharField(max_length=100)
     date_time = models.DateTimeField()
+    duration = models.PositiveSmallIntegerField(
+        default=60, validators=[MinValueValidator(1), MaxValueValidator(MAX_CLASS_MINUTES)], help_text='Minutes'
+    )
     instructor = models.CharField(max_length=100)
+    room = models.CharField(max_length=100, blank=True)
     total_slots = models.PositiveIntegerField()
     available_slots = models.PositiveIntegerField()
+    # Last waitlist position handed out; positions only ever grow.
+    waitlist_tail = models.PositiveIntegerField(default=0, editable=False)
+    # SCHEDULE version of the last change to this class.
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Set for classes materialized from a ClassSeries; indexed through
+    # class_series_occurrence_uniq.
+    series = models.ForeignKey(
+        ClassSeries, on_delete=models.SET_NULL, null=True, blank=True, db_index=False, related_name='classes'
+    )
+
+    objects = FitnessClassQuerySet.as_manager()
+
     class Meta:
         ordering = ['date_time']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(available_slots__gte=0),
+                name='class_available_slots_non_negative',
+            ),
+            models.UniqueConstraint(
+                fields=['series', 'date_time'],
+                condition=models.Q(series__isnull=False),
+                name='class_series_occurrence_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date_time', 'id'], name='class_schedule_idx'),
+            models.Index(fields=['instructor', 'date_time', 'id'], name='class_instructor_idx'),
+            models.Index(fields=['room', 'date_time'], name='class_room_idx'),
+            models.Index(
+                fields=['date_time', 'id'],
+                condition=models.Q(available_slots__gt=0),
+                name='class_open_slots_idx',
+            ),
+            models.Index(fields=['version'], name='class_version_idx'),
+        ]
+
+    def clean(self):
+        # Fields that failed their own validation are not set; skip the check then.
+        if self.date_time is None or self.duration is None or not self.instructor:
+            return
+        clashes = FitnessClass.objects.conflicts([self])
+        if clashes:
+            raise ValidationError(str(clashes[0]))
+
+
 class Booking(models.Model):
-    fitness_class = models.ForeignKey(FitnessClass, on_delete=models.CASCADE)
+    # Indexed through booking_class_user_uniq below, so no separate FK index.
+    fitness_class = models.ForeignKey(FitnessClass, on_delete=models.CASCADE, db_index=False)
+    # Indexed through booking_user_recent_idx below, so no separate FK index.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name='bookings',
+    )
     client_name = models.CharField(max_length=100)
     client_email = models.EmailField()
     booked_at = models.DateTimeField(auto_now_add=True)
     class Meta:
         ordering = ['-booked_at']
+        constraints = [
+            # One booking per user and class: a retried request fails here
+            # instead of taking a second seat. Bookings without a user
+            # (NULL) never collide.
+            models.UniqueConstraint(fields=['fitness_class', 'user'], name='booking_class_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-booked_at'], name='booking_user_recent_idx'),
+        ]
+
+
+class WaitlistQuerySet(StudioQuerySet):
+    def promote(self, class_id):
+        """
+        Turn the head of a class's waitlist into a Booking, handing it the
+        seat that was just freed. Returns the booking, or None when nobody
+        is waiting.
+
+        The head is one seek on waitlist_class_position_uniq. Deleting it by
+        pk and checking the row count means two concurrent promotions can
+        never hand the same entry a seat; the loser moves on to the next one.
+        So does an entry whose user already holds a booking for the class.
+        """
+        while True:
+            head = (
+                self.filter(fitness_class_id=class_id)
+                .order_by('position')
+                .only('id', 'user_id', 'client_name', 'client_email')
+                .first()
+            )
+            if head is None:
+                return None
+            deleted, _ = self.filter(pk=head.pk).delete()
+            if not deleted:
+                continue
+            try:
+                with transaction.atomic(using=self.write_db):
+                    booking = Booking.objects.create(
+                        fitness_class_id=class_id,
+                        user_id=head.user_id,
+                        client_name=head.client_name,
+                        client_email=head.client_email,
+                    )
+            except IntegrityError:
+                # Booked the class some other way while waiting: the entry
+                # is spent, the seat goes to the next one.
+                continue
+            return booking
+
+
+class Waitlist(models.Model):
+    # Both FKs lead one of the unique indexes below, so neither needs its own.
+    fitness_class = models.ForeignKey(
+        FitnessClass, on_delete=models.CASCADE, db_index=False, related_name='waitlist'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='waitlist_entries',
+    )
+    position = models.PositiveIntegerField()
+    client_name = models.CharField(max_length=100)
+    client_email = models.EmailField()
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    objects = WaitlistQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['fitness_class', 'position']
+        constraints = [
+            # FIFO order per class; also the index promotion seeks on.
+            models.UniqueConstraint(fields=['fitness_class', 'position'], name='waitlist_class_position_uniq'),
+            models.UniqueConstraint(fields=['user', 'fitness_class'], name='waitlist_class_user_uniq'),
+        ]
+
+
+def rollup_key(date_time, instructor):
+    """The OccupancyRollup row a class starting at `date_time` counts towards."""
+    return localtime(date_time).date(), instructor
+
+
+def day_window(first, last):
+    """Aware [start, end) datetimes covering the studio days first..last."""
+    return (
+        make_aware(datetime.combine(first, time.min)),
+        make_aware(datetime.combine(last + timedelta(days=1), time.min)),
+    )
+
+
+class OccupancyRollupQuerySet(StudioQuerySet):
+    def computed(self, classes):
+        """
+        Aggregate `classes` (a FitnessClass queryset) from scratch into
+        {(day, instructor): (classes, capacity, booked)}. Bookings are
+        counted rather than derived from available_slots, so this is the
+        ground truth the counters are checked against.
+        """
+        totals = {
+            (row['day'], row['instructor']): [row['classes'], row['capacity'], 0]
+            for row in classes.order_by().values('instructor', day=TruncDate('date_time')).annotate(
+                classes=models.Count('id'), capacity=models.Sum('total_slots'),
+            )
+        }
+        booked = (
+            Booking.objects.using(classes.db).filter(fitness_class__in=classes).order_by()
+            .values(day=TruncDate('fitness_class__date_time'), instructor=models.F('fitness_class__instructor'))
+            .annotate(booked=models.Count('id'))
+        )
+        for row in booked:
+            totals[row['day'], row['instructor']][2] = row['booked']
+        return {key: tuple(values) for key, values in totals.items()}
+
+    def refresh(self, keys):
+        """
+        Recompute the rows for `keys` ((day, instructor) pairs) from the
+        classes and bookings behind them, deleting rows whose classes are
+        all gone. Call it in the transaction that changed the classes.
+        """
+        instructors_by_day = {}
+        for day, instructor in keys:
+            instructors_by_day.setdefault(day, set()).add(instructor)
+        if not instructors_by_day:
+            return
+        classes = FitnessClass.objects.using(self.write_db)
+        days = sorted(instructors_by_day)
+        # One range per day keeps the WHERE clause shallow; SQLite caps expression depth.
+        for first in range(0, len(days), 100):
+            chunk = days[first:first + 100]
+            window = models.Q()
+            for day in chunk:
+                start, end = day_window(day, day)
+                window |= models.Q(date_time__gte=start, date_time__lt=end, instructor__in=instructors_by_day[day])
+            found = self.computed(classes.filter(window))
+            self.store({
+                (day, instructor): found.get((day, instructor))
+                for day in chunk for instructor in instructors_by_day[day]
+            })
+
+    def store(self, values):
+        """
+        Write {(day, instructor): (classes, capacity, booked)}, inserting or
+        updating each row; a value of None deletes the row.
+        """
+        rows, emptied = [], {}
+        for (day, instructor), value in values.items():
+            if value is None:
+                emptied.setdefault(day, []).append(instructor)
+            else:
+                count, capacity, booked = value
+                rows.append(OccupancyRollup(day=day, instructor=instructor, classes=count, capacity=capacity, booked=booked))
+        rollups = self.using(self.write_db)
+        rollups.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['day', 'instructor'],
+            update_fields=['classes', 'capacity', 'booked'],
+            batch_size=500,
+        )
+        days = sorted(emptied)
+        for first in range(0, len(days), 100):
+            gone = models.Q()
+            for day in days[first:first + 100]:
+                gone |= models.Q(day=day, instructor__in=emptied[day])
+            rollups.filter(gone).delete()
+
+    def count_bookings(self, changes):
+        """
+        Apply booking changes to the counters: `changes` holds
+        (date_time, instructor, seats) per class, seats negative for
+        cancellations. One UPDATE per row; a row that does not exist yet
+        is recomputed instead. Call it in the booking's transaction.
+        """
+        seats_by_key = {}
+        for date_time, instructor, seats in changes:
+            key = rollup_key(date_time, instructor)
+            seats_by_key[key] = seats_by_key.get(key, 0) + seats
+        rollups = self.using(self.write_db)
+        missing = [
+            (day, instructor) for (day, instructor), seats in seats_by_key.items()
+            if seats and not rollups.filter(day=day, instructor=instructor).update(booked=models.F('booked') + seats)
+        ]
+        self.refresh(missing)
+
+
+class OccupancyRollup(models.Model):
+    """
+    Classes, seats and bookings per studio day (TIME_ZONE) and instructor,
+    behind /api/analytics. Booking views move `booked` in their own
+    transaction, class edits refresh the rows they touch, and
+    `manage.py rollup_occupancy` rebuilds or checks them against a full
+    recompute.
+    """
+    day = models.DateField()
+    instructor = models.CharField(max_length=100)
+    classes = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(default=0)
+    booked = models.PositiveIntegerField(default=0)
+
+    objects = OccupancyRollupQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also the index date-range queries scan.
+            models.UniqueConstraint(fields=['day', 'instructor'], name='rollup_day_instructor_uniq'),
+        ]
+
+
+class IdempotencyKeyQuerySet(StudioQuerySet):
+    def live(self, ttl):
+        """Records younger than `ttl` seconds; older ones are never replayed."""
+        return self.filter(created_at__gt=now() - timedelta(seconds=ttl))
+
+    def purge(self, ttl):
+        """Delete the records older than `ttl` seconds. Returns how many went."""
+        deleted, _ = self.filter(created_at__lte=now() - timedelta(seconds=ttl)).delete()
+        return deleted
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response a POST sent with an Idempotency-Key header produced, kept
+    so retries of it get the same response back (see studio/idempotency.py).
+    Written in the request's own transaction.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False, related_name='+')
+    key = models.CharField(max_length=255)
+    # Digest of the request the key was first used for.
+    fingerprint = models.CharField(max_length=32)
+    status_code = models.PositiveSmallIntegerField()
+    body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also the index replay lookups seek on.
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
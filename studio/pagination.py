@@ -0,0 +1,119 @@
+# studio/pagination.py
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ScheduleCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date_time, id).
+
+    The cursor holds the sort key of the last row on the previous page, so
+    every page is a single index range scan of `page_size + 1` rows no matter
+    how deep the client has scrolled (no OFFSET).
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            stamp, pk = json.loads(raw)
+            date_time = parse_datetime(stamp)
+            # Cursors we issue always carry an offset; a naive one cannot be
+            # compared with the aware start times, so it is as bad as garbage.
+            if date_time is None or is_naive(date_time):
+                raise ValueError(stamp)
+            return date_time, int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, date_time, pk):
+        raw = json.dumps([date_time.isoformat(), pk])
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the lazy, sliced queryset for the requested page. It fetches
+        one extra row so we know whether a next page exists.
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by('date_time', 'id')
+        if cursor is not None:
+            date_time, pk = cursor
+            # The leading `>=` is redundant logically but gives the planner a
+            # plain range on the (date_time, id) index to seek into.
+            queryset = queryset.filter(date_time__gte=date_time).filter(
+                Q(date_time__gt=date_time) | Q(id__gt=pk)
+            )
+        return queryset[:self.page_size_value + 1]
+
+    def paginate_rows(self, rows):
+        rows = list(rows)
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.page = rows
+        self.last_key = self._row_key(rows[-1]) if rows else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(self.get_page_queryset(queryset, request))
+
+    def get_next_cursor(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(*self.last_key)
+
+    def link_for(self, request, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self.link_for(self.request, self.get_next_cursor())
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    @staticmethod
+    def _row_key(row):
+        if isinstance(row, dict):
+            return row['date_time'], row['id']
+        return row.date_time, row.id
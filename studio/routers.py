@@ -0,0 +1,87 @@
+# studio/routers.py
+"""
+Primary/replica routing for the studio tables.
+
+Reads of studio models (classes, bookings) go to a random database from
+settings.STUDIO_READ_REPLICAS; everything else, and every write, stays on
+`default`. A request is pinned to the primary when it is itself a write
+(POST/PUT/PATCH/DELETE) or when the same token wrote within the last
+STUDIO_REPLICA_PIN_SECONDS, so users always read their own bookings.
+Pins are kept in the default cache, which must be shared by all workers
+(studio.checks enforces this when replicas are configured).
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_primary = ContextVar('studio_use_primary', default=False)
+
+
+class PrimaryReplicaRouter:
+    route_app_labels = {'studio'}
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'STUDIO_READ_REPLICAS', [])
+        if not replicas or _use_primary.get() or model._meta.app_label not in self.route_app_labels:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+def _pin_key(request):
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth:
+        return None
+    return 'studio:pin:' + hashlib.sha256(auth.encode()).hexdigest()[:32]
+
+
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = _pin_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and cache.get(key))
+        token = _use_primary.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if self._wrote(request, response, key):
+            cache.set(key, True, getattr(settings, 'STUDIO_REPLICA_PIN_SECONDS', 5))
+        return response
+
+    async def __acall__(self, request):
+        key = _pin_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and await cache.aget(key))
+        token = _use_primary.set(pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if self._wrote(request, response, key):
+            await cache.aset(key, True, getattr(settings, 'STUDIO_REPLICA_PIN_SECONDS', 5))
+        return response
+
+    @staticmethod
+    def _wrote(request, response, key):
+        return bool(key) and request.method not in SAFE_METHODS and response.status_code < 400
@@ -0,0 +1,73 @@
+"""
+Instructor and room double-booking checks.
+
+A class occupies [date_time, date_time + duration). Two classes clash when
+they share an instructor, or a room, and those intervals overlap; classes
+back to back (one ends the minute the next starts) do not clash.
+
+`find_clashes` sorts each instructor's and room's classes by start time and
+sweeps them once, so checking a whole import costs O(n log n), plus one step
+per clash found, instead of comparing every pair. The database side (which
+existing classes to sweep against) is FitnessClassQuerySet.conflicts.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta, timezone
+
+
+def class_end(fitness_class):
+    return fitness_class.date_time + timedelta(minutes=fitness_class.duration)
+
+
+def resources(fitness_class):
+    """The (kind, name) pairs a class occupies while it runs."""
+    yield 'instructor', fitness_class.instructor
+    if fitness_class.room:
+        yield 'room', fitness_class.room
+
+
+class Clash:
+    def __init__(self, kind, name, first, second):
+        self.kind = kind
+        self.name = name
+        # `first` starts no later than `second`.
+        self.first = first
+        self.second = second
+
+    def __str__(self):
+        return (
+            f'{self.kind} {self.name!r} is double-booked: {_describe(self.first)} '
+            f'overlaps {_describe(self.second)}'
+        )
+
+
+def _describe(fitness_class):
+    start = fitness_class.date_time.astimezone(timezone.utc)
+    end = class_end(fitness_class).astimezone(timezone.utc)
+    label = f'{fitness_class.name!r} {start:%Y-%m-%d %H:%M}-{end:%H:%M} UTC'
+    return f'{label} (class {fitness_class.pk})' if fitness_class.pk else label
+
+
+def find_clashes(classes):
+    """
+    Yield a Clash for every pair of `classes` that share an instructor or a
+    room and overlap in time.
+
+    Each resource's classes are swept in start order, keeping a heap (by
+    end time) of the ones still running: a class clashes with whatever is
+    left on the heap once the classes that ended by its start are popped.
+    """
+    by_resource = defaultdict(list)
+    for fitness_class in classes:
+        for resource in resources(fitness_class):
+            by_resource[resource].append(fitness_class)
+
+    for (kind, name), booked in by_resource.items():
+        booked.sort(key=lambda item: item.date_time)
+        running = []
+        for order, fitness_class in enumerate(booked):
+            while running and running[0][0] <= fitness_class.date_time:
+                heapq.heappop(running)
+            for _, _, earlier in running:
+                yield Clash(kind, name, earlier, fitness_class)
+            heapq.heappush(running, (class_end(fitness_class), order, fitness_class))
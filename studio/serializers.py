@@ -1,25 +1,32 @@
+import json
+from datetime import timezone
+from itertools import islice
+
+from django.db.models import F
 from rest_framework import serializers
+from .metrics import timed_serialization
 from .models import FitnessClass, Booking
-import pytz
+from .timezones import local_iso
+from .utils import resolve_timezone
+
+
+def context_timezone(context):
+    """The tz resolved by the view, or resolved here for callers that skipped it."""
+    if 'tz' not in context:
+        request = context.get('request')
+        context['tz'] = resolve_timezone(request.query_params.get('timezone') if request else None)
+    return context['tz']
+
 
 class FitnessClassSerializer(serializers.ModelSerializer):
     date_time = serializers.SerializerMethodField()
 
     class Meta:
         model = FitnessClass
-        fields = ['id', 'name', 'date_time', 'instructor', 'total_slots', 'available_slots']
+        fields = ['id', 'name', 'date_time', 'duration', 'instructor', 'room', 'total_slots', 'available_slots']
 
     def get_date_time(self, obj):
-        request=self.context.get('request')
-        tz_name=request.query_params.get('timezone') if request else None
-        try:
-            if tz_name in pytz.all_timezones:
-                user_tz = pytz.timezone(tz_name)
-                return obj.date_time.astimezone(user_tz).isoformat()
-        except Exception:
-            pass
-        
-        return obj.date_time.astimezone(pytz.UTC).isoformat()    
+        return local_iso(obj.date_time, context_timezone(self.context))
 
 class BookingSerializer(serializers.ModelSerializer):
     class_id = serializers.PrimaryKeyRelatedField(
@@ -31,20 +38,111 @@ class BookingSerializer(serializers.ModelSerializer):
     date_time = serializers.SerializerMethodField()
 
     def get_date_time(self, obj):
-        request=self.context.get('request')
-        tz_name=request.query_params.get('timezone') if request else None
-        try:
-            if tz_name in pytz.all_timezones:
-                user_tz = pytz.timezone(tz_name)
-                return obj.fitness_class.date_time.astimezone(user_tz).isoformat()
-        except Exception:
-            pass
-        
-        return obj.fitness_class.date_time.astimezone(pytz.UTC).isoformat()
+        return local_iso(obj.fitness_class.date_time, context_timezone(self.context))
 
 
     class Meta:
         model = Booking
         fields = ['id', 'class_id', 'class_name', 'date_time', 'client_name', 'client_email']
 
-    
+
+# ------------------ Fast list serialization ------------------
+#
+# The list endpoints render thousands of rows with no validation, so they
+# skip model instances and DRF fields entirely: rows come straight from
+# `.values()` and are shaped into the same JSON the serializers above emit.
+
+CLASS_VALUES = ('id', 'name', 'date_time', 'duration', 'instructor', 'room', 'total_slots', 'available_slots')
+
+
+def class_values(queryset):
+    return queryset.values(*CLASS_VALUES)
+
+
+def booking_values(queryset):
+    return queryset.values(
+        'id', 'client_name', 'client_email',
+        class_name=F('fitness_class__name'),
+        class_date_time=F('fitness_class__date_time'),
+    )
+
+
+@timed_serialization
+def serialize_class_rows(rows, tz=timezone.utc):
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'date_time': local_iso(row['date_time'], tz),
+            'duration': row['duration'],
+            'instructor': row['instructor'],
+            'room': row['room'],
+            'total_slots': row['total_slots'],
+            'available_slots': row['available_slots'],
+        }
+        for row in rows
+    ]
+
+
+@timed_serialization
+def serialize_booking_rows(rows, tz=timezone.utc):
+    return [
+        {
+            'id': row['id'],
+            'class_name': row['class_name'],
+            'date_time': local_iso(row['class_date_time'], tz),
+            'client_name': row['client_name'],
+            'client_email': row['client_email'],
+        }
+        for row in rows
+    ]
+
+
+# ------------------ Streamed lists ------------------
+#
+# For histories too large to hold in memory: rows are fetched, serialized
+# and encoded a batch at a time, so a response only ever holds one batch.
+
+STREAM_CONTENT_TYPES = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+# Same compact encoding as DRF's JSONRenderer.
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _encode_batch(items, fmt, first):
+    if fmt == 'ndjson':
+        return ''.join(_dumps(item) + '\n' for item in items)
+    body = ','.join(map(_dumps, items))
+    return body if first else ',' + body
+
+
+def stream_rows(rows, serialize, fmt, batch_size=500):
+    """Encode `rows` (any iterator) as a JSON array or NDJSON, one chunk per batch."""
+    rows = iter(rows)
+    if fmt == 'json':
+        yield '['
+    first = True
+    while batch := list(islice(rows, batch_size)):
+        yield _encode_batch(serialize(batch), fmt, first)
+        first = False
+    if fmt == 'json':
+        yield ']'
+
+
+async def astream_rows(rows, serialize, fmt, batch_size=500):
+    """stream_rows for an async iterator such as QuerySet.aiterator()."""
+    if fmt == 'json':
+        yield '['
+    first = True
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _encode_batch(serialize(batch), fmt, first)
+            first = False
+            batch = []
+    if batch:
+        yield _encode_batch(serialize(batch), fmt, first)
+    if fmt == 'json':
+        yield ']'
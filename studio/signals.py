@@ -0,0 +1,110 @@
+# studio/signals.py
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_user_tokens, token_cache
+from .cache import schedule_cache
+from .metrics import query_timer
+from .models import (
+    CATALOG,
+    SCHEDULE,
+    Booking,
+    FitnessClass,
+    ListVersion,
+    OccupancyRollup,
+    bookings_version_key,
+    rollup_key,
+)
+
+
+@receiver(post_save, sender=FitnessClass)
+@receiver(post_delete, sender=FitnessClass)
+def invalidate_schedule_cache(sender, instance, update_fields=None, **kwargs):
+    # Bookings patch the cached slot count themselves; any other edit
+    # (admin, imports) can move a class between pages, so drop everything.
+    if update_fields is not None and set(update_fields) == {'available_slots'}:
+        return
+    schedule_cache.clear()
+
+
+@receiver(post_save, sender=FitnessClass)
+def stamp_saved_class(sender, instance, using, update_fields=None, **kwargs):
+    # Admin and script edits reach the list ETags and ?since= deltas here;
+    # the booking paths stamp through FitnessClassQuerySet themselves.
+    FitnessClass.objects.using(using).stamp([instance.pk])
+    # Bookings show the class name and time; a new class has no bookings yet.
+    old = getattr(instance, '_old_listing', None)
+    if old is not None and old != (instance.name, instance.date_time):
+        ListVersion.objects.using(using).bump(CATALOG)
+
+
+@receiver(post_delete, sender=FitnessClass)
+def bump_for_deleted_class(sender, instance, using, **kwargs):
+    ListVersion.objects.using(using).bump(SCHEDULE)
+    ListVersion.objects.using(using).bump(CATALOG)
+
+
+@receiver(pre_save, sender=FitnessClass)
+def remember_old_fields(sender, instance, using, update_fields=None, **kwargs):
+    # An edit can move a class to another day or instructor; the rollup it
+    # leaves needs refreshing as well as the one it joins. The old name and
+    # time tell stamp_saved_class whether booking lists changed.
+    instance._old_rollup_key = instance._old_listing = None
+    if instance.pk is not None and (update_fields is None or set(update_fields) != {'available_slots'}):
+        old = FitnessClass.objects.using(using).filter(pk=instance.pk).values_list(
+            'name', 'date_time', 'instructor'
+        ).first()
+        if old:
+            instance._old_rollup_key = rollup_key(*old[1:])
+            instance._old_listing = old[:2]
+
+
+@receiver(post_save, sender=FitnessClass)
+@receiver(post_delete, sender=FitnessClass)
+def refresh_class_rollup(sender, instance, using, update_fields=None, **kwargs):
+    # Bulk writes (imports, series) refresh their own keys; bookings only move counters.
+    if update_fields is not None and set(update_fields) == {'available_slots'}:
+        return
+    keys = {rollup_key(instance.date_time, instance.instructor), getattr(instance, '_old_rollup_key', None)}
+    OccupancyRollup.objects.using(using).refresh(keys - {None})
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_owner(sender, instance, using, **kwargs):
+    # An admin edit can hand a booking to another user; both lists change.
+    instance._old_user_id = None
+    if not instance._state.adding:
+        instance._old_user_id = Booking.objects.using(using).filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_owner_bookings(sender, instance, using, **kwargs):
+    # Single-row writes (views, the waitlist, admin) reach the /api/bookings
+    # ETags here; bulk_create skips signals, so bulk booking bumps its own.
+    owners = {instance.user_id, getattr(instance, '_old_user_id', None)} - {None}
+    for user_id in sorted(owners):
+        ListVersion.objects.using(using).bump(bookings_version_key(user_id))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, created=False, **kwargs):
+    if not created:
+        forget_user_tokens(instance.pk)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    # Installed once per connection rather than per request: async views run
+    # their queries on other threads, each with its own connection.
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
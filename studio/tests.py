@@ -1,12 +1,41 @@
-from datetime import datetime
+import base64
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from io import StringIO
 
-from django.test import TestCase
+import pytz
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import F
+from django.forms import modelform_factory
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.utils.timezone import make_aware
+from django.utils.timezone import localdate, now
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 
-from .models import FitnessClass, Booking
+from . import async_views
+from .authentication import token_cache
+from .cache import ScheduleCache, schedule_cache
+from .checks import check_replica_pin_cache
+from .events import RESET, SlotBroker, Subscription
+from .logs import AsyncRotatingFileHandler, SamplingFilter, log_event
+from .metrics import request_metrics
+from .models import SCHEDULE, ClassSeries, FitnessClass, Booking, IdempotencyKey, ListVersion, OccupancyRollup, Waitlist
+from .routers import ReplicaPinningMiddleware
+from .serializers import BookingSerializer, booking_values, serialize_booking_rows, stream_rows
+from .sqlite import serialized_write, tuned_options
+from .timezones import get_timezone, local_iso
 
 
 class BookingAPITestCase(TestCase):
@@ -24,7 +53,7 @@ class BookingAPITestCase(TestCase):
         # ── test fitness class ──────────────────────────────────────────
         self.fitness_class = FitnessClass.objects.create(
             name="Test Yoga",
-            date_time=make_aware(datetime(2025, 6, 25, 10, 0)),
+            date_time=now().replace(microsecond=0) + timedelta(days=1),
             instructor="Test Instructor",
             total_slots=5,
             available_slots=5
@@ -37,7 +66,79 @@ class BookingAPITestCase(TestCase):
         url = "/api/classes?email=faris@example.com"
         response = self.client.get(url, **self.auth)
         self.assertEqual(response.status_code, 200)
-        self.assertIn("name", response.json()[0])
+        self.assertIn("name", response.json()["results"][0])
+
+    def test_get_classes_cursor_pagination(self):
+        for i in range(4):
+            FitnessClass.objects.create(
+                name=f"Spin {i}",
+                date_time=self.fitness_class.date_time,
+                instructor="Test Instructor",
+                total_slots=5,
+                available_slots=5
+            )
+        seen = []
+        url = "/api/classes?email=faris@example.com&page_size=2"
+        while url:
+            body = self.client.get(url, **self.auth).json()
+            self.assertLessEqual(len(body["results"]), 2)
+            seen.extend(row["id"] for row in body["results"])
+            url = body["next"]
+        self.assertEqual(seen, sorted(FitnessClass.objects.values_list("id", flat=True)))
+
+    def test_get_classes_invalid_cursor(self):
+        response = self.client.get("/api/classes?email=faris@example.com&cursor=bogus", **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+        naive = base64.urlsafe_b64encode(json.dumps(["2030-01-01T09:00:00", 1]).encode()).decode()
+        response = self.client.get(f"/api/classes?email=faris@example.com&cursor={naive}", **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_classes_filters(self):
+        FitnessClass.objects.create(
+            name="Full Zumba",
+            date_time=self.fitness_class.date_time + timedelta(days=2),
+            instructor="Other Instructor",
+            total_slots=5,
+            available_slots=0
+        )
+        base = "/api/classes?email=faris@example.com"
+
+        body = self.client.get(f"{base}&instructor=Other%20Instructor", **self.auth).json()
+        self.assertEqual([row["name"] for row in body["results"]], ["Full Zumba"])
+
+        body = self.client.get(f"{base}&has_slots=true", **self.auth).json()
+        self.assertEqual([row["name"] for row in body["results"]], ["Test Yoga"])
+
+        day = (self.fitness_class.date_time + timedelta(days=2)).date().isoformat()
+        body = self.client.get(f"{base}&date_from={day}&date_to={day}", **self.auth).json()
+        self.assertEqual([row["name"] for row in body["results"]], ["Full Zumba"])
+
+        response = self.client.get(f"{base}&date_from=tomorrow", **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_classes_served_from_schedule_cache(self):
+        schedule_cache.entries.reset_stats()
+        url = "/api/classes?email=faris@example.com"
+        first = self.client.get(url, **self.auth).json()
+        second = self.client.get(url, **self.auth).json()
+        self.assertEqual(first, second)
+        self.assertEqual(schedule_cache.stats()["hits"], 1)
+
+    def test_booking_patches_cached_slots(self):
+        url = "/api/classes?email=faris@example.com"
+        self.client.get(url, **self.auth)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/book",
+                {"class_id": self.fitness_class.id, "client_name": "Faris"},
+                content_type="application/json",
+                **self.auth
+            )
+        schedule_cache.entries.reset_stats()
+        body = self.client.get(url, **self.auth).json()
+        self.assertEqual(schedule_cache.stats()["hits"], 1)
+        self.assertEqual(body["results"][0]["available_slots"], 4)
 
     def test_get_classes_email_mismatch(self):
         url = "/api/classes?email=someoneelse@example.com"
@@ -45,6 +146,147 @@ class BookingAPITestCase(TestCase):
         self.assertEqual(response.status_code, 403)
         self.assertIn("Email does not match token", response.json()["error"])
 
+    def test_warm_token_cache_skips_auth_queries(self):
+        url = "/api/classes?email=faris@example.com"
+        self.client.get(url, **self.auth)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_token_is_rejected_from_cache(self):
+        url = "/api/classes?email=faris@example.com"
+        self.client.get(url, **self.auth)
+        self.assertIsNotNone(token_cache.peek(self.token.key))
+        self.token.delete()
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 401)
+
+    def test_user_change_refreshes_cached_name(self):
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        self.client.get("/api/classes?email=faris@example.com", **self.auth)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        response = self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 403)
+
+    def test_async_read_views_match_sync_views(self):
+        Booking.objects.create(fitness_class=self.fitness_class, user=self.user, client_name="Faris", client_email="faris@example.com")
+        factory = RequestFactory()
+        for url, view in (
+            ("/api/classes?email=faris@example.com&timezone=Asia/Kolkata", async_views.class_list),
+            ("/api/bookings?timezone=Asia/Kolkata", async_views.user_bookings),
+        ):
+            schedule_cache.clear()
+            expected = self.client.get(url, **self.auth)
+            schedule_cache.clear()
+            response = async_to_sync(view)(factory.get(url, **self.auth))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content), expected.json())
+            self.assertEqual(response["ETag"], expected["ETag"])
+
+            not_modified = async_to_sync(view)(factory.get(url, HTTP_IF_NONE_MATCH=expected["ETag"], **self.auth))
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_async_read_views_require_token(self):
+        response = async_to_sync(async_views.user_bookings)(RequestFactory().get("/api/bookings"))
+        self.assertEqual(response.status_code, 401)
+
+    def _book(self, fitness_class):
+        payload = {"class_id": fitness_class.id, "client_name": "Faris"}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+
+    def test_classes_not_modified_until_a_booking(self):
+        url = "/api/classes?email=faris@example.com"
+        etag = self.client.get(url, **self.auth)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self._book(self.fitness_class)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["available_slots"], 4)
+
+    def test_classes_since_returns_only_changed_classes(self):
+        FitnessClass.objects.create(
+            name="Test Spin", date_time=self.fitness_class.date_time, instructor="Test Instructor",
+            total_slots=5, available_slots=5
+        )
+        url = "/api/classes?email=faris@example.com"
+        version = self.client.get(url, **self.auth)["X-Schedule-Version"]
+
+        self._book(self.fitness_class)
+        body = self.client.get(f"{url}&since={version}", **self.auth).json()
+        self.assertEqual([row["id"] for row in body["results"]], [self.fitness_class.id])
+        self.assertEqual(body["results"][0]["available_slots"], 4)
+        self.assertEqual(self.client.get(f"{url}&since={body['version']}", **self.auth).json()["results"], [])
+
+        for since in ("-1", "%C2%B2"):
+            response = self.client.get(f"{url}&since={since}", **self.auth)
+            self.assertEqual(response.status_code, 400)
+
+    def test_bookings_not_modified_until_own_booking(self):
+        etag = self.client.get("/api/bookings", **self.auth)["ETag"]
+        response = self.client.get("/api/bookings", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+        self._book(self.fitness_class)
+        response = self.client.get("/api/bookings", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_admin_class_edit_changes_bookings_etag(self):
+        self._book(self.fitness_class)
+        etag = self.client.get("/api/bookings", **self.auth)["ETag"]
+        self.fitness_class.name = "Renamed Yoga"
+        self.fitness_class.save()
+        response = self.client.get("/api/bookings", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["class_name"], "Renamed Yoga")
+
+    def test_orm_booking_changes_move_bookings_etag(self):
+        other = User.objects.create_user(username="sara@example.com", email="sara@example.com", password="x")
+        other_auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=other).key}"}
+
+        def etags():
+            return self.client.get("/api/bookings", **self.auth)["ETag"], self.client.get("/api/bookings", **other_auth)["ETag"]
+
+        before = etags()
+        booking = Booking.objects.create(
+            fitness_class=self.fitness_class, user=self.user, client_name="Faris", client_email="faris@example.com"
+        )
+        created = etags()
+        self.assertNotEqual(created[0], before[0])
+        self.assertEqual(created[1], before[1])
+
+        booking.user = other
+        booking.save()
+        moved = etags()
+        self.assertNotEqual(moved[0], created[0])
+        self.assertNotEqual(moved[1], created[1])
+
+        booking.delete()
+        self.assertNotEqual(etags()[1], moved[1])
+
+    def test_class_version_is_not_editable(self):
+        # Only stamp() moves it; a hand-edited version breaks ?since= deltas.
+        self.assertNotIn("version", modelform_factory(FitnessClass, fields="__all__").base_fields)
+
+    def test_new_class_and_capacity_edit_keep_bookings_etag(self):
+        self._book(self.fitness_class)
+        etag = self.client.get("/api/bookings", **self.auth)["ETag"]
+        FitnessClass.objects.create(
+            name="Test Spin", date_time=self.fitness_class.date_time, instructor="Test Instructor",
+            total_slots=5, available_slots=5
+        )
+        self.fitness_class.refresh_from_db()
+        self.fitness_class.total_slots = 8
+        self.fitness_class.save()
+        response = self.client.get("/api/bookings", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+
     # ─────────────────────────────────────────────────────────────────────────────
     # 2) POST /api/book  
     # ─────────────────────────────────────────────────────────────────────────────
@@ -58,6 +300,7 @@ class BookingAPITestCase(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Booking.objects.count(), 1)
         self.assertEqual(Booking.objects.first().client_email, "faris@example.com")
+        self.assertEqual(Booking.objects.first().user, self.user)
 
     def test_booking_missing_fields(self):
         url = "/api/book"
@@ -81,12 +324,216 @@ class BookingAPITestCase(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("No available slots", response.json()["error"])
 
+    def test_booking_unknown_class(self):
+        payload = {"class_id": self.fitness_class.id + 100, "client_name": "Faris"}
+        response = self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_reserve_never_goes_below_zero(self):
+        self.fitness_class.available_slots = 1
+        self.fitness_class.save()
+        self.assertTrue(FitnessClass.objects.reserve(self.fitness_class.id))
+        self.assertFalse(FitnessClass.objects.reserve(self.fitness_class.id))
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.available_slots, 0)
+
+    def test_reserve_stamps_the_schedule_after_commit(self):
+        before, = ListVersion.objects.current(SCHEDULE)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                self.assertTrue(FitnessClass.objects.reserve(self.fitness_class.id))
+            self.assertEqual(ListVersion.objects.current(SCHEDULE), [before])
+        for callback in callbacks:
+            callback()
+        after, = ListVersion.objects.current(SCHEDULE)
+        self.assertGreater(after, before)
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.version, after)
+
+    def test_duplicate_booking_conflicts(self):
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        response = self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.available_slots, 4)
+
+    def test_retried_booking_replays_first_response(self):
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        headers = {**self.auth, "HTTP_IDEMPOTENCY_KEY": "retry-1"}
+        first = self.client.post("/api/book", payload, content_type="application/json", **headers)
+        self.assertEqual(first.status_code, 201)
+        for _ in range(25):
+            with CaptureQueriesContext(connection) as ctx:
+                retry = self.client.post("/api/book", payload, content_type="application/json", **headers)
+            self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+            self.assertEqual(retry["Idempotent-Replayed"], "true")
+        # The replay is one indexed lookup; the view never runs.
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn("studio_idempotencykey", ctx.captured_queries[0]["sql"])
+        self.assertEqual(Booking.objects.count(), 1)
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.available_slots, 4)
+
+        payload["client_name"] = "Someone Else"
+        response = self.client.post("/api/book", payload, content_type="application/json", **headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_expired_idempotency_key_runs_again(self):
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        headers = {**self.auth, "HTTP_IDEMPOTENCY_KEY": "retry-1"}
+        with self.settings(STUDIO_IDEMPOTENCY={"TTL": 0}):
+            self.assertEqual(self.client.post("/api/book", payload, content_type="application/json", **headers).status_code, 201)
+            response = self.client.post("/api/book", payload, content_type="application/json", **headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 409)
+
+        response = self.client.post("/api/book", payload, content_type="application/json", **self.auth, HTTP_IDEMPOTENCY_KEY="x" * 256)
+        self.assertEqual(response.status_code, 400)
+
+    def test_negative_slots_rejected_by_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FitnessClass.objects.filter(id=self.fitness_class.id).update(available_slots=F("available_slots") - 10)
+
+    def test_bulk_booking_books_every_class(self):
+        other = FitnessClass.objects.create(
+            name="Test Spin",
+            date_time=self.fitness_class.date_time,
+            instructor="Test Instructor",
+            total_slots=5,
+            available_slots=5
+        )
+        payload = {"class_ids": [self.fitness_class.id, other.id, other.id], "client_name": "Faris"}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/book/bulk", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["booked", "booked", "failed"])
+        self.assertEqual(results[2]["error"], "You have already booked this class.")
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 2)
+        other.refresh_from_db()
+        self.assertEqual(other.available_slots, 4)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "studio_fitnessclass" SET "available_slots"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_bulk_booking_reports_per_item_failures(self):
+        full = FitnessClass.objects.create(
+            name="Full Spin",
+            date_time=self.fitness_class.date_time,
+            instructor="Test Instructor",
+            total_slots=1,
+            available_slots=0
+        )
+        missing = full.id + 100
+        payload = {"class_ids": [self.fitness_class.id, full.id, missing], "client_name": "Faris"}
+        response = self.client.post("/api/book/bulk", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual(results[0], {"class_id": self.fitness_class.id, "status": "booked"})
+        self.assertEqual(results[1]["error"], "No available slots.")
+        self.assertEqual(results[2]["error"], "Class not found.")
+        full.refresh_from_db()
+        self.assertEqual(full.available_slots, 0)
+        self.assertEqual(Booking.objects.count(), 1)
+
+        response = self.client.post("/api/book/bulk", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["results"][0]["error"], "You have already booked this class.")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_bulk_booking_rejects_bad_payload(self):
+        response = self.client.post(
+            "/api/book/bulk", {"class_ids": "1,2", "client_name": "Faris"}, content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+
     # ─────────────────────────────────────────────────────────────────────────────
-    # 3) GET /api/bookings
+    # 3) POST /api/waitlist, POST /api/bookings/<id>/cancel
+    # ─────────────────────────────────────────────────────────────────────────────
+    def _waitlister(self, n):
+        user = User.objects.create_user(username=f"w{n}@example.com", email=f"w{n}@example.com", first_name=f"W{n}")
+        return user, {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=user).key}"}
+
+    def _fill_class(self):
+        FitnessClass.objects.filter(id=self.fitness_class.id).update(available_slots=1)
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        return Booking.objects.get(user=self.user)
+
+    def test_join_waitlist_only_when_full(self):
+        payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+        response = self.client.post("/api/waitlist", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+        self._fill_class()
+        response = self.client.post("/api/waitlist", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already booked", response.json()["error"])
+
+        positions = []
+        for n in range(2):
+            _, auth = self._waitlister(n)
+            payload = {"class_id": self.fitness_class.id, "client_name": f"W{n}"}
+            response = self.client.post("/api/waitlist", payload, content_type="application/json", **auth)
+            self.assertEqual(response.status_code, 201)
+            positions.append(response.json()["position"])
+        self.assertEqual(positions, [1, 2])
+
+        again = self.client.post("/api/waitlist", payload, content_type="application/json", **auth)
+        self.assertEqual(again.status_code, 400)
+        self.assertIn("Already on the waitlist", again.json()["error"])
+
+    def test_waitlist_tail_is_not_editable(self):
+        # Lowering it would hand out positions already taken.
+        self.assertNotIn("waitlist_tail", modelform_factory(FitnessClass, fields="__all__").base_fields)
+
+    def test_non_integer_class_id_rejected(self):
+        payload = {"class_id": "abc", "client_name": "Faris"}
+        for url in ("/api/waitlist", "/api/book"):
+            response = self.client.post(url, payload, content_type="application/json", **self.auth)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], "class_id must be an integer.")
+
+    def test_cancel_promotes_head_of_waitlist(self):
+        booking = self._fill_class()
+        waiting = []
+        for n in range(2):
+            user, auth = self._waitlister(n)
+            payload = {"class_id": self.fitness_class.id, "client_name": f"W{n}"}
+            self.client.post("/api/waitlist", payload, content_type="application/json", **auth)
+            waiting.append(user)
+
+        response = self.client.post(f"/api/bookings/{booking.id}/cancel", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+        self.assertEqual(Booking.objects.get(fitness_class=self.fitness_class).user, waiting[0])
+        self.assertEqual(list(Waitlist.objects.values_list("user", flat=True)), [waiting[1].id])
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.available_slots, 0)
+
+    def test_cancel_without_waitlist_frees_the_slot(self):
+        booking = self._fill_class()
+        response = self.client.post(f"/api/bookings/{booking.id}/cancel", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.fitness_class.refresh_from_db()
+        self.assertEqual(self.fitness_class.available_slots, 1)
+
+    def test_cancel_other_users_booking_not_found(self):
+        booking = self._fill_class()
+        _, auth = self._waitlister(0)
+        response = self.client.post(f"/api/bookings/{booking.id}/cancel", **auth)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Booking.objects.filter(id=booking.id).exists())
+
+    # ─────────────────────────────────────────────────────────────────────────────
+    # 4) GET /api/bookings
     # ─────────────────────────────────────────────────────────────────────────────
     def test_get_own_bookings(self):
         Booking.objects.create(
             fitness_class=self.fitness_class,
+            user=self.user,
             client_name="Faris",
             client_email="faris@example.com"
         )
@@ -94,7 +541,720 @@ class BookingAPITestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 1)
 
+    def test_get_bookings_excludes_other_users(self):
+        other = User.objects.create_user(username="other@example.com", email="other@example.com", password="x")
+        Booking.objects.create(
+            fitness_class=self.fitness_class,
+            user=other,
+            client_name="Other",
+            client_email="other@example.com"
+        )
+        response = self.client.get("/api/bookings", **self.auth)
+        self.assertEqual(response.json(), [])
+
+    def test_get_bookings_query_count_is_constant(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get("/api/bookings?timezone=Asia/Kolkata", **self.auth)
+            return len(ctx.captured_queries)
+
+        Booking.objects.create(fitness_class=self.fitness_class, user=self.user, client_name="Faris", client_email="faris@example.com")
+        count_queries()  # warm the token cache
+        baseline = count_queries()
+        for i in range(10):
+            other = FitnessClass.objects.create(
+                name=f"Pilates {i}",
+                date_time=self.fitness_class.date_time,
+                instructor="Test Instructor",
+                total_slots=5,
+                available_slots=5
+            )
+            Booking.objects.create(fitness_class=other, user=self.user, client_name="Faris", client_email="faris@example.com")
+        self.assertEqual(count_queries(), baseline)
+
+    def test_fast_booking_rows_match_serializer(self):
+        Booking.objects.create(fitness_class=self.fitness_class, user=self.user, client_name="Faris", client_email="faris@example.com")
+        queryset = Booking.objects.select_related("fitness_class")
+        tz = pytz.timezone("America/New_York")
+        expected = [dict(row) for row in BookingSerializer(queryset, many=True, context={"tz": tz}).data]
+        self.assertEqual(serialize_booking_rows(booking_values(queryset), tz), expected)
+
+    def test_streamed_bookings_match_list(self):
+        for i in range(5):
+            other = FitnessClass.objects.create(
+                name=f"Pilates {i}", date_time=self.fitness_class.date_time, instructor="Test Instructor",
+                total_slots=5, available_slots=5
+            )
+            Booking.objects.create(fitness_class=other, user=self.user, client_name="Faris", client_email="faris@example.com")
+        url = "/api/bookings?timezone=Asia/Kolkata"
+        expected = self.client.get(url, **self.auth).json()
+
+        response = self.client.get(f"{url}&stream=1", **self.auth)
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), expected)
+
+        response = self.client.get(f"{url}&stream=ndjson", **self.auth)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+        response = async_to_sync(async_views.user_bookings)(RequestFactory().get(f"{url}&stream=1", **self.auth))
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(json.loads(async_to_sync(consume)()), expected)
+
+        self.assertEqual(self.client.get(f"{url}&stream=csv", **self.auth).status_code, 400)
+        Booking.objects.all().delete()
+        self.assertEqual(b"".join(self.client.get(f"{url}&stream=1", **self.auth).streaming_content), b"[]")
+
+    def test_stream_rows_batches(self):
+        self.assertEqual(list(stream_rows(range(5), list, "json", batch_size=2)), ["[", "0,1", ",2,3", ",4", "]"])
+        self.assertEqual("".join(stream_rows(range(3), list, "ndjson", batch_size=2)), "0\n1\n2\n")
+
     def test_get_bookings_with_email_param_blocked(self):
         response = self.client.get("/api/bookings?email=faris@example.com", **self.auth)
         self.assertEqual(response.status_code, 403)
         self.assertIn("email", response.json()["error"])
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="mia@example.com", email="mia@example.com", password="x", first_name="Mia")
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=user).key}"}
+        FitnessClass.objects.create(
+            name="Yoga", date_time=now() + timedelta(days=1), instructor="Asha", total_slots=5, available_slots=5
+        )
+        request_metrics.reset()
+
+    def test_metrics_report_latency_queries_and_serialization_per_route(self):
+        schedule_cache.clear()
+        for _ in range(2):
+            self.client.get("/api/classes?email=mia@example.com", **self.auth)
+        self.client.post("/api/bookings/999/cancel", **self.auth)
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('studio_requests_total{route="api/classes",method="GET",status="200"} 2', body)
+        self.assertIn('studio_requests_total{route="api/bookings/<int:booking_id>/cancel",method="POST",status="404"} 1', body)
+        self.assertIn('studio_request_duration_seconds_count{route="api/classes",method="GET"} 2', body)
+        # Token lookup, version lookup and the page on the first request; the
+        # second is served from the token and schedule caches.
+        self.assertIn('studio_request_db_queries_bucket{route="api/classes",method="GET",le="1"} 1', body)
+        serialize = next(line for line in body.splitlines()
+                         if line.startswith('studio_request_serialize_seconds_sum{route="api/classes"'))
+        self.assertGreater(float(serialize.split()[-1]), 0)
+
+    @override_settings(STUDIO_METRICS={"PROFILE_KEY": "s3cret"})
+    def test_profile_header_returns_cprofile_summary(self):
+        url = "/api/classes?email=mia@example.com"
+        response = self.client.get(url, HTTP_X_PROFILE="guess", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("results", response.json())
+
+        response = self.client.get(url, HTTP_X_PROFILE="s3cret", **self.auth)
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(response["X-Profile-Status"], "200")
+        self.assertIn("function calls", response.content.decode())
+
+
+class TimezoneServiceTestCase(TestCase):
+    def test_get_timezone_validates_and_reuses_zones(self):
+        self.assertIs(get_timezone("Asia/Kolkata"), get_timezone("Asia/Kolkata"))
+        self.assertIs(get_timezone("Mars/Olympus_Mons"), timezone.utc)
+        self.assertIs(get_timezone(""), timezone.utc)
+
+    def test_local_iso_is_memoized_and_follows_dst(self):
+        tz = get_timezone("Europe/London")
+        winter = datetime(2030, 1, 10, 9, tzinfo=pytz.UTC)
+        summer = datetime(2030, 7, 10, 9, tzinfo=pytz.UTC)
+        self.assertEqual(local_iso(winter, tz), "2030-01-10T09:00:00+00:00")
+        self.assertEqual(local_iso(summer, tz), "2030-07-10T10:00:00+01:00")
+        hits = local_iso.cache_info().hits
+        self.assertEqual(local_iso(summer, tz), "2030-07-10T10:00:00+01:00")
+        self.assertEqual(local_iso.cache_info().hits, hits + 1)
+
+
+class ScheduleCacheTestCase(TestCase):
+    def test_started_classes_are_trimmed_on_read(self):
+        cache = ScheduleCache(bucket_seconds=60)
+        key = cache.make_key("UTC", "", at=1000)
+        cache.set(key, [{"id": 1}, {"id": 2}], starts=[1010, 1030], next_cursor="abc")
+        self.assertEqual(cache.get(key, at=1005), ([{"id": 1}, {"id": 2}], "abc", (0,)))
+        self.assertEqual(cache.get(key, at=1020), ([{"id": 2}], "abc", (0,)))
+
+    def test_full_class_drops_has_slots_pages(self):
+        cache = ScheduleCache()
+        plain = cache.make_key("UTC", "")
+        open_only = cache.make_key("UTC", "has_slots=true")
+        for key in (plain, open_only):
+            cache.set(key, [{"id": 1, "available_slots": 1}], starts=[float("inf")])
+        cache.patch_slots(1, 0)
+        self.assertEqual(cache.get(plain)[::2], ([{"id": 1, "available_slots": 0}], (0, 1)))
+        self.assertIsNone(cache.get(open_only))
+
+    def test_reopened_class_drops_has_slots_pages(self):
+        cache = ScheduleCache()
+        plain = cache.make_key("UTC", "")
+        open_only = cache.make_key("UTC", "has_slots=true")
+        cache.set(plain, [{"id": 1, "available_slots": 0}], starts=[float("inf")])
+        cache.set(open_only, [{"id": 2, "available_slots": 3}], starts=[float("inf")])
+        cache.reopen(1, 1)
+        self.assertEqual(cache.get(plain)[0], [{"id": 1, "available_slots": 1}])
+        self.assertIsNone(cache.get(open_only))
+
+
+@override_settings(STUDIO_SLOT_STREAM={"POLL_SECONDS": 0})
+class SlotStreamTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="faris@example.com", email="faris@example.com", password="x", first_name="Faris"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        self.fitness_class = FitnessClass.objects.create(
+            name="Yoga", date_time=now() + timedelta(days=1), instructor="A", total_slots=5, available_slots=5
+        )
+
+    def test_subscription_coalesces_and_resets_when_full(self):
+        async def scenario():
+            subscription = Subscription(maxsize=2)
+            subscription.offer(1, 4)
+            subscription.offer(1, 3)
+            subscription.offer(2, 9)
+            self.assertEqual(await subscription.get(timeout=1), [(1, 3), (2, 9)])
+            for class_id in range(3):
+                subscription.offer(class_id, 0)
+            self.assertIs(await subscription.get(timeout=1), RESET)
+            self.assertIsNone(await subscription.get(timeout=0.01))
+            return subscription.resets
+        self.assertEqual(async_to_sync(scenario)(), 1)
+
+    def test_publish_from_another_thread_reaches_subscribers(self):
+        broker = SlotBroker()
+
+        async def scenario():
+            subscriptions = [broker.subscribe(poll_seconds=0) for _ in range(3)]
+            thread = threading.Thread(target=broker.publish, args=(7, 2))
+            thread.start()
+            batches = [await subscription.get(timeout=1) for subscription in subscriptions]
+            thread.join()
+            for subscription in subscriptions:
+                broker.unsubscribe(subscription)
+            return batches
+        self.assertEqual(async_to_sync(scenario)(), [[(7, 2)]] * 3)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_booking_is_pushed_to_the_stream(self):
+        url = "/api/classes/stream?email=faris@example.com"
+
+        def book():
+            payload = {"class_id": self.fitness_class.id, "client_name": "Faris"}
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+
+        async def scenario():
+            response = await async_views.class_stream(RequestFactory().get(url, **self.auth))
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            stream = response.streaming_content
+            self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+            await sync_to_async(book)()
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+        chunk = async_to_sync(scenario)()
+        self.assertEqual(
+            chunk, b'event: slots\ndata: [{"class_id": %d, "available_slots": 4}]\n\n' % self.fitness_class.id
+        )
+
+    def test_stream_requires_matching_email(self):
+        request = RequestFactory().get("/api/classes/stream?email=someone@example.com", **self.auth)
+        response = async_to_sync(async_views.class_stream)(request)
+        self.assertEqual(response.status_code, 403)
+
+
+class ClassSeriesTestCase(TestCase):
+    def setUp(self):
+        self.series = ClassSeries.objects.create(
+            name="Morning Flow", instructor="Asha", total_slots=12, weekdays="mon,wed",
+            start_time=time(7, 0), timezone="Europe/London", start_date=date(2030, 3, 18),
+        )
+
+    def test_occurrences_follow_weekdays_interval_and_dst(self):
+        self.series.interval_weeks = 2
+        starts = list(self.series.occurrences(date(2030, 3, 18), date(2030, 4, 7)))
+        self.assertEqual([s.date() for s in starts], [date(2030, 3, 18), date(2030, 3, 20), date(2030, 4, 1), date(2030, 4, 3)])
+        # 07:00 London is 07:00 UTC before the clocks change and 06:00 UTC after.
+        self.assertEqual([s.astimezone(pytz.UTC).hour for s in starts], [7, 7, 6, 6])
+
+    def test_materialize_is_incremental_and_skips_existing(self):
+        today = date(2030, 3, 18)
+        self.assertEqual(self.series.materialize(date(2030, 3, 31), chunk_size=3, today=today), 4)
+        self.assertEqual(self.series.materialize(date(2030, 4, 14), chunk_size=3, today=today), 4)
+        self.assertEqual(self.series.materialized_until, date(2030, 4, 14))
+        self.assertEqual(self.series.classes.filter(version=0).count(), 0)
+
+        self.series.classes.order_by("date_time").first().delete()
+        self.assertEqual(self.series.materialize(date(2030, 4, 14), today=today, resume=False), 1)
+        self.assertEqual(self.series.classes.count(), 8)
+        first = self.series.classes.order_by("date_time").first()
+        self.assertEqual((first.name, first.available_slots, first.total_slots), ("Morning Flow", 12, 12))
+        call_command("rollup_occupancy", check=True, stdout=StringIO())
+
+    def test_materialize_rejects_instructor_clashes(self):
+        FitnessClass.objects.create(
+            name="Private", date_time=datetime(2030, 3, 25, 7, 30, tzinfo=pytz.UTC), instructor="Asha",
+            total_slots=1, available_slots=1
+        )
+        with self.assertRaisesMessage(ValidationError, "instructor 'Asha' is double-booked"):
+            self.series.materialize(date(2030, 3, 31), chunk_size=1, today=date(2030, 3, 18))
+        self.assertEqual(self.series.classes.count(), 0)
+        self.assertIsNone(self.series.materialized_until)
+
+        self.series.weekdays = "mon,tue,wed,thu,fri,sat,sun"
+        self.series.start_date = localdate()
+        self.series.save()
+        FitnessClass.objects.create(
+            name="Private", date_time=next(self.series.occurrences(localdate(), localdate())), instructor="Asha",
+            total_slots=1, available_slots=1
+        )
+        err = StringIO()
+        call_command("materialize_classes", days=13, stdout=StringIO(), stderr=err)
+        self.assertIn("double-booked", err.getvalue())
+        self.assertEqual(self.series.classes.count(), 0)
+
+    def test_materialize_command_uses_rolling_horizon(self):
+        self.series.start_date = now().date()
+        self.series.save()
+        out = StringIO()
+        call_command("materialize_classes", days=13, stdout=out)
+        self.assertEqual(self.series.classes.count(), 4)
+        self.assertIn("Created 4 classes", out.getvalue())
+        call_command("materialize_classes", days=13, stdout=StringIO())
+        self.assertEqual(self.series.classes.count(), 4)
+
+
+class ScheduleConflictTestCase(TestCase):
+    def setUp(self):
+        self.start = datetime(2030, 6, 1, 9, 0, tzinfo=pytz.UTC)
+        self.yoga = FitnessClass.objects.create(
+            name="Yoga", date_time=self.start, duration=60, instructor="Asha", room="Studio 1",
+            total_slots=10, available_slots=10,
+        )
+
+    def candidate(self, minutes, instructor="Asha", room="", duration=30):
+        return FitnessClass(
+            name="Candidate", date_time=self.start + timedelta(minutes=minutes), duration=duration,
+            instructor=instructor, room=room, total_slots=10, available_slots=10,
+        )
+
+    def test_overlapping_and_adjacent_intervals(self):
+        conflicts = FitnessClass.objects.conflicts
+        self.assertEqual(conflicts([self.candidate(60)]), [])  # starts as Yoga ends
+        self.assertEqual(conflicts([self.candidate(-30)]), [])  # ends as Yoga starts
+        self.assertEqual(conflicts([self.candidate(30, instructor="Ben", room="Studio 2")]), [])
+
+        [clash] = conflicts([self.candidate(59)])
+        self.assertEqual((clash.kind, clash.name, clash.first), ("instructor", "Asha", self.yoga))
+        [clash] = conflicts([self.candidate(-10, instructor="Ben", room="Studio 1", duration=600)])
+        self.assertEqual((clash.kind, clash.second), ("room", self.yoga))
+        self.assertIn("room 'Studio 1' is double-booked", str(clash))
+
+        # Within a batch: the long class clashes with both later ones.
+        batch = [self.candidate(120, duration=120), self.candidate(150), self.candidate(200), self.candidate(240)]
+        self.assertEqual(
+            [(batch.index(c.first), batch.index(c.second)) for c in conflicts(batch)], [(0, 1), (0, 2)]
+        )
+
+    def test_clean_rejects_double_booking_but_not_the_class_itself(self):
+        self.yoga.full_clean()
+        with self.assertRaisesMessage(ValidationError, "instructor 'Asha' is double-booked"):
+            self.candidate(15).full_clean()
+
+
+class OccupancyAnalyticsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="faris@example.com", email="faris@example.com", first_name="Faris")
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        manager = User.objects.create_user(username="boss@example.com", email="boss@example.com", is_staff=True)
+        self.staff = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=manager).key}"}
+        namesake = User.objects.create_user(username="faris2@example.com", email="faris2@example.com", first_name="Faris")
+        self.namesake = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=namesake).key}"}
+        self.day = date(2030, 6, 1)
+        self.yoga, self.spin, self.core = [
+            FitnessClass.objects.create(
+                name=name, date_time=datetime(2030, 6, day, hour, tzinfo=pytz.UTC), instructor=instructor,
+                total_slots=4, available_slots=4,
+            )
+            for name, day, hour, instructor in [("Yoga", 1, 9, "Asha"), ("Spin", 1, 18, "Asha"), ("Core", 2, 9, "Ben")]
+        ]
+
+    def rollup(self, day, instructor):
+        row = OccupancyRollup.objects.filter(day=day, instructor=instructor).first()
+        return row and (row.classes, row.capacity, row.booked)
+
+    def book(self, *class_ids, auth=None):
+        payload = {"class_ids": list(class_ids), "client_name": "Faris"}
+        return self.client.post("/api/book/bulk", payload, content_type="application/json", **(auth or self.auth))
+
+    def test_bookings_and_cancellations_move_counters(self):
+        self.assertEqual(self.rollup(self.day, "Asha"), (2, 8, 0))
+        self.client.post("/api/book", {"class_id": self.yoga.id, "client_name": "Faris"}, content_type="application/json", **self.namesake)
+        self.book(self.yoga.id, self.spin.id, self.core.id)
+        self.assertEqual(self.rollup(self.day, "Asha"), (2, 8, 3))
+        self.assertEqual(self.rollup(date(2030, 6, 2), "Ben"), (1, 4, 1))
+
+        booking = Booking.objects.get(fitness_class=self.yoga, user=self.user)
+        self.client.post(f"/api/bookings/{booking.id}/cancel", **self.auth)
+        self.assertEqual(self.rollup(self.day, "Asha"), (2, 8, 2))
+        call_command("rollup_occupancy", check=True, stdout=StringIO())
+
+    def test_class_edits_refresh_both_rollups(self):
+        self.book(self.spin.id)
+        self.spin.date_time += timedelta(days=1)
+        self.spin.instructor = "Ben"
+        self.spin.save()
+        self.assertEqual(self.rollup(self.day, "Asha"), (1, 4, 0))
+        self.assertEqual(self.rollup(date(2030, 6, 2), "Ben"), (2, 8, 1))
+        self.yoga.delete()
+        self.assertIsNone(self.rollup(self.day, "Asha"))
+        call_command("rollup_occupancy", check=True, stdout=StringIO())
+
+    def test_check_reports_drift_and_catch_up_repairs_it(self):
+        # A class edited with QuerySet.update() goes around the signals.
+        FitnessClass.objects.filter(pk=self.core.pk).update(total_slots=10, available_slots=10)
+        OccupancyRollup.objects.filter(instructor="Asha").delete()
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, "2 of 2 rollup rows differ"):
+            call_command("rollup_occupancy", check=True, stdout=StringIO(), stderr=err)
+        self.assertIn("2030-06-02 'Ben': stored (classes, capacity, booked) = (1, 4, 0), recomputed = (1, 10, 0)", err.getvalue())
+
+        out = StringIO()
+        call_command("rollup_occupancy", since=self.day, stdout=out)
+        self.assertIn("Rewrote 2 of 2 rollup rows", out.getvalue())
+        self.assertEqual(self.rollup(self.day, "Asha"), (2, 8, 0))
+        call_command("rollup_occupancy", check=True, stdout=StringIO())
+
+    def test_analytics_endpoint_for_staff(self):
+        self.book(self.yoga.id, self.spin.id, self.core.id)
+        self.book(self.yoga.id, auth=self.namesake)
+        url = "/api/analytics?date_from=2030-06-01&date_to=2030-06-02"
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 403)
+
+        body = self.client.get(url, **self.staff).json()
+        self.assertEqual(body["totals"], {"classes": 3, "capacity": 12, "booked": 4, "fill_rate": 0.3333})
+        self.assertEqual(
+            [(row["day"], row["booked"], row["fill_rate"]) for row in body["results"]],
+            [("2030-06-01", 3, 0.375), ("2030-06-02", 1, 0.25)],
+        )
+        body = self.client.get(f"{url}&group_by=instructor&instructor=Asha", **self.staff).json()
+        self.assertEqual(body["results"], [{"instructor": "Asha", "classes": 2, "capacity": 8, "booked": 3, "fill_rate": 0.375}])
+        body = self.client.get(f"{url}&group_by=class", **self.staff).json()
+        self.assertEqual([(row["name"], row["booked"]) for row in body["results"]], [("Yoga", 2), ("Spin", 1), ("Core", 1)])
+
+        for query in ("group_by=room", "date_from=2030-06-03&date_to=2030-06-01", "date_from=2029-01-01&date_to=2030-06-01"):
+            self.assertEqual(self.client.get(f"/api/analytics?{query}", **self.staff).status_code, 400)
+
+
+class BulkTransferTestCase(TestCase):
+    def write_file(self, suffix, text):
+        handle = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        handle.write(text)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_import_creates_then_updates_by_id(self):
+        path = self.write_file(".csv", (
+            "name,date_time,instructor,total_slots\n"
+            "Yoga,2030-06-01T07:00:00,Asha,10\n"
+            "Spin,2030-06-01T18:30:00+00:00,Ben,20\n"
+            "Zumba,2030-06-02T09:00:00,Asha,15\n"
+        ))
+        out = StringIO()
+        call_command("import_classes", path, batch_size=2, timezone="Europe/London", stdout=out)
+        self.assertIn("Imported 3 classes (3 created, 0 updated)", out.getvalue())
+        yoga = FitnessClass.objects.get(name="Yoga")
+        self.assertEqual(yoga.date_time, datetime(2030, 6, 1, 6, 0, tzinfo=pytz.UTC))  # BST
+        self.assertEqual(yoga.available_slots, 10)
+        self.assertEqual(FitnessClass.objects.filter(version=0).count(), 0)
+
+        Booking.objects.create(fitness_class=yoga, client_name="A", client_email="a@example.com")
+        FitnessClass.objects.filter(pk=yoga.pk).update(available_slots=9)
+        path = self.write_file(".jsonl", "\n".join([
+            json.dumps({"id": yoga.pk, "name": "Yoga Flow", "date_time": "2030-06-01T06:00:00Z",
+                        "instructor": "Asha", "total_slots": 12}),
+            json.dumps({"name": "Pilates", "date_time": "2030-06-03T08:00:00Z", "instructor": "Cy",
+                        "total_slots": 8, "available_slots": 8}),
+        ]))
+        out = StringIO()
+        call_command("import_classes", path, stdout=out)
+        self.assertIn("(1 created, 1 updated)", out.getvalue())
+        yoga.refresh_from_db()
+        self.assertEqual((yoga.name, yoga.total_slots, yoga.available_slots), ("Yoga Flow", 12, 11))
+
+    def test_import_reports_bad_line_and_keeps_earlier_batches(self):
+        path = self.write_file(".csv", (
+            "name,date_time,instructor,total_slots\n"
+            "Yoga,2030-06-01T07:00:00Z,Asha,10\n"
+            "Spin,next tuesday,Ben,20\n"
+        ))
+        with self.assertRaisesMessage(CommandError, "line 3: date_time must be an ISO 8601 datetime"):
+            call_command("import_classes", path, batch_size=1, stdout=StringIO())
+        self.assertEqual(list(FitnessClass.objects.values_list("name", flat=True)), ["Yoga"])
+
+    def test_import_rejects_clash_with_line_number(self):
+        FitnessClass.objects.create(
+            name="Yoga", date_time=datetime(2030, 6, 1, 9, tzinfo=pytz.UTC), instructor="Asha", room="Studio 1",
+            total_slots=10, available_slots=10,
+        )
+        path = self.write_file(".csv", (
+            "name,date_time,instructor,total_slots,duration,room\n"
+            "Spin,2030-06-01T10:00:00Z,Asha,10,45,Studio 1\n"
+            "Core,2030-06-01T10:45:00Z,Ben,10,30,Studio 1\n"
+            "Barre,2030-06-01T11:00:00Z,Cy,10,30,Studio 1\n"
+        ))
+        with self.assertRaisesMessage(CommandError, "line 4: room 'Studio 1' is double-booked"):
+            call_command("import_classes", path, batch_size=2, stdout=StringIO())
+        # The first batch, back to back with Yoga and with each other, was imported.
+        self.assertEqual(
+            list(FitnessClass.objects.values_list("name", "duration")), [("Yoga", 60), ("Spin", 45), ("Core", 30)]
+        )
+
+    def test_export_streams_csv_and_jsonl(self):
+        yoga = FitnessClass.objects.create(
+            name="Yoga", date_time=datetime(2030, 6, 1, 7, tzinfo=pytz.UTC), instructor="Asha",
+            total_slots=10, available_slots=8,
+        )
+        spin = FitnessClass.objects.create(
+            name="Spin", date_time=datetime(2030, 6, 2, 7, tzinfo=pytz.UTC), instructor="Ben",
+            total_slots=10, available_slots=9,
+        )
+        for fitness_class, email in [(yoga, "a@example.com"), (yoga, "b@example.com"), (spin, "a@example.com")]:
+            Booking.objects.create(fitness_class=fitness_class, client_name="Client", client_email=email)
+
+        out, err = StringIO(), StringIO()
+        call_command("export_bookings", chunk_size=1, stdout=out, stderr=err)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "id,class_id,class_name,date_time,client_name,client_email,booked_at")
+        self.assertEqual(len(lines), 4)
+        self.assertIn(f",{yoga.pk},Yoga,2030-06-01T07:00:00+00:00,Client,a@example.com,", lines[1])
+        self.assertIn("Exported 3 bookings", err.getvalue())
+
+        path = self.write_file(".jsonl", "")
+        call_command("export_bookings", output=path, email="A@example.com", stderr=StringIO())
+        with open(path, encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual([row["class_name"] for row in rows], ["Yoga", "Spin"])
+
+
+class StructuredLoggingTestCase(TestCase):
+    def test_events_are_written_as_json_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "activity.log")
+            handler = AsyncRotatingFileHandler(path)
+            log = logging.getLogger("studio.tests.json")
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+            try:
+                log_event(log, logging.INFO, "booking.created", class_id=7)
+            finally:
+                log.removeHandler(handler)
+                handler.close()
+            with open(path) as fh:
+                entry = json.loads(fh.readline())
+        self.assertEqual(entry["event"], "booking.created")
+        self.assertEqual(entry["class_id"], 7)
+
+    def test_tracebacks_reach_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "activity.log")
+            handler = AsyncRotatingFileHandler(path)
+            log = logging.getLogger("studio.tests.exc")
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+            try:
+                try:
+                    raise ValueError("bad row")
+                except ValueError:
+                    log.error("import.failed", exc_info=True, extra={"event": "import.failed", "fields": {}})
+            finally:
+                log.removeHandler(handler)
+                handler.close()
+            with open(path) as fh:
+                entry = json.loads(fh.readline())
+        self.assertEqual(entry["event"], "import.failed")
+        self.assertIn("ValueError: bad row", entry["exc"])
+
+    def test_sampling_keeps_warnings(self):
+        sampler = SamplingFilter({"classes.listed": 0.0})
+        record = logging.LogRecord("studio", logging.INFO, __file__, 1, "classes.listed", None, None)
+        record.event = "classes.listed"
+        self.assertFalse(sampler.filter(record))
+        record.levelno = logging.WARNING
+        self.assertTrue(sampler.filter(record))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            handler = AsyncRotatingFileHandler(os.path.join(tmp, "activity.log"), queue_size=1)
+            handler.listener.stop()
+            try:
+                record = logging.LogRecord("studio", logging.INFO, __file__, 1, "x", None, None)
+                handler.enqueue(record)
+                handler.enqueue(record)
+                self.assertEqual(handler.dropped, 1)
+            finally:
+                handler.listener = None
+                handler.close()
+
+
+# The real hasher, at a cheap cost: the test settings profile uses MD5.
+@override_settings(PASSWORD_HASHERS=["studio.hashers.TunablePBKDF2PasswordHasher"], STUDIO_PASSWORD_ITERATIONS=1000)
+class AuthEndpointsTestCase(TestCase):
+    def signup(self, email="new@example.com"):
+        payload = {"name": "New", "email": email, "password": "secret123"}
+        return self.client.post("/api/signup", payload, content_type="application/json")
+
+    def test_signup_is_a_single_user_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.signup()
+        self.assertEqual(response.status_code, 200)
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(writes), 2)  # auth_user + authtoken_token
+        self.assertEqual(User.objects.get(email="new@example.com").first_name, "New")
+
+    def test_signup_duplicate_email(self):
+        self.signup()
+        response = self.signup()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Email already exists")
+
+    def test_login_returns_signup_token(self):
+        token = self.signup().json()["token"]
+        payload = {"email": "new@example.com", "password": "secret123"}
+        response = self.client.post("/api/login", payload, content_type="application/json")
+        self.assertEqual(response.json()["token"], token)
+
+        payload["password"] = "wrong"
+        response = self.client.post("/api/login", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_rehashes_with_configured_cost(self):
+        self.signup()
+        payload = {"email": "new@example.com", "password": "secret123"}
+        with self.settings(STUDIO_PASSWORD_ITERATIONS=2000):
+            self.client.post("/api/login", payload, content_type="application/json")
+        self.assertTrue(User.objects.get(email="new@example.com").password.startswith("pbkdf2_sha256$2000$"))
+
+
+class SQLiteProfileTestCase(TestCase):
+    def test_tuned_options_apply_pragmas_and_immediate_writes(self):
+        options = tuned_options({"mmap_size": 0})
+        self.assertIn("PRAGMA journal_mode=WAL", options["init_command"])
+        self.assertIn("PRAGMA mmap_size=0", options["init_command"])
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+
+    def test_serialized_write_queues_other_threads(self):
+        def try_write(result):
+            with serialized_write():
+                result.append("wrote")
+
+        with override_settings(STUDIO_SERIALIZE_WRITES=True):
+            result = []
+            with serialized_write():
+                writer = threading.Thread(target=try_write, args=(result,))
+                writer.start()
+                writer.join(timeout=0.2)
+                self.assertEqual(result, [])
+            writer.join()
+            self.assertEqual(result, ["wrote"])
+
+
+@override_settings(STUDIO_READ_REPLICAS=["replica"], STUDIO_SCHEDULE_CACHE={"ENABLED": False})
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+    """The primary is the test database; the replica is a separate SQLite file."""
+    # Resolved in setUpClass, after the replica alias exists.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings["replica"] = {
+            **connections["default"].settings_dict,
+            "NAME": os.path.join(cls.replica_dir, "replica.sqlite3"),
+        }
+        call_command("migrate", database="replica", verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="faris@example.com", email="faris@example.com", password="x", first_name="Faris"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        starts = now() + timedelta(days=1)
+        for db in ("default", "replica"):
+            FitnessClass.objects.using(db).create(
+                id=1, name="Yoga", date_time=starts, instructor="A", total_slots=5, available_slots=5
+            )
+
+    def test_check_requires_a_shared_pin_cache(self):
+        local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with self.settings(CACHES=local):
+            self.assertEqual([e.id for e in check_replica_pin_cache(None)], ["studio.E001"])
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "studio_cache"}}
+        with self.settings(CACHES=shared):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with self.settings(STUDIO_READ_REPLICAS=[], CACHES=local):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_class_list_reads_from_replica(self):
+        FitnessClass.objects.using("default").update(name="Primary only")
+        body = self.client.get("/api/classes?email=faris@example.com", **self.auth).json()
+        self.assertEqual(body["results"][0]["name"], "Yoga")
+
+    def test_writes_go_to_primary_and_pin_the_writer(self):
+        payload = {"class_id": 1, "client_name": "Faris"}
+        response = self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.using("default").count(), 1)
+        self.assertEqual(Booking.objects.using("replica").count(), 0)
+
+        # Within the pin window the writer reads the primary...
+        self.assertEqual(len(self.client.get("/api/bookings", **self.auth).json()), 1)
+        # ...and afterwards the (not yet replicated) replica.
+        cache.clear()
+        self.assertEqual(len(self.client.get("/api/bookings", **self.auth).json()), 0)
+
+    def test_materialize_counts_new_classes_on_the_primary(self):
+        series = ClassSeries.objects.create(
+            name="Morning Flow", instructor="Asha", total_slots=12, weekdays="mon,wed",
+            start_time=time(7, 0), timezone="UTC", start_date=date(2030, 3, 18),
+        )
+        self.assertEqual(series.materialize(date(2030, 3, 31), today=date(2030, 3, 18)), 4)
+        created = FitnessClass.objects.using("default").filter(series=series)
+        self.assertEqual(created.count(), 4)
+        self.assertFalse(created.filter(version=0).exists())
+
+    def test_streamed_bookings_read_the_pinned_database(self):
+        payload = {"class_id": 1, "client_name": "Faris"}
+        self.client.post("/api/book", payload, content_type="application/json", **self.auth)
+
+        # The rows are read after the middleware has returned.
+        response = self.client.get("/api/bookings?stream=1", **self.auth)
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 1)
+
+        view = ReplicaPinningMiddleware(async_views.user_bookings)
+        response = async_to_sync(view)(RequestFactory().get("/api/bookings?stream=1", **self.auth))
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(len(json.loads(async_to_sync(consume)())), 1)
@@ -1,16 +1,39 @@
+from django.conf import settings
 from django.urls import path
+from . import async_views
+from .metrics import metrics_view
 from .views import (
     ClassListView,
     BookClassView,
+    BulkBookClassView,
     UserBookingsView,
+    JoinWaitlistView,
+    CancelBookingView,
+    AnalyticsView,
     signup_view,
     login_view
 )
 
+if settings.STUDIO_ASYNC_VIEWS:
+    class_list_view = async_views.class_list
+    user_bookings_view = async_views.user_bookings
+else:
+    class_list_view = ClassListView.as_view()
+    user_bookings_view = UserBookingsView.as_view()
+
 urlpatterns = [
-    path('api/classes', ClassListView.as_view(), name='class-list'),
+    path('api/classes', class_list_view, name='class-list'),
     path('api/book', BookClassView.as_view(), name='book-class'),
-    path('api/bookings', UserBookingsView.as_view(), name='user-bookings'),
+    path('api/book/bulk', BulkBookClassView.as_view(), name='book-class-bulk'),
+    path('api/bookings', user_bookings_view, name='user-bookings'),
+    path('api/bookings/<int:booking_id>/cancel', CancelBookingView.as_view(), name='cancel-booking'),
+    path('api/waitlist', JoinWaitlistView.as_view(), name='join-waitlist'),
+    path('api/analytics', AnalyticsView.as_view(), name='analytics'),
     path('api/signup', signup_view, name='signup'),
     path('api/login', login_view, name='login'),
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+if settings.STUDIO_ASYNC_VIEWS:
+    # An endless stream needs the ASGI server; under WSGI it would tie up a worker thread.
+    urlpatterns.append(path('api/classes/stream', async_views.class_stream, name='class-stream'))
@@ -1,14 +1,165 @@
 # studio/utils.py
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags, quote_etag
+from django.utils.timezone import is_naive, localdate, make_aware
 from rest_framework.response import Response
 from rest_framework import status
 
+from .timezones import get_timezone
+
+TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def _user_key(user, field):
+    # CachedTokenAuthentication attaches pre-normalized email/name keys.
+    key = getattr(user, f'{field}_key', None)
+    if key is None:
+        key = (user.email if field == 'email' else user.first_name).strip().lower()
+    return key
+
+
 def token_email_match(request):
  
     email = request.query_params.get('email') or request.data.get('email')
     if not email:
         return False, Response({'error': 'Email parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    if request.user.email.strip().lower() != email.strip().lower():
+    if _user_key(request.user, 'email') != email.strip().lower():
         return False, Response({'error': 'Email does not match token.'}, status=status.HTTP_403_FORBIDDEN)
 
     return True, None
+
+
+def client_name_match(request, client_name):
+    if client_name.strip().lower() != _user_key(request.user, 'name'):
+        return False, Response({'error': 'Client name must match your registered name.'}, status=status.HTTP_403_FORBIDDEN)
+
+    return True, None
+
+
+def parse_class_id(value):
+    """A class_id from a request body as an int (digits in a string are fine too)."""
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return None, Response({'error': 'class_id must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def resolve_timezone(tz_name):
+    """
+    Map a ?timezone= value to a tzinfo, falling back to UTC. Meant to be
+    called once per request and handed to the serializers via context.
+    """
+    return get_timezone(tz_name)
+
+
+def _parse_bound(value, end_of_day=False):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if is_naive(parsed):
+        parsed = make_aware(parsed)
+    return parsed
+
+
+def parse_class_filters(params):
+    """
+    Turn the ?instructor=, ?date_from=, ?date_to= and ?has_slots= query
+    params into ORM lookups for FitnessClass. Dates accept either
+    YYYY-MM-DD or a full ISO timestamp; a bare date_to covers the whole day.
+    """
+    filters = {}
+
+    instructor = params.get('instructor')
+    if instructor:
+        filters['instructor'] = instructor.strip()
+
+    try:
+        if params.get('date_from'):
+            filters['date_time__gte'] = _parse_bound(params['date_from'])
+        if params.get('date_to'):
+            filters['date_time__lte'] = _parse_bound(params['date_to'], end_of_day=True)
+    except ValueError:
+        return None, Response({'error': 'date_from/date_to must be YYYY-MM-DD or ISO 8601.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if params.get('has_slots', '').lower() in TRUTHY:
+        filters['available_slots__gt'] = 0
+
+    return filters, None
+
+
+def parse_day_range(params, max_days, default_days=30):
+    """
+    ?date_from= and ?date_to= (YYYY-MM-DD, both inclusive) as a pair of
+    dates. Without them the range is the `default_days` days up to today;
+    it may span at most `max_days`.
+    """
+    try:
+        date_to = parse_date(params['date_to']) if params.get('date_to') else localdate()
+        date_from = (
+            parse_date(params['date_from']) if params.get('date_from')
+            else date_to and date_to - timedelta(days=default_days - 1)
+        )
+    except ValueError:
+        date_from = date_to = None
+    if date_from is None or date_to is None:
+        return None, Response({'error': 'date_from/date_to must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+    if date_from > date_to:
+        return None, Response({'error': 'date_from is after date_to.'}, status=status.HTTP_400_BAD_REQUEST)
+    if (date_to - date_from).days >= max_days:
+        return None, Response({'error': f'The range may span at most {max_days} days.'}, status=status.HTTP_400_BAD_REQUEST)
+    return (date_from, date_to), None
+
+
+def parse_since(params):
+    """The ?since=<version> delta cursor as an int, or None when absent."""
+    since = params.get('since')
+    if since is None:
+        return None, None
+    # isdecimal, not isdigit: '²' is a digit that int() refuses.
+    if not since.isdecimal():
+        return None, Response({'error': 'since must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+    return int(since), None
+
+
+def parse_stream(params):
+    """
+    ?stream=1 (or json) streams the usual JSON array, ?stream=ndjson one
+    object per line; None when the list should be rendered in one piece.
+    """
+    value = params.get('stream', '').lower()
+    if value == 'ndjson':
+        return 'ndjson', None
+    if value in TRUTHY or value == 'json':
+        return 'json', None
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None, None
+    return None, Response({'error': 'stream must be 1, json or ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def list_etag(versions, params):
+    """
+    ETag for a list response: the versions it was built from plus a digest
+    of the query string, which decides page, filters and timezone.
+    """
+    query = '&'.join(f"{name}={value}" for name, value in sorted(params.items()))
+    digest = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    return quote_etag('.'.join(str(version) for version in versions) + '-' + digest)
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
@@ -1,116 +1,560 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import IsAuthenticated
-from studio.utils import token_email_match
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from studio.utils import (
+    token_email_match,
+    client_name_match,
+    parse_class_filters,
+    parse_class_id,
+    parse_day_range,
+    parse_since,
+    parse_stream,
+    resolve_timezone,
+    list_etag,
+    etag_matches,
+)
 from rest_framework.decorators import api_view
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
-from django.utils.timezone import now, localtime
+from django.utils.timezone import now
+from django.http import StreamingHttpResponse
 import logging
 import json
-from .models import FitnessClass, Booking
-from .serializers import FitnessClassSerializer, BookingSerializer
-from django.db import transaction
-# ------------------ Logging Setup ------------------
-
-logging.basicConfig(
-    filename='booking_activity.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+from functools import partial
+from .models import (
+    CATALOG,
+    SCHEDULE,
+    FitnessClass,
+    Booking,
+    ListVersion,
+    OccupancyRollup,
+    Waitlist,
+    bookings_version_key,
+    day_window,
+)
+from .serializers import (
+    FitnessClassSerializer,
+    BookingSerializer,
+    class_values,
+    booking_values,
+    serialize_class_rows,
+    serialize_booking_rows,
+    stream_rows,
+    STREAM_CONTENT_TYPES,
 )
+from .pagination import ScheduleCursorPagination
+from .cache import schedule_cache
+from .events import slot_events
+from .idempotency import idempotent
+from .logs import log_event
+from .sqlite import serialized_write
+from .timezones import local_iso
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+# ------------------ Logging ------------------
+# Handlers, rotation and sampling are configured by LOGGING in settings.py.
+
 logger = logging.getLogger(__name__)
 
 # ------------------ API: Class List ------------------
 
+# Beyond this many changed classes a ?since= delta asks for a full reload.
+MAX_DELTA_ROWS = ScheduleCursorPagination.max_page_size
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def slots_changed(slots_by_class, reopened=False):
+    """
+    Once the transaction commits, patch cached schedule pages and push the
+    new counts to /api/classes/stream subscribers.
+    """
+    def publish():
+        for class_id, available in slots_by_class.items():
+            if reopened:
+                schedule_cache.reopen(class_id, available)
+            else:
+                schedule_cache.patch_slots(class_id, available)
+            slot_events.publish(class_id, available)
+    transaction.on_commit(publish)
+
+
+def upcoming_classes(filters, cursor=None):
+    # Start from the cursor position when it is later than "now" so the
+    # index seek lands on the page instead of on the first upcoming class.
+    cutoff = now()
+    if cursor and cursor[0] > cutoff:
+        cutoff = cursor[0]
+    return FitnessClass.objects.filter(date_time__gte=cutoff).filter(**filters)
+
+
 class ClassListView(generics.ListAPIView):
-    queryset = FitnessClass.objects.filter(date_time__gte=now()).order_by('date_time')
+    queryset = FitnessClass.objects.all()
     serializer_class = FitnessClassSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ScheduleCursorPagination
+
+    def get_queryset(self):
+        return upcoming_classes(self.filters, self.paginator.decode_cursor(self.request))
 
     def get_serializer_context(self):
-        return {"request": self.request}
+        return {"request": self.request, "tz": resolve_timezone(self.request.query_params.get('timezone'))}
 
     def list(self, request, *args, **kwargs):
         valid, error_response = token_email_match(request)
         if not valid:
-            logger.warning(f"GET /classes/ blocked: token user = {request.user.email}")
+            log_event(logger, logging.WARNING, 'classes.blocked', user=request.user.email)
+            return error_response
+
+        self.filters, error_response = parse_class_filters(request.query_params)
+        if error_response:
+            return error_response
+        since, error_response = parse_since(request.query_params)
+        if error_response:
             return error_response
 
-        response = super().list(request, *args, **kwargs)
-        logger.info(f"GET /classes/ by {request.user.email} response: {response.data}")
+        cache_key = None
+        if since is None and schedule_cache.enabled:
+            cache_key = schedule_cache.key_for(request.query_params)
+            cached = schedule_cache.get(cache_key)
+            if cached is not None:
+                # A warm page carries the version it was built at, so it is
+                # answered without touching the database.
+                results, next_cursor, tag = cached
+                etag = list_etag((*tag, schedule_cache.bucket()), request.query_params)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+                log_event(logger, logging.INFO, 'classes.listed', user=request.user.email, count=len(results), cached=True)
+                response = Response({'next': self.paginator.link_for(request, next_cursor), 'results': results})
+                response['ETag'] = etag
+                response['X-Schedule-Version'] = tag[0]
+                return response
+
+        # One primary-key lookup decides whether the client's copy is current.
+        version, = ListVersion.objects.current(SCHEDULE)
+        etag = list_etag((version, schedule_cache.bucket()), request.query_params)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        if since is not None:
+            response = self.list_changes(since, version)
+        else:
+            response = self.list_page(request, version, cache_key)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['X-Schedule-Version'] = version
+        return response
+
+    def list_changes(self, since, version):
+        """
+        ?since=<version>: every upcoming class changed after that version.
+        Deleted classes are not reported; a deletion moves the version, so
+        clients that need to notice one reload the full list on a new ETag.
+        """
+        filters = {name: value for name, value in self.filters.items() if name != 'available_slots__gt'}
+        rows = list(
+            class_values(upcoming_classes(filters).filter(version__gt=since).order_by('version'))[:MAX_DELTA_ROWS + 1]
+        )
+        if len(rows) > MAX_DELTA_ROWS:
+            return Response({'error': 'Too many changes; reload the full list.'}, status=status.HTTP_410_GONE)
+        tz = resolve_timezone(self.request.query_params.get('timezone'))
+        log_event(logger, logging.INFO, 'classes.changes', user=self.request.user.email, since=since, count=len(rows))
+        return Response({'version': version, 'results': serialize_class_rows(rows, tz)})
+
+    def list_page(self, request, version, cache_key=None):
+        page = self.paginate_queryset(class_values(self.get_queryset()))
+        tz = resolve_timezone(request.query_params.get('timezone'))
+        response = self.get_paginated_response(serialize_class_rows(page, tz))
+        if cache_key is not None:
+            schedule_cache.set(
+                cache_key,
+                response.data['results'],
+                starts=[row['date_time'].timestamp() for row in page],
+                next_cursor=self.paginator.get_next_cursor(),
+                version=version,
+            )
+        log_event(logger, logging.INFO, 'classes.listed', user=request.user.email, count=len(page), cached=False)
         return response
 
 # ------------------ API: Book Class ------------------
 class BookClassView(generics.CreateAPIView):
+    """
+    Book one seat. Clients on flaky networks should send an Idempotency-Key
+    header so a retry replays the first response (see studio/idempotency.py);
+    without one, a repeat is refused by booking_class_user_uniq with 409.
+    """
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
+    @serialized_write()
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         class_id = request.data.get('class_id')
         client_name = request.data.get('client_name')
 
         if not (class_id and client_name):
-            logger.warning("Booking failed: Missing required fields.")
+            log_event(logger, logging.WARNING, 'booking.rejected', reason='missing_fields')
             return Response({'error': 'Missing required fields.'}, status=status.HTTP_400_BAD_REQUEST)
+        class_id, error_response = parse_class_id(class_id)
+        if error_response:
+            return error_response
 
         
-        if client_name.strip().lower() != request.user.first_name.strip().lower():
-            logger.warning(f"Booking blocked: name mismatch for token user {request.user.email}")
-            return Response({'error': 'Client name must match your registered name.'}, status=status.HTTP_403_FORBIDDEN)
+        valid, error_response = client_name_match(request, client_name)
+        if not valid:
+            log_event(logger, logging.WARNING, 'booking.rejected', reason='name_mismatch', user=request.user.email)
+            return error_response
 
         try:
-            
-            fitness_class = FitnessClass.objects.select_for_update().get(id=class_id)
-
-            if fitness_class.available_slots <= 0:
-                logger.info(f"Booking failed: No available slots for class {fitness_class.name}.")
-                return Response({'error': 'No available slots.'}, status=status.HTTP_400_BAD_REQUEST)
-
-          
-            Booking.objects.create(
-                fitness_class=fitness_class,
-                client_name=client_name,
-                client_email=request.user.email
+            # A second booking of the class fails at booking_class_user_uniq;
+            # rolling back the savepoint returns the seat reserve() took.
+            with transaction.atomic():
+                reserved = FitnessClass.objects.reserve(class_id)
+                if reserved:
+                    fitness_class = FitnessClass.objects.only('name', 'date_time', 'instructor', 'available_slots').get(id=class_id)
+                    Booking.objects.create(
+                        fitness_class=fitness_class,
+                        user=request.user,
+                        client_name=client_name,
+                        client_email=request.user.email
+                    )
+        except IntegrityError:
+            log_event(logger, logging.INFO, 'booking.rejected', reason='duplicate', user=request.user.email, class_id=class_id)
+            return Response({'error': 'You have already booked this class.'}, status=status.HTTP_409_CONFLICT)
+
+        if not reserved:
+            if not FitnessClass.objects.filter(id=class_id).exists():
+                return Response({'error': 'Class not found.'}, status=status.HTTP_404_NOT_FOUND)
+            log_event(logger, logging.INFO, 'booking.rejected', reason='no_slots', class_id=class_id)
+            return Response({'error': 'No available slots.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        OccupancyRollup.objects.count_bookings([(fitness_class.date_time, fitness_class.instructor, 1)])
+        slots_changed({fitness_class.id: fitness_class.available_slots})
+
+        log_event(
+            logger, logging.INFO, 'booking.created',
+            user=request.user.email, class_id=fitness_class.id, class_starts=fitness_class.date_time,
+        )
+        return Response({'message': 'Booking successful.'}, status=status.HTTP_201_CREATED)
+
+# ------------------ API: Bulk Book Classes ------------------
+
+MAX_BULK_BOOKINGS = 50
+
+
+class BulkBookClassView(generics.GenericAPIView):
+    """
+    Book several classes in a single request. All seats are reserved in one
+    transaction with one slot UPDATE and one bulk INSERT; each item reports
+    its own result. A user holds one seat per class, so a repeated id, or a
+    class the user has already booked, fails as already booked.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @serialized_write()
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        class_ids = request.data.get('class_ids')
+        client_name = request.data.get('client_name')
+
+        if not (class_ids and client_name):
+            log_event(logger, logging.WARNING, 'bulk_booking.rejected', reason='missing_fields')
+            return Response({'error': 'Missing required fields.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(class_ids, list) or len(class_ids) > MAX_BULK_BOOKINGS:
+            return Response(
+                {'error': f'class_ids must be a list of at most {MAX_BULK_BOOKINGS} ids.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            class_ids = [int(class_id) for class_id in class_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'class_ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid, error_response = client_name_match(request, client_name)
+        if not valid:
+            log_event(logger, logging.WARNING, 'bulk_booking.rejected', reason='name_mismatch', user=request.user.email)
+            return error_response
+
+        already = set(
+            Booking.objects.filter(user=request.user, fitness_class_id__in=class_ids)
+            .values_list('fitness_class_id', flat=True)
+        )
+        seats_by_class = {class_id: 1 for class_id in class_ids if class_id not in already}
+
+        try:
+            with transaction.atomic():
+                booked = FitnessClass.objects.reserve_many(seats_by_class)
+                Booking.objects.bulk_create(
+                    Booking(
+                        fitness_class_id=class_id,
+                        user=request.user,
+                        client_name=client_name,
+                        client_email=request.user.email
+                    )
+                    for class_id in seats_by_class if class_id in booked
+                )
+        except IntegrityError:
+            # A concurrent request booked one of them after the check above.
+            log_event(logger, logging.INFO, 'bulk_booking.rejected', reason='duplicate', user=request.user.email)
+            return Response({'error': 'You have already booked one of these classes.'}, status=status.HTTP_409_CONFLICT)
+        failed = set(seats_by_class) - booked
+        existing = set(FitnessClass.objects.filter(id__in=failed).values_list('id', flat=True)) if failed else set()
+
+        if booked:
+            classes = list(
+                FitnessClass.objects.filter(id__in=booked).values_list('id', 'date_time', 'instructor', 'available_slots')
+            )
+            OccupancyRollup.objects.count_bookings((date_time, instructor, 1) for _, date_time, instructor, _ in classes)
+            ListVersion.objects.bump(bookings_version_key(request.user.pk))
+            slots_changed({class_id: available for class_id, _, _, available in classes})
+
+        results, seen = [], set()
+        for class_id in class_ids:
+            if class_id in seen or class_id in already:
+                results.append({'class_id': class_id, 'status': 'failed', 'error': 'You have already booked this class.'})
+            elif class_id in booked:
+                results.append({'class_id': class_id, 'status': 'booked'})
+            else:
+                error = 'No available slots.' if class_id in existing else 'Class not found.'
+                results.append({'class_id': class_id, 'status': 'failed', 'error': error})
+            seen.add(class_id)
+
+        log_event(
+            logger, logging.INFO, 'bulk_booking.created',
+            user=request.user.email, booked=len(booked), requested=len(class_ids),
+        )
+        return Response(
+            {'results': results},
+            status=status.HTTP_201_CREATED if booked else status.HTTP_400_BAD_REQUEST
+        )
+
+# ------------------ API: Waitlist ------------------
+
+class JoinWaitlistView(generics.GenericAPIView):
+    """
+    Queue for a full class. When a booking for it is cancelled, the head of
+    the queue is booked into the freed seat automatically, so clients no
+    longer need to retry POST /api/book.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @serialized_write()
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        class_id = request.data.get('class_id')
+        client_name = request.data.get('client_name')
 
-            fitness_class.available_slots -= 1
-            fitness_class.save()
+        if not (class_id and client_name):
+            log_event(logger, logging.WARNING, 'waitlist.rejected', reason='missing_fields')
+            return Response({'error': 'Missing required fields.'}, status=status.HTTP_400_BAD_REQUEST)
+        class_id, error_response = parse_class_id(class_id)
+        if error_response:
+            return error_response
 
-            logger.info(f"Booking successful: {client_name} booked {fitness_class.name} at {localtime(fitness_class.date_time)}")
-            return Response({'message': 'Booking successful.'}, status=status.HTTP_201_CREATED)
+        valid, error_response = client_name_match(request, client_name)
+        if not valid:
+            log_event(logger, logging.WARNING, 'waitlist.rejected', reason='name_mismatch', user=request.user.email)
+            return error_response
 
-        except FitnessClass.DoesNotExist:
-            return Response({'error': 'Class not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if Booking.objects.filter(user=request.user, fitness_class_id=class_id).exists():
+            return Response({'error': 'You have already booked this class.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        position = FitnessClass.objects.next_waitlist_position(class_id)
+        if position is None:
+            if not FitnessClass.objects.filter(id=class_id).exists():
+                return Response({'error': 'Class not found.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(
+                {'error': 'Class has available slots; book it instead.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                Waitlist.objects.create(
+                    fitness_class_id=class_id,
+                    user=request.user,
+                    position=position,
+                    client_name=client_name,
+                    client_email=request.user.email
+                )
+        except IntegrityError:
+            return Response({'error': 'Already on the waitlist.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ahead = Waitlist.objects.filter(fitness_class_id=class_id, position__lt=position).count()
+        log_event(logger, logging.INFO, 'waitlist.joined', user=request.user.email, class_id=class_id, position=ahead + 1)
+        return Response(
+            {'message': 'Added to waitlist.', 'position': ahead + 1},
+            status=status.HTTP_201_CREATED
+        )
+
+# ------------------ API: Cancel Booking ------------------
+
+class CancelBookingView(generics.GenericAPIView):
+    """
+    Cancel one of the caller's bookings. The freed seat goes to the head of
+    the class's waitlist in the same transaction; only when nobody is
+    waiting does it go back to available_slots.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @serialized_write()
+    def post(self, request, booking_id, *args, **kwargs):
+        booking = Booking.objects.filter(id=booking_id, user=request.user).only('fitness_class_id', 'user_id').first()
+        if booking is None:
+            return Response({'error': 'Booking not found.'}, status=status.HTTP_404_NOT_FOUND)
+        class_id = booking.fitness_class_id
+
+        with transaction.atomic():
+            # The DELETE opens the transaction so it takes the write lock
+            # straight away; a concurrent cancel of the same booking sees 0.
+            # Deleting the instance (not a queryset) keeps it to that one
+            # statement; bump_owner_bookings moves the list version.
+            deleted, _ = booking.delete()
+            if not deleted:
+                return Response({'error': 'Booking not found.'}, status=status.HTTP_404_NOT_FOUND)
+            promoted = Waitlist.objects.promote(class_id)
+            if promoted is None:
+                FitnessClass.objects.release(class_id)
+                date_time, instructor, available = (
+                    FitnessClass.objects.filter(id=class_id).values_list('date_time', 'instructor', 'available_slots').get()
+                )
+                # A promotion keeps the seat booked, so only this path moves the counter.
+                OccupancyRollup.objects.count_bookings([(date_time, instructor, -1)])
+                slots_changed({class_id: available}, reopened=available == 1)
+
+        log_event(
+            logger, logging.INFO, 'booking.cancelled',
+            user=request.user.email, class_id=class_id,
+            promoted=promoted.client_email if promoted else None,
+        )
+        return Response({'message': 'Booking cancelled.'})
 
 # ------------------ API: View User Bookings ------------------
 
+# ?stream= responses fetch, serialize and send this many bookings at a time.
+STREAM_BATCH_ROWS = 500
+
+
 class UserBookingsView(generics.ListAPIView):
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user_email = self.request.user.email
-        logger.info(f"GET /bookings for authenticated user: {user_email}")
-        return Booking.objects.filter(client_email=user_email)
+        return Booking.objects.filter(user=self.request.user).select_related('fitness_class')
 
     def get_serializer_context(self):
-        return {"request": self.request}
+        return {"request": self.request, "tz": resolve_timezone(self.request.query_params.get('timezone'))}
 
     def list(self, request, *args, **kwargs):
         if 'email' in request.query_params:
-            logger.warning(
-                f"Blocked request: Attempt to override email using query param. Token belongs to {request.user.email}"
-            )
+            log_event(logger, logging.WARNING, 'bookings.blocked', reason='email_param', user=request.user.email)
             return Response(
                 {"error": "Passing 'email' in query params is not allowed."},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        return super().list(request, *args, **kwargs)
+        versions = ListVersion.objects.current(bookings_version_key(request.user.pk), CATALOG)
+        etag = list_etag((request.user.pk, *versions), request.query_params)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        stream, error_response = parse_stream(request.query_params)
+        if error_response:
+            return error_response
+
+        tz = resolve_timezone(request.query_params.get('timezone'))
+        if stream:
+            # The rows are read while the body is sent, after
+            # ReplicaPinningMiddleware has unpinned the request: pick the
+            # database now.
+            queryset = self.get_queryset()
+            rows = booking_values(queryset.using(queryset.db)).iterator(chunk_size=STREAM_BATCH_ROWS)
+            log_event(logger, logging.INFO, 'bookings.listed', user=request.user.email, stream=stream)
+            response = StreamingHttpResponse(
+                stream_rows(rows, partial(serialize_booking_rows, tz=tz), stream, STREAM_BATCH_ROWS),
+                content_type=STREAM_CONTENT_TYPES[stream],
+            )
+            response['ETag'] = etag
+            return response
+
+        rows = serialize_booking_rows(booking_values(self.get_queryset()), tz)
+        log_event(logger, logging.INFO, 'bookings.listed', user=request.user.email, count=len(rows))
+        return Response(rows, headers={'ETag': etag})
+
+# ------------------ API: Analytics ------------------
+
+ANALYTICS_GROUPS = ('day', 'instructor', 'class')
+MAX_ANALYTICS_DAYS = 366
+
+
+def fill_rate(capacity, booked):
+    return round(booked / capacity, 4) if capacity else None
+
+
+class AnalyticsView(generics.GenericAPIView):
+    """
+    Occupancy for staff: classes, seats, bookings and fill rate per day,
+    instructor or class over ?date_from..?date_to. Day and instructor
+    figures are summed from OccupancyRollup rows, one per day and
+    instructor, so a year costs the same as a week. Per-class figures read
+    each class's own slot counters.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in ANALYTICS_GROUPS:
+            return Response(
+                {'error': f"group_by must be one of {', '.join(ANALYTICS_GROUPS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        days, error_response = parse_day_range(request.query_params, MAX_ANALYTICS_DAYS)
+        if error_response:
+            return error_response
+        date_from, date_to = days
+        instructor = request.query_params.get('instructor', '').strip()
+
+        if group_by == 'class':
+            start, end = day_window(date_from, date_to)
+            classes = FitnessClass.objects.filter(date_time__gte=start, date_time__lt=end)
+            if instructor:
+                classes = classes.filter(instructor=instructor)
+            tz = resolve_timezone(request.query_params.get('timezone'))
+            rows = [
+                {
+                    'class_id': class_id, 'name': name, 'date_time': local_iso(date_time, tz),
+                    'instructor': teacher, 'classes': 1, 'capacity': total, 'booked': total - available,
+                }
+                for class_id, name, date_time, teacher, total, available in classes.order_by('date_time', 'id').values_list(
+                    'id', 'name', 'date_time', 'instructor', 'total_slots', 'available_slots'
+                )
+            ]
+        else:
+            rollups = OccupancyRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+            if instructor:
+                rollups = rollups.filter(instructor=instructor)
+            rows = list(
+                rollups.values(group_by).order_by(group_by).annotate(
+                    classes=Sum('classes'), capacity=Sum('capacity'), booked=Sum('booked'),
+                )
+            )
+
+        totals = {name: sum(row[name] for row in rows) for name in ('classes', 'capacity', 'booked')}
+        for row in rows:
+            row['fill_rate'] = fill_rate(row['capacity'], row['booked'])
+        log_event(logger, logging.INFO, 'analytics.viewed', user=request.user.email, group_by=group_by, count=len(rows))
+        return Response({
+            'date_from': date_from,
+            'date_to': date_to,
+            'group_by': group_by,
+            'totals': {**totals, 'fill_rate': fill_rate(totals['capacity'], totals['booked'])},
+            'results': rows,
+        })
 
 # ------------------ API: Signup ------------------
 
@@ -126,14 +570,15 @@ def signup_view(request):
         if not (name and email and password):
             return Response({'error': 'All fields are required (name, email, password).'}, status=400)
 
-        if User.objects.filter(email=email).exists():
+        # One INSERT for the user, one for the token. The unique indexes on
+        # username and email reject duplicates, so there is no pre-check.
+        try:
+            with serialized_write(), transaction.atomic():
+                user = User.objects.create_user(username=email, email=email, password=password, first_name=name)
+                token = Token.objects.create(user=user)
+        except IntegrityError:
             return Response({'error': 'Email already exists'}, status=400)
 
-        user = User.objects.create_user(username=email, email=email, password=password)
-        user.first_name = name
-        user.save()
-
-        token, _ = Token.objects.get_or_create(user=user)
         return Response({'message': 'Signup successful', 'token': token.key})
     
     except Exception as e:
@@ -152,17 +597,22 @@ def login_view(request):
         if not (email and password):
             return Response({'error': 'Email and password are required.'}, status=400)
 
+        # A single indexed lookup fetches the user and token together.
+        # check_password() re-hashes the stored password when the configured
+        # hasher or iteration count has changed.
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.select_related('auth_token').get(email=email)
         except User.DoesNotExist:
             return Response({'error': 'Invalid credentials'}, status=401)
 
-        user = authenticate(username=user.username, password=password)
-        if user:
-            token, _ = Token.objects.get_or_create(user=user)
-            return Response({'message': 'Login successful', 'token': token.key})
-        else:
+        if not (user.is_active and user.check_password(password)):
             return Response({'error': 'Invalid credentials'}, status=401)
+
+        try:
+            token = user.auth_token
+        except Token.DoesNotExist:
+            token = Token.objects.create(user=user)
+        return Response({'message': 'Login successful', 'token': token.key})
     
     except Exception as e:
         return Response({'error': str(e)}, status=400)
\ No newline at end of file